@@ -6,9 +6,8 @@
 - AI Search 인덱스 구성
 """
 
-import os
-import json
 import sys
+import argparse
 from pathlib import Path
 from datetime import datetime
 
@@ -29,42 +28,36 @@ except ImportError:
     sys.exit(1)
 
 try:
-    from azure.storage.blob import BlobServiceClient, BlobClient
     from azure.identity import DefaultAzureCredential
-except ImportError:
-    print("azure-storage-blob, azure-identity 패키지가 필요합니다")
-    print("pip install azure-storage-blob azure-identity")
-    sys.exit(1)
-
-try:
-    from azure.search.documents import SearchClient
-    from azure.search.documents.indexes import SearchIndexClient
     from azure.search.documents.indexes.models import (
-        SearchIndex,
-        SearchField,
         SearchFieldDataType,
         SimpleField,
         SearchableField,
-        VectorSearch,
-        HnswAlgorithmConfiguration,
-        VectorSearchProfile,
-        SemanticConfiguration,
-        SemanticField,
-        SemanticPrioritizedFields,
-        SemanticSearch,
     )
 except ImportError:
-    print("azure-search-documents 패키지가 필요합니다")
-    print("pip install azure-search-documents")
+    print("azure-identity, azure-search-documents 패키지가 필요합니다")
+    print("pip install azure-identity azure-search-documents")
     sys.exit(1)
 
+# 업로드/청킹/인덱싱은 scripts/ingest 공용 패키지 사용
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from ingest import (  # noqa: E402
+    IngestManifest,
+    IngestOptions,
+    LocalSource,
+    add_ingest_arguments,
+    add_resource_arguments,
+    create_search_index,
+    index_directory,
+    resolve_resource_names,
+    upload_files,
+)
+
 
 # =============================================================================
-# 설정
+# 설정 (리소스 이름은 -g 자동 감지 또는 --storage/--search로 지정)
 # =============================================================================
-STORAGE_ACCOUNT = "staifoundry20260128"
 CONTAINER_NAME = "documents"
-SEARCH_SERVICE = "srch-aifoundry-7kkykgt6"
 INDEX_NAME = "aifoundry-docs-index"
 OUTPUT_DIR = Path("./test_documents")
 
@@ -427,164 +420,84 @@ def create_pptx(filename: str, ppt_info: dict, output_dir: Path) -> Path:
 
 
 # =============================================================================
-# Azure 업로드 함수
+# Azure 업로드 / 인덱싱 (공용 ingest 패키지)
 # =============================================================================
-def upload_to_blob(files: list, storage_account: str, container_name: str):
-    """Blob Storage에 파일 업로드"""
-    print(f"\n📤 Blob Storage 업로드 중...")
-    
-    credential = DefaultAzureCredential()
-    account_url = f"https://{storage_account}.blob.core.windows.net"
-    
-    try:
-        blob_service_client = BlobServiceClient(account_url, credential=credential)
-        
-        # 컨테이너 생성 (존재하지 않으면)
-        container_client = blob_service_client.get_container_client(container_name)
-        try:
-            container_client.create_container()
-            print(f"  ✅ 컨테이너 생성: {container_name}")
-        except Exception as e:
-            if "ContainerAlreadyExists" in str(e):
-                print(f"  ℹ️ 컨테이너 존재: {container_name}")
-            else:
-                print(f"  ⚠️ 컨테이너 생성 오류: {e}")
-        
-        # 파일 업로드
-        for file_path in files:
-            blob_name = file_path.name
-            blob_client = container_client.get_blob_client(blob_name)
-            
-            with open(file_path, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
-            print(f"  ✅ 업로드: {blob_name}")
-        
-        print(f"\n📁 업로드 완료: {len(files)}개 파일")
-        
-    except Exception as e:
-        print(f"\n❌ Blob 업로드 실패: {e}")
-        print("   프라이빗 네트워크 환경에서는 Jumpbox에서 실행해야 합니다.")
+# 문서 제목/분류 등 청크에 함께 저장할 필드
+EXTRA_FIELDS = [
+    SearchableField(name="title", type=SearchFieldDataType.String, filterable=True, sortable=True),
+    SearchableField(name="category", type=SearchFieldDataType.String, filterable=True, facetable=True),
+    SimpleField(name="metadata_storage_path", type=SearchFieldDataType.String, filterable=True),
+    SearchableField(name="metadata_storage_name", type=SearchFieldDataType.String, filterable=True),
+]
+
+
+def document_metadata(storage_account: str, doc_infos: dict):
+    """source(파일명) → 청크 문서에 추가할 메타데이터"""
+    def metadata(filename: str) -> dict:
+        info = doc_infos.get(filename, {})
+        return {
+            "title": info.get("title", filename),
+            "category": info.get("category", "기타"),
+            "metadata_storage_path": f"https://{storage_account}.blob.core.windows.net/{CONTAINER_NAME}/{filename}",
+            "metadata_storage_name": filename,
+        }
+    return metadata
+
+
+def upload_and_index(args, files: list, doc_infos: dict, create_index: bool) -> bool:
+    """Blob 업로드 → (선택) 인덱스 생성 → DOCX/PPTX 청킹 후 텍스트 인덱싱"""
+    names = resolve_resource_names(args)
+    if not all(k in names for k in ("storage", "search")):
+        print("\n❌ 리소스 이름이 필요합니다: -g <resource-group> 또는 --storage/--search")
         return False
-    
-    return True
-
 
-def create_search_index(search_service: str, index_name: str):
-    """AI Search 인덱스 생성"""
-    print(f"\n🔍 AI Search 인덱스 생성 중...")
-    
     credential = DefaultAzureCredential()
-    endpoint = f"https://{search_service}.search.windows.net"
-    
+    options = IngestOptions.from_args(args)
     try:
-        index_client = SearchIndexClient(endpoint, credential)
-        
-        # 인덱스 스키마 정의
-        fields = [
-            SimpleField(name="id", type=SearchFieldDataType.String, key=True, filterable=True),
-            SearchableField(name="content", type=SearchFieldDataType.String, analyzer_name="ko.microsoft"),
-            SearchableField(name="title", type=SearchFieldDataType.String, filterable=True, sortable=True),
-            SearchableField(name="category", type=SearchFieldDataType.String, filterable=True, facetable=True),
-            SimpleField(name="source", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="metadata_storage_path", type=SearchFieldDataType.String, filterable=True),
-            SearchableField(name="metadata_storage_name", type=SearchFieldDataType.String, filterable=True),
-        ]
-        
-        # 벡터 검색 설정
-        vector_search = VectorSearch(
-            algorithms=[
-                HnswAlgorithmConfiguration(name="hnsw-algorithm"),
-            ],
-            profiles=[
-                VectorSearchProfile(name="vector-profile", algorithm_configuration_name="hnsw-algorithm"),
-            ],
-        )
-        
-        # Semantic 검색 설정
-        semantic_config = SemanticConfiguration(
-            name="semantic-config",
-            prioritized_fields=SemanticPrioritizedFields(
-                content_fields=[SemanticField(field_name="content")],
-                title_field=SemanticField(field_name="title"),
-            ),
-        )
-        
-        semantic_search = SemanticSearch(configurations=[semantic_config])
-        
-        # 인덱스 생성
-        index = SearchIndex(
-            name=index_name,
-            fields=fields,
-            vector_search=vector_search,
-            semantic_search=semantic_search,
+        print(f"\n📤 Blob Storage 업로드 중...")
+        manifest = IngestManifest(options.manifest, scope=f"{names['search']}/{args.index_name}")
+        try:
+            upload_files(credential, names["storage"], files, CONTAINER_NAME, manifest,
+                         force=options.full, create_container=True,
+                         concurrency=options.blob_concurrency,
+                         block_concurrency=options.blob_block_concurrency)
+        finally:
+            manifest.close()
+        if not create_index:
+            return True
+
+        print(f"\n🔍 AI Search 인덱스 생성 중...")
+        create_search_index(credential, names["search"], args.index_name, dimensions=None,
+                            extra_fields=EXTRA_FIELDS, title_field="title")
+
+        print(f"\n📝 문서 인덱싱 중...")
+        index_directory(
+            credential, names["search"], args.index_name,
+            LocalSource(OUTPUT_DIR, ("*.docx", "*.pptx")),
+            cognitive_name=None, embed_model=None, options=options,
+            metadata=document_metadata(names["storage"], doc_infos),
         )
-        
-        result = index_client.create_or_update_index(index)
-        print(f"  ✅ 인덱스 생성/업데이트: {result.name}")
-        
     except Exception as e:
-        print(f"\n❌ 인덱스 생성 실패: {e}")
+        print(f"\n❌ 업로드/인덱싱 실패: {e}")
         print("   프라이빗 네트워크 환경에서는 Jumpbox에서 실행해야 합니다.")
         return False
-    
-    return True
-
 
-def index_documents(search_service: str, index_name: str, files: list, doc_infos: dict):
-    """문서 인덱싱"""
-    print(f"\n📝 문서 인덱싱 중...")
-    
-    credential = DefaultAzureCredential()
-    endpoint = f"https://{search_service}.search.windows.net"
-    
-    try:
-        search_client = SearchClient(endpoint, index_name, credential)
-        
-        documents = []
-        for file_path in files:
-            filename = file_path.name
-            
-            # 문서 정보 찾기
-            if filename in doc_infos:
-                info = doc_infos[filename]
-                # 모든 섹션 콘텐츠 결합
-                if "sections" in info:
-                    content = "\n\n".join([s["content"] for s in info["sections"]])
-                elif "slides" in info:
-                    content = "\n\n".join([
-                        f"{s['title']}\n" + "\n".join(s["content"])
-                        for s in info["slides"]
-                    ])
-                else:
-                    content = ""
-                
-                doc = {
-                    "id": filename.replace(".", "_").replace(" ", "_"),
-                    "title": info.get("title", filename),
-                    "category": info.get("category", "기타"),
-                    "content": content,
-                    "source": f"blob://{STORAGE_ACCOUNT}/{CONTAINER_NAME}/{filename}",
-                    "metadata_storage_path": f"https://{STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}/{filename}",
-                    "metadata_storage_name": filename,
-                }
-                documents.append(doc)
-        
-        # 문서 업로드
-        result = search_client.upload_documents(documents)
-        success_count = sum(1 for r in result if r.succeeded)
-        print(f"  ✅ 인덱싱 완료: {success_count}/{len(documents)}개 문서")
-        
-    except Exception as e:
-        print(f"\n❌ 인덱싱 실패: {e}")
-        return False
-    
     return True
 
 
 # =============================================================================
 # 메인 실행
 # =============================================================================
+def parse_args():
+    parser = argparse.ArgumentParser(description="RAG 테스트 문서 생성 및 AI Search 인덱싱")
+    add_resource_arguments(parser)
+    parser.add_argument("--index-name", default=INDEX_NAME)
+    add_ingest_arguments(parser)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("=" * 60)
     print("  AI Search RAG 테스트 데이터 생성 및 설정")
     print("=" * 60)
@@ -618,15 +531,9 @@ def main():
     upload_choice = input("\n📤 Azure Blob Storage에 업로드하시겠습니까? (y/N): ").strip().lower()
     
     if upload_choice == 'y':
-        # Blob 업로드
-        if upload_to_blob(all_files, STORAGE_ACCOUNT, CONTAINER_NAME):
-            # 인덱스 생성
-            index_choice = input("\n🔍 AI Search 인덱스를 생성하시겠습니까? (y/N): ").strip().lower()
-            if index_choice == 'y':
-                if create_search_index(SEARCH_SERVICE, INDEX_NAME):
-                    # 문서 인덱싱
-                    all_doc_infos = {**DOCUMENTS, **PRESENTATIONS}
-                    index_documents(SEARCH_SERVICE, INDEX_NAME, all_files, all_doc_infos)
+        index_choice = input("\n🔍 AI Search 인덱스를 생성하시겠습니까? (y/N): ").strip().lower()
+        all_doc_infos = {**DOCUMENTS, **PRESENTATIONS}
+        upload_and_index(args, all_files, all_doc_infos, create_index=index_choice == 'y')
     
     # 완료 메시지
     print("\n" + "=" * 60)
@@ -641,7 +548,7 @@ def main():
    2. Project (aiproj-agents) 선택
    3. Playground > 'Add your data' 클릭
    4. Azure AI Search 선택
-   5. 인덱스: {INDEX_NAME}
+   5. 인덱스: {args.index_name}
    6. Semantic search 활성화
 
 📌 테스트 질문 예시:
@@ -0,0 +1,52 @@
+"""
+RAG 문서 인덱싱 공용 패키지 (Classic / New Foundry 셋업 스크립트 공통)
+
+source → extractor → chunker → embedder → sink 단계를 IngestPipeline으로 연결한다.
+배치/동시성/캐시 같은 성능 개선은 이 패키지에서 한 번만 구현하고, 스크립트는 CLI만 담당한다.
+"""
+from .blob import DEFAULT_CONTAINER, upload_files
+from .chunker import Chunker, chunk_text
+from .embedder import BatchEmbedder, TokenBatcher, create_async_openai, make_batches
+from .embedding_store import DEFAULT_EMBEDDING_STORE, EmbeddingStore
+from .extract import DEFAULT_TEXT_CACHE, TextExtractor
+from .local import LocalIndexSink
+from .manifest import DEFAULT_MANIFEST, IngestManifest, chunk_sha256, file_sha256
+from .options import IngestOptions, add_ingest_arguments
+from .pipeline import IngestPipeline, index_directory
+from .resources import add_resource_arguments, get_resource_names, resolve_resource_names
+from .search import BufferedSearchSink, SearchSink, create_search_index
+from .sources import LocalSource
+from .tokens import Tokenizer, estimate_tokens
+
+__all__ = [
+    "BatchEmbedder",
+    "BufferedSearchSink",
+    "Chunker",
+    "DEFAULT_CONTAINER",
+    "DEFAULT_EMBEDDING_STORE",
+    "DEFAULT_MANIFEST",
+    "DEFAULT_TEXT_CACHE",
+    "EmbeddingStore",
+    "IngestManifest",
+    "IngestOptions",
+    "IngestPipeline",
+    "LocalIndexSink",
+    "LocalSource",
+    "SearchSink",
+    "TextExtractor",
+    "TokenBatcher",
+    "Tokenizer",
+    "add_ingest_arguments",
+    "add_resource_arguments",
+    "chunk_sha256",
+    "chunk_text",
+    "create_async_openai",
+    "create_search_index",
+    "estimate_tokens",
+    "file_sha256",
+    "get_resource_names",
+    "index_directory",
+    "make_batches",
+    "resolve_resource_names",
+    "upload_files",
+]
@@ -0,0 +1,118 @@
+"""
+원본 문서 Blob 업로드 — 병렬 업로드 + 변경 없는 파일 건너뜀
+- 1차: 매니페스트에 기록된 파일 해시와 같으면 네트워크 호출 없이 건너뜀
+- 2차: Blob 속성의 Content-MD5가 로컬 MD5와 같으면 업로드 생략 (다른 머신/매니페스트 없이도 동작)
+- 큰 파일은 블록 단위로 나눠 max_concurrency 만큼 동시에 전송
+"""
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient, ContentSettings
+
+from .manifest import IngestManifest
+
+DEFAULT_CONTAINER = "rag-documents"
+# 이보다 큰 파일은 블록 업로드 (블록 4MB)
+MAX_SINGLE_PUT_SIZE = 8 * 1024 * 1024
+MAX_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def file_digests(path: Path) -> tuple[str, bytes]:
+    """(sha256 hex, md5 bytes) — 파일을 한 번만 읽어 두 해시를 계산"""
+    sha, md5 = hashlib.sha256(), hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+            md5.update(block)
+    return sha.hexdigest(), md5.digest()
+
+
+def create_blob_service(credential, storage_name: str, pool_size: int) -> BlobServiceClient:
+    """동시 업로드 수만큼 커넥션 풀을 키운 BlobServiceClient (requests 기본 풀은 10)"""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return BlobServiceClient(
+        f"https://{storage_name}.blob.core.windows.net",
+        credential=credential,
+        transport=RequestsTransport(session=session, session_owner=True),
+        max_single_put_size=MAX_SINGLE_PUT_SIZE,
+        max_block_size=MAX_BLOCK_SIZE,
+    )
+
+
+def upload_files(credential, storage_name: str, files, container: str = DEFAULT_CONTAINER,
+                 manifest: IngestManifest | None = None, force: bool = False,
+                 create_container: bool = False, concurrency: int = 8,
+                 block_concurrency: int = 4) -> dict:
+    """파일을 Storage에 병렬 업로드 (force=True면 변경 여부와 무관하게 전체)
+
+    concurrency개 파일을 동시에, 파일 하나는 block_concurrency개 블록을 동시에 보낸다.
+    매니페스트(SQLite)는 호출 스레드에서만 읽고 쓴다.
+    """
+    service = create_blob_service(credential, storage_name, concurrency * block_concurrency)
+    container_client = service.get_container_client(container)
+    if create_container:
+        try:
+            container_client.create_container()
+            print(f"  ✅ 컨테이너 생성: {container}")
+        except ResourceExistsError:
+            pass
+
+    def upload(path: Path, md5: bytes) -> tuple[str, int]:
+        blob = container_client.get_blob_client(path.name)
+        if not force:
+            try:
+                props = blob.get_blob_properties()
+                if props.content_settings.content_md5 == md5:
+                    return "unchanged", 0
+            except ResourceNotFoundError:
+                pass
+        with open(path, "rb") as data:
+            blob.upload_blob(
+                data, overwrite=True, max_concurrency=block_concurrency,
+                # 블록 업로드 시 서비스가 전체 MD5를 계산하지 않으므로 직접 기록
+                content_settings=ContentSettings(content_md5=md5),
+            )
+        return "uploaded", path.stat().st_size
+
+    started = time.perf_counter()
+    stats = {"uploaded": 0, "skipped": 0, "unchanged": 0, "failed": 0, "bytes": 0}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        paths = list(map(Path, files))
+        digests = list(pool.map(file_digests, paths))
+        futures = []
+        for path, (file_hash, md5) in zip(paths, digests):
+            if manifest and not force and manifest.blob_unchanged(storage_name, container, path.name, file_hash):
+                stats["skipped"] += 1
+                continue
+            futures.append((path, file_hash, pool.submit(upload, path, md5)))
+
+        for path, file_hash, future in futures:
+            try:
+                status, size = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"  ❌ {path.name} 업로드 실패: {e}")
+                continue
+            stats[status] += 1
+            stats["bytes"] += size
+            if manifest:
+                manifest.record_blob(storage_name, container, path.name, file_hash)
+            if status == "uploaded":
+                print(f"  ✅ {path.name} 업로드 완료")
+
+    service.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"  총 {stats['uploaded']}개 파일 업로드 ({stats['bytes'] / 1e6:.1f}MB, "
+        f"{stats['bytes'] / 1e6 / elapsed:.1f}MB/s) — 매니페스트 기준 건너뜀 {stats['skipped']}개, "
+        f"MD5 동일 {stats['unchanged']}개, 실패 {stats['failed']}개"
+    )
+    return stats
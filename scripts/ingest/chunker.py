@@ -0,0 +1,152 @@
+"""
+토큰 예산 기반 구조 인식 청커
+- 토크나이저(tiktoken cl100k_base — ada-002 / 3-large 공통)로 청크 크기와 겹침을 토큰 단위로 맞춤
+- 문장 → 줄 → 문단 → 페이지(\\f) → 제목 순으로 강한 경계에서 자르고, 제목 앞에서는 항상 새 청크
+- 문서를 한 번 훑으며 문장 단위로 누적 (재슬라이싱 없음, 선형 시간)
+- tiktoken이 없거나 인코딩을 받을 수 없는 환경(폐쇄망)에서는 문자 기반 추정치로 대체 (tokens.py — 웹앱과 공용)
+"""
+import re
+from dataclasses import dataclass
+
+from .tokens import Tokenizer
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# 경계 강도 (클수록 자르기 좋은 위치)
+WORD, LINE, SENTENCE, PARAGRAPH, PAGE, HEADING = range(6)
+
+# Markdown 제목, "제 3 장/절/조", "Chapter 2" / "Section 4.1"
+_HEADING_RE = re.compile(r"^(#{1,6}\s+\S|제\s*\d+\s*[장절조](\s|$)|(chapter|section)\s+\d)", re.IGNORECASE)
+# 문장 끝(마침표류 + 닫는 따옴표/괄호 + 공백) 또는 줄바꿈
+_SPLIT_RE = re.compile(r"(?<=[.!?。！？])[\"'”’)\]]*[ \t]+|\n")
+_SENTENCE_END = ".!?。！？\"'”’)]"
+
+
+@dataclass
+class _Unit:
+    text: str
+    boundary: int       # 이 단위 앞 경계의 강도
+    tokens: int = 0
+
+
+class Chunker:
+    """max_tokens 이하 청크로 분할, 이전 청크 끝의 overlap_tokens만큼 다음 청크 앞에 반복"""
+
+    def __init__(self, max_tokens: int = 512, overlap_tokens: int = 64,
+                 tokenizer: Tokenizer | None = None):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens는 0 이상 max_tokens 미만이어야 합니다")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        # 이보다 앞에서는 자르지 않음 (너무 작은 청크 방지)
+        self.min_tokens = max_tokens // 2
+        self.tokenizer = tokenizer or Tokenizer(DEFAULT_ENCODING)
+
+    # 단위 분해 -----------------------------------------------------------
+    def _units(self, text: str) -> list[_Unit]:
+        """문서 → 문장/줄 단위 목록 (구분 공백은 앞 단위 끝에 유지)"""
+        units: list[_Unit] = []
+        boundary = HEADING
+        for page_no, page in enumerate(text.split("\f")):
+            if page_no:
+                boundary = max(boundary, PAGE)
+            for line in page.splitlines(keepends=True):
+                stripped = line.strip()
+                if not stripped:
+                    if units:
+                        units[-1].text += line
+                    boundary = max(boundary, PARAGRAPH)
+                    continue
+                if _HEADING_RE.match(stripped):
+                    boundary = HEADING
+                start = 0
+                for m in _SPLIT_RE.finditer(line):
+                    body = line[start:m.start()].rstrip()
+                    if body:
+                        units.append(_Unit(line[start:m.end()], boundary))
+                        ended = m.group() != "\n" or body[-1] in _SENTENCE_END
+                        boundary = SENTENCE if ended else LINE
+                    elif units:
+                        units[-1].text += line[start:m.end()]
+                    start = m.end()
+                if line[start:].strip():
+                    units.append(_Unit(line[start:], boundary))
+                    boundary = LINE
+        for unit, tokens in zip(units, self.tokenizer.count_many([u.text for u in units])):
+            unit.tokens = tokens
+        return units
+
+    def _split_long(self, unit: _Unit) -> list[_Unit]:
+        """max_tokens를 넘는 단일 문장을 공백 위치 기준으로 나눔"""
+        pieces = -(-unit.tokens // self.max_tokens) + 1
+        step = max(1, len(unit.text) // pieces)
+        parts: list[_Unit] = []
+        start, boundary = 0, unit.boundary
+        while start < len(unit.text):
+            end = min(len(unit.text), start + step)
+            if end < len(unit.text):
+                space = unit.text.rfind(" ", start + step // 2, end)
+                end = space + 1 if space > 0 else end
+            part = _Unit(unit.text[start:end], boundary, self.tokenizer.count(unit.text[start:end]))
+            parts.extend(self._split_long(part) if part.tokens > self.max_tokens and end - start > 1 else [part])
+            start, boundary = end, WORD
+        return parts
+
+    # 청킹 ---------------------------------------------------------------
+    def _cut(self, current: list[_Unit], next_boundary: int) -> int:
+        """min_tokens 이후 가장 강한 경계(동률이면 뒤쪽) — current[:cut]을 내보냄"""
+        best, best_strength = len(current), -1
+        tokens = 0
+        for i, unit in enumerate(current):
+            if i and tokens >= self.min_tokens and unit.boundary >= best_strength:
+                best, best_strength = i, unit.boundary
+            tokens += unit.tokens
+        return best if best_strength > next_boundary else len(current)
+
+    def _overlap(self, emitted: list[_Unit], budget: int) -> list[_Unit]:
+        """내보낸 청크 끝에서 budget 토큰 이내의 문장들 (제목 경계는 넘지 않음)"""
+        tail: list[_Unit] = []
+        tokens = 0
+        for unit in reversed(emitted):
+            if tokens + unit.tokens > budget:
+                break
+            tail.append(unit)
+            tokens += unit.tokens
+            if unit.boundary == HEADING:
+                break
+        return tail[::-1]
+
+    def split(self, text: str) -> list[str]:
+        chunks: list[str] = []
+        current: list[_Unit] = []
+        total = 0
+
+        def emit(units: list[_Unit]):
+            chunk = "".join(u.text for u in units).strip()
+            if chunk:
+                chunks.append(chunk)
+
+        for unit in self._units(text):
+            for part in self._split_long(unit) if unit.tokens > self.max_tokens else [unit]:
+                if part.boundary == HEADING and current:
+                    emit(current)
+                    current, total = [], 0
+                while current and total + part.tokens > self.max_tokens:
+                    cut = self._cut(current, part.boundary)
+                    emitted, rest = current[:cut], current[cut:]
+                    emit(emitted)
+                    rest_tokens = sum(u.tokens for u in rest)
+                    budget = min(self.overlap_tokens, self.max_tokens - rest_tokens - part.tokens)
+                    current = (self._overlap(emitted, budget) if budget > 0 else []) + rest
+                    total = sum(u.tokens for u in current)
+                current.append(part)
+                total += part.tokens
+        emit(current)
+        return chunks
+
+    __call__ = split
+
+
+def chunk_text(text: str, max_tokens: int = 512, overlap_tokens: int = 64) -> list[str]:
+    """단발성 호출용 — 반복 호출 시에는 Chunker를 재사용 (토크나이저 로딩 1회)"""
+    return Chunker(max_tokens, overlap_tokens).split(text)
@@ -0,0 +1,144 @@
+"""
+임베딩 단계 — 토큰 예산 배치 + 동시 요청 제한 + 429/일시 오류 재시도 + 디스크 캐시
+"""
+import asyncio
+import random
+import time
+
+from azure.identity import get_bearer_token_provider
+from openai import (
+    AsyncAzureOpenAI,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from .embedding_store import EmbeddingStore
+from .manifest import chunk_sha256
+from .tokens import estimate_tokens, retry_after
+
+API_VERSION = "2024-10-21"
+COGNITIVE_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+class TokenBatcher:
+    """토큰 예산 / 최대 개수 기준으로 항목을 배치로 묶음 (스트리밍용)"""
+
+    def __init__(self, max_tokens: int, max_size: int):
+        self.max_tokens = max_tokens
+        self.max_size = max_size
+        self._batch: list = []
+        self._tokens = 0
+
+    def add(self, item, text: str) -> list | None:
+        """항목 추가 — 예산을 넘기면 직전까지의 배치를 반환"""
+        t = estimate_tokens(text)
+        full = None
+        if self._batch and (self._tokens + t > self.max_tokens or len(self._batch) >= self.max_size):
+            full = self.flush()
+        self._batch.append(item)
+        self._tokens += t
+        return full
+
+    def flush(self) -> list | None:
+        batch, self._batch, self._tokens = self._batch, [], 0
+        return batch or None
+
+
+def make_batches(texts: list[str], max_tokens: int, max_size: int) -> list[list[int]]:
+    """토큰 예산과 최대 개수를 넘지 않도록 인덱스 배치 구성"""
+    batcher = TokenBatcher(max_tokens, max_size)
+    batches = [b for i, text in enumerate(texts) if (b := batcher.add(i, text))]
+    if last := batcher.flush():
+        batches.append(last)
+    return batches
+
+
+class BatchEmbedder:
+    """토큰 예산 배치 + 동시 요청 제한 + 429/일시 오류 재시도 임베딩
+
+    store가 있으면 (모델, 청크 해시) 디스크 캐시를 먼저 조회하고 미스만 요청한다.
+    """
+
+    def __init__(self, client: AsyncAzureOpenAI, model: str,
+                 concurrency: int = 4, batch_tokens: int = 8000,
+                 batch_size: int = 64, max_retries: int = 8,
+                 store: EmbeddingStore | None = None):
+        self.client = client
+        self.model = model
+        self.store = store
+        self.batch_tokens = batch_tokens
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.chunks = 0
+        self.tokens = 0
+        self.requests = 0
+        self.retries = 0
+        self.cached = 0
+        self._started = time.perf_counter()
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        async with self._semaphore:
+            for attempt in range(self.max_retries):
+                try:
+                    response = await self.client.embeddings.create(input=texts, model=self.model)
+                    break
+                except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                    if attempt == self.max_retries - 1:
+                        raise
+                    # Retry-After 우선, 없으면 지수 백오프 + 지터
+                    delay = retry_after(e) or min(60.0, 2.0 ** attempt)
+                    delay += random.uniform(0, delay * 0.25)
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+
+        self.requests += 1
+        self.chunks += len(texts)
+        self.tokens += response.usage.total_tokens
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """입력 순서대로 임베딩 반환"""
+        embeddings: list[list[float] | None] = [None] * len(texts)
+        todo = list(range(len(texts)))
+        if self.store is not None:
+            hashes = [chunk_sha256(t) for t in texts]
+            cached = self.store.get_many(hashes)
+            for i, h in enumerate(hashes):
+                embeddings[i] = cached.get(h)
+            todo = [i for i in todo if embeddings[i] is None]
+            self.cached += len(texts) - len(todo)
+
+        batches = [
+            [todo[j] for j in batch]
+            for batch in make_batches([texts[i] for i in todo], self.batch_tokens, self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *(self._embed_batch([texts[i] for i in batch]) for batch in batches)
+        )
+        for batch, vectors in zip(batches, results):
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector
+
+        if self.store is not None and todo:
+            self.store.put_many([(hashes[i], embeddings[i]) for i in todo])
+        return embeddings
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return (
+            f"{self.chunks}개 청크 / {self.tokens} 토큰 / {self.requests}회 요청 "
+            f"(재시도 {self.retries}회, 디스크 캐시 {self.cached}개), {elapsed:.1f}초 — "
+            f"{self.chunks / elapsed:.1f} chunks/s, {self.tokens / elapsed:.0f} tokens/s"
+        )
+
+
+def create_async_openai(credential, cognitive_name: str) -> AsyncAzureOpenAI:
+    """토큰 자동 갱신 AsyncAzureOpenAI (재시도는 BatchEmbedder가 담당)"""
+    return AsyncAzureOpenAI(
+        azure_endpoint=f"https://{cognitive_name}.openai.azure.com",
+        api_version=API_VERSION,
+        azure_ad_token_provider=get_bearer_token_provider(credential, COGNITIVE_SCOPE),
+        max_retries=0,
+    )
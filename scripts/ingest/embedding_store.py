@@ -0,0 +1,130 @@
+"""
+로컬 임베딩 디스크 캐시 — (모델, 청크 해시) → 벡터
+- <root>/<model>/vectors.f32 : float32 행렬 (행 = 벡터 1개, 추가만 함) — mmap으로 읽기
+- <root>/<model>/index.sqlite : chunk_hash → row (WAL 모드 — 동시 읽기 + 단일 쓰기)
+- 100만 벡터: ada-002(1536차원) 약 6GB, 3-large(3072차원) 약 12GB
+"""
+import mmap
+import os
+import sqlite3
+from array import array
+from pathlib import Path
+
+DEFAULT_EMBEDDING_STORE = Path.home() / ".cache" / "ai-foundry-rag" / "embeddings"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS vectors (chunk_hash TEXT PRIMARY KEY, row INTEGER NOT NULL);
+"""
+
+
+class EmbeddingStore:
+    """모델별 임베딩 저장소 (여러 프로세스가 동시에 읽고 써도 안전)"""
+
+    def __init__(self, root: str | Path, model: str):
+        self.dir = Path(root) / model
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self._vectors_path = self.dir / "vectors.f32"
+        self._vectors_path.touch(exist_ok=True)
+        self._db = sqlite3.connect(self.dir / "index.sqlite", timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim: int | None = int(row[0]) if row else None
+        self._file = open(self._vectors_path, "rb")
+        self._mm: mmap.mmap | None = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * 4
+
+    def _read_row(self, row: int) -> list[float]:
+        """row까지 포함하도록 (필요 시 다시) 매핑한 뒤 해당 행 반환"""
+        end = (row + 1) * self._row_bytes
+        if self._mm is None or len(self._mm) < end:
+            if self._mm is not None:
+                self._mm.close()
+            # 다른 프로세스가 추가한 행까지 보이도록 현재 파일 크기로 재매핑
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        vector = array("f")
+        vector.frombytes(self._mm[row * self._row_bytes:end])
+        return vector.tolist()
+
+    def get_many(self, chunk_hashes: list[str]) -> dict[str, list[float]]:
+        """저장된 벡터만 반환 (없는 해시는 결과에서 빠짐)"""
+        if not chunk_hashes or self.dim is None:
+            self.misses += len(chunk_hashes)
+            return {}
+        found: dict[str, list[float]] = {}
+        # SQLite 변수 개수 제한 고려해 나눠서 조회
+        for i in range(0, len(chunk_hashes), 500):
+            part = chunk_hashes[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT chunk_hash, row FROM vectors WHERE chunk_hash IN ({','.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            for chunk_hash, row in rows:
+                found[chunk_hash] = self._read_row(row)
+        self.hits += len(found)
+        self.misses += len(chunk_hashes) - len(found)
+        return found
+
+    def put_many(self, items: list[tuple[str, list[float]]]) -> None:
+        """벡터 추가 — 쓰기 잠금 안에서 파일 끝 행 번호를 정하므로 동시 쓰기에도 안전"""
+        if not items:
+            return
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            if self.dim is None:
+                row = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+                self.dim = int(row[0]) if row else len(items[0][1])
+                self._db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+
+            pending = dict(items)
+            hashes = list(pending)
+            existing = set()
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                existing.update(h for (h,) in self._db.execute(
+                    f"SELECT chunk_hash FROM vectors WHERE chunk_hash IN ({','.join('?' * len(part))})",
+                    part,
+                ))
+            new = [(h, v) for h, v in pending.items() if h not in existing and len(v) == self.dim]
+            if not new:
+                return
+
+            with open(self._vectors_path, "ab") as f:
+                # 커밋되지 않은 이전 쓰기의 잔여 바이트가 있으면 행 경계에 맞춰 건너뜀
+                size = f.seek(0, os.SEEK_END)
+                start = -(-size // self._row_bytes)
+                if start * self._row_bytes != size:
+                    f.write(b"\0" * (start * self._row_bytes - size))
+                f.write(b"".join(array("f", v).tobytes() for _, v in new))
+            self._db.executemany(
+                "INSERT INTO vectors (chunk_hash, row) VALUES (?, ?)",
+                [(h, start + i) for i, (h, _) in enumerate(new)],
+            )
+        self.writes += len(new)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def report(self) -> str:
+        return f"캐시 적중 {self.hits}, 미스 {self.misses}, 저장 {self.writes} ({self.model}, 총 {len(self)}개)"
@@ -0,0 +1,136 @@
+"""
+문서 텍스트 추출 (extractor 단계) — PDF/DOCX/PPTX는 프로세스 풀에서 병렬 추출 + 파일 해시 기준 디스크 캐시
+- PyPDF2 추출은 CPU 바운드(순수 Python)라 스레드 대신 프로세스로 병렬화
+- DOCX/PPTX는 python-docx / python-pptx가 설치된 경우에만 지원 (워커에서 지연 import)
+- 캐시: <cache_dir>/<extractor>/<file sha256>.txt — 재실행 시 추출 생략
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+DEFAULT_TEXT_CACHE = Path.home() / ".cache" / "ai-foundry-rag" / "text"
+# 추출 로직이 바뀌면 올려서 캐시 무효화
+EXTRACTOR_VERSION = "pypdf2-v2"
+
+
+# 프로세스 풀 없이 바로 읽는 텍스트 형식
+PLAIN_SUFFIXES = {".md", ".txt"}
+
+
+def extract_pdf_text(pdf_path: str) -> str:
+    """PDF 페이지 텍스트를 페이지 구분자(\\f)로 결합 — 청커가 페이지 경계로 사용 (워커 프로세스에서 실행)"""
+    reader = PdfReader(pdf_path)
+    return "\f".join(f"{t}\n" for t in (page.extract_text() for page in reader.pages) if t)
+
+
+def extract_docx_text(docx_path: str) -> str:
+    """DOCX 문단 텍스트 — 제목 스타일은 Markdown 제목으로 표시해 청크 경계로 사용"""
+    from docx import Document
+
+    lines = []
+    for p in Document(docx_path).paragraphs:
+        if not p.text.strip():
+            continue
+        style = p.style.name if p.style is not None else ""
+        if style == "Title" or style.startswith("Heading"):
+            level = int(style.rsplit(" ", 1)[-1]) if style[-1:].isdigit() else 1
+            lines.append(f"\n{'#' * level} {p.text}")
+        else:
+            lines.append(p.text)
+    return "\n".join(lines) + "\n"
+
+
+def extract_pptx_text(pptx_path: str) -> str:
+    """PPTX 슬라이드별 텍스트를 페이지 구분자(\\f)로 결합"""
+    from pptx import Presentation
+
+    slides = []
+    for slide in Presentation(pptx_path).slides:
+        texts = [
+            p.text for shape in slide.shapes if shape.has_text_frame
+            for p in shape.text_frame.paragraphs if p.text.strip()
+        ]
+        if texts:
+            slides.append("\n".join(texts) + "\n")
+    return "\f".join(slides)
+
+
+def extract_document_text(path: str) -> str:
+    """확장자별 추출 함수 선택 (워커 프로세스에서 실행)"""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".docx":
+        return extract_docx_text(path)
+    if suffix == ".pptx":
+        return extract_pptx_text(path)
+    return extract_pdf_text(path)
+
+
+class TextExtractor:
+    """PDF/DOCX/PPTX/MD 텍스트 추출기 (with 문으로 프로세스 풀 수명 관리)"""
+
+    def __init__(self, workers: int | None = None,
+                 cache_dir: str | Path | None = DEFAULT_TEXT_CACHE):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = Path(cache_dir) / EXTRACTOR_VERSION if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._pool: ProcessPoolExecutor | None = None
+        self.cache_hits = 0
+        self.extracted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # 캐시만으로 끝나는 실행에서는 프로세스를 띄우지 않음
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    # 캐시 ---------------------------------------------------------------
+    def _cache_path(self, file_hash: str) -> Path | None:
+        return self.cache_dir / f"{file_hash}.txt" if self.cache_dir else None
+
+    def _load(self, file_hash: str) -> str | None:
+        path = self._cache_path(file_hash)
+        if path and path.exists():
+            self.cache_hits += 1
+            return path.read_text(encoding="utf-8")
+        return None
+
+    def _store(self, file_hash: str, text: str) -> None:
+        path = self._cache_path(file_hash)
+        if path:
+            # 동시 실행 시 반쯤 쓰인 파일을 읽지 않도록 임시 파일 후 교체
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        self.extracted += 1
+
+    # 추출 ---------------------------------------------------------------
+    async def extract_async(self, path: Path, file_hash: str) -> str:
+        """이벤트 루프를 막지 않는 추출 (PDF 등은 프로세스 풀, MD는 스레드)"""
+        if path.suffix.lower() in PLAIN_SUFFIXES:
+            return await asyncio.to_thread(path.read_text, encoding="utf-8")
+        cached = await asyncio.to_thread(self._load, file_hash)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self.pool, extract_document_text, str(path))
+        await asyncio.to_thread(self._store, file_hash, text)
+        return text
+
+    def report(self) -> str:
+        return f"추출 {self.extracted}개, 캐시 적중 {self.cache_hits}개 (workers={self.workers})"
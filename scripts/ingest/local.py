@@ -0,0 +1,97 @@
+"""
+싱크 단계 — 로컬 인덱스 파일 (JSONL, AI Search와 같은 스키마)
+src/webapp의 RETRIEVAL_BACKEND=local, scripts/test-rag-agent.py --local-index 에서 읽는다.
+- <path>.sqlite : 작업용 문서 저장소 (id → 문서 JSON, WAL 모드) — 업로드 배치마다 커밋
+- <path>        : close() 시 저장소 전체를 임시 파일에 쓰고 교체 (읽는 쪽은 항상 완전한 파일을 봄)
+실행이 중간에 죽어도 업로드된 문서는 저장소에 남고, 매니페스트와 함께 다음 실행에서 이어서 반영된다.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from .manifest import ChunkRecord, IngestManifest
+from .search import SearchSink, estimate_payload_bytes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, doc TEXT NOT NULL);
+"""
+
+
+class LocalIndexSink(SearchSink):
+    """문서를 SQLite 저장소에 배치 단위로 기록하고 close() 시 JSONL로 내보냄 (임시 파일 → 교체)
+
+    저장소가 없고 기존 JSONL이 있으면 저장소로 옮겨 이어서 증분 반영한다. SearchSink와 같은 인터페이스.
+    """
+
+    def __init__(self, path: str | Path, metadata: Callable[[str], dict] | None = None):
+        super().__init__(None, metadata)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        store_path = self.path.with_name(self.path.name + ".sqlite")
+        fresh = not store_path.exists()
+        # 업로드는 스레드에서 실행 — 연결은 잠금으로 직렬화
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(store_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        if fresh and self.path.exists():
+            with open(self.path, encoding="utf-8") as f, self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO docs (id, doc) VALUES (?, ?)",
+                    ((json.loads(line)["id"], line.strip()) for line in f if line.strip()),
+                )
+
+    def _write(self, docs: list[dict]) -> None:
+        rows = [(d["id"], json.dumps(d, ensure_ascii=False)) for d in docs]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO docs (id, doc) VALUES (?, ?)", rows)
+
+    async def upload(self, docs: list[dict]) -> set[str]:
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.requests += 1
+        await asyncio.to_thread(self._write, docs)
+        self.bytes += sum(estimate_payload_bytes(doc) for doc in docs)
+        self.documents += len(docs)
+        return {d["id"] for d in docs}
+
+    def _delete(self, doc_ids: list[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM docs WHERE id = ?", ((d,) for d in doc_ids))
+
+    async def delete(self, doc_ids: list[str]) -> None:
+        self._delete(doc_ids)
+
+    async def move(self, records: list[ChunkRecord]) -> None:
+        with self._lock, self._db:
+            for r in records:
+                row = self._db.execute("SELECT doc FROM docs WHERE id = ?", (r.doc_id,)).fetchone()
+                if row:
+                    doc = json.loads(row[0])
+                    doc["chunk_id"] = r.chunk_id
+                    self._db.execute(
+                        "UPDATE docs SET doc = ? WHERE id = ?", (json.dumps(doc, ensure_ascii=False), r.doc_id)
+                    )
+
+    def purge_untracked(self, manifest: IngestManifest) -> int:
+        tracked = manifest.doc_ids()
+        with self._lock:
+            stale = [doc_id for (doc_id,) in self._db.execute("SELECT id FROM docs") if doc_id not in tracked]
+        self._delete(stale)
+        return len(stale)
+
+    def close(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        count = 0
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            for (doc,) in self._db.execute("SELECT doc FROM docs"):
+                f.write(doc + "\n")
+                count += 1
+        os.replace(tmp, self.path)
+        self._db.close()
+        print(f"  💾 로컬 인덱스: {self.path} ({count}개 문서)")
@@ -0,0 +1,208 @@
+"""
+RAG 증분 인덱싱 매니페스트 (SQLite)
+- 파일 해시 → 청크 해시 → 문서 id 를 인덱스 단위(scope)로 기록
+- 재실행 시 변경/신규 청크만 임베딩, 삭제된 청크·파일은 인덱스에서 제거
+- 문서 id는 (source, 청크 해시, 동일 청크 순번)에서 파생 → 재실행해도 동일 (멱등)
+- 파일마다 인덱싱 설정(청크 크기/겹침/토크나이저, 추출기 버전, 임베딩 모델) 지문을 기록 —
+  설정이 바뀌면 해시가 같은 파일도 변경으로 보고 모든 청크를 다시 임베딩·업로드
+"""
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DEFAULT_MANIFEST = Path.home() / ".cache" / "ai-foundry-rag" / "manifest.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    scope      TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    file_hash  TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    config     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (scope, source)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    scope      TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    doc_id     TEXT NOT NULL,
+    chunk_id   INTEGER NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    PRIMARY KEY (scope, doc_id)
+);
+CREATE INDEX IF NOT EXISTS chunks_by_source ON chunks (scope, source);
+CREATE TABLE IF NOT EXISTS blobs (
+    account    TEXT NOT NULL,
+    container  TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    file_hash  TEXT NOT NULL,
+    PRIMARY KEY (account, container, name)
+);
+"""
+
+
+def file_sha256(path: Path) -> str:
+    """파일 내용 해시 (1MB 단위 스트리밍)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def stable_doc_ids(source: str, chunk_hashes: list[str]) -> list[str]:
+    """AI Search 키로 쓸 수 있는 결정적 문서 id (hex)"""
+    seen: dict[str, int] = {}
+    ids = []
+    for h in chunk_hashes:
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        ids.append(hashlib.sha256(f"{source}\x1f{h}\x1f{n}".encode("utf-8")).hexdigest()[:40])
+    return ids
+
+
+@dataclass
+class ChunkRecord:
+    doc_id: str
+    chunk_id: int
+    chunk_hash: str
+    content: str
+
+
+@dataclass
+class FilePlan:
+    """파일 1개의 증분 인덱싱 계획"""
+    source: str
+    file_hash: str
+    chunks: list[ChunkRecord]
+    new: list[ChunkRecord] = field(default_factory=list)        # 임베딩 + 업로드 필요
+    moved: list[ChunkRecord] = field(default_factory=list)      # chunk_id만 갱신 (merge)
+    deleted: list[str] = field(default_factory=list)            # 인덱스에서 삭제할 doc_id
+
+    @property
+    def reused(self) -> int:
+        return len(self.chunks) - len(self.new)
+
+
+class IngestManifest:
+    """scope(예: "<search>/<index>")별 파일·청크 상태 저장소"""
+
+    def __init__(self, path: str | Path = DEFAULT_MANIFEST, scope: str = "default", config: str = ""):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.scope = scope
+        self.config = config
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+        # 설정 지문 도입 전 매니페스트 — 기존 행은 '' 로 채워져 다음 실행에서 한 번 다시 인덱싱됨
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(files)")}
+        if "config" not in columns:
+            with self._db:
+                self._db.execute("ALTER TABLE files ADD COLUMN config TEXT NOT NULL DEFAULT ''")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _file_state(self, source: str) -> tuple[str, str] | None:
+        """(file_hash, config)"""
+        return self._db.execute(
+            "SELECT file_hash, config FROM files WHERE scope = ? AND source = ?",
+            (self.scope, source),
+        ).fetchone()
+
+    def file_hash(self, source: str) -> str | None:
+        state = self._file_state(source)
+        return state[0] if state else None
+
+    def is_unchanged(self, source: str, file_hash: str) -> bool:
+        return self._file_state(source) == (file_hash, self.config)
+
+    def _indexed_chunks(self, source: str) -> dict[str, int]:
+        rows = self._db.execute(
+            "SELECT doc_id, chunk_id FROM chunks WHERE scope = ? AND source = ?",
+            (self.scope, source),
+        )
+        return dict(rows.fetchall())
+
+    def plan(self, source: str, file_hash: str, chunks: list[str]) -> FilePlan:
+        """현재 청크 목록과 매니페스트를 비교해 신규/이동/삭제 청크 산출"""
+        hashes = [chunk_sha256(c) for c in chunks]
+        records = [
+            ChunkRecord(doc_id, i, h, c)
+            for i, (doc_id, h, c) in enumerate(zip(stable_doc_ids(source, hashes), hashes, chunks))
+        ]
+        indexed = self._indexed_chunks(source)
+        state = self._file_state(source)
+        # 설정이 바뀐 파일은 청크가 같아도 벡터/본문이 달라질 수 있으므로 전부 다시 업로드 (같은 id는 덮어씀)
+        reusable = indexed if state is not None and state[1] == self.config else {}
+        plan = FilePlan(source, file_hash, records)
+        for r in records:
+            if r.doc_id not in reusable:
+                plan.new.append(r)
+            elif reusable[r.doc_id] != r.chunk_id:
+                plan.moved.append(r)
+        current = {r.doc_id for r in records}
+        plan.deleted = [doc_id for doc_id in indexed if doc_id not in current]
+        return plan
+
+    def commit(self, plan: FilePlan) -> None:
+        """파일의 모든 청크가 인덱스에 반영된 뒤 호출"""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM chunks WHERE scope = ? AND source = ?", (self.scope, plan.source)
+            )
+            self._db.executemany(
+                "INSERT INTO chunks (scope, source, doc_id, chunk_id, chunk_hash) VALUES (?, ?, ?, ?, ?)",
+                [(self.scope, plan.source, r.doc_id, r.chunk_id, r.chunk_hash) for r in plan.chunks],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (scope, source, file_hash, updated_at, config) VALUES (?, ?, ?, ?, ?)",
+                (self.scope, plan.source, plan.file_hash, time.time(), self.config),
+            )
+
+    def removed_sources(self, current: set[str]) -> dict[str, list[str]]:
+        """매니페스트에는 있으나 현재 데이터 디렉터리에 없는 파일 → 삭제할 doc_id"""
+        rows = self._db.execute(
+            "SELECT source FROM files WHERE scope = ?", (self.scope,)
+        ).fetchall()
+        return {
+            source: list(self._indexed_chunks(source))
+            for (source,) in rows
+            if source not in current
+        }
+
+    def doc_ids(self) -> set[str]:
+        """scope에 기록된 전체 문서 id"""
+        rows = self._db.execute("SELECT doc_id FROM chunks WHERE scope = ?", (self.scope,))
+        return {doc_id for (doc_id,) in rows}
+
+    def forget(self, source: str) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM chunks WHERE scope = ? AND source = ?", (self.scope, source))
+            self._db.execute("DELETE FROM files WHERE scope = ? AND source = ?", (self.scope, source))
+
+    def reset(self) -> None:
+        """scope 전체 초기화 (--full 재인덱싱)"""
+        with self._db:
+            self._db.execute("DELETE FROM chunks WHERE scope = ?", (self.scope,))
+            self._db.execute("DELETE FROM files WHERE scope = ?", (self.scope,))
+
+    # Blob 업로드 상태 ----------------------------------------------------
+    def blob_unchanged(self, account: str, container: str, name: str, file_hash: str) -> bool:
+        row = self._db.execute(
+            "SELECT file_hash FROM blobs WHERE account = ? AND container = ? AND name = ?",
+            (account, container, name),
+        ).fetchone()
+        return row is not None and row[0] == file_hash
+
+    def record_blob(self, account: str, container: str, name: str, file_hash: str) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs (account, container, name, file_hash) VALUES (?, ?, ?, ?)",
+                (account, container, name, file_hash),
+            )
@@ -0,0 +1,91 @@
+"""
+인덱싱 CLI 공통 옵션 — 두 셋업 스크립트가 같은 플래그와 기본값을 공유
+"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .embedding_store import DEFAULT_EMBEDDING_STORE
+from .extract import DEFAULT_TEXT_CACHE
+from .manifest import DEFAULT_MANIFEST
+
+
+@dataclass
+class IngestOptions:
+    chunk_size: int = 512                   # 청크 최대 토큰 수
+    chunk_overlap: int = 64                 # 인접 청크 간 겹치는 토큰 수
+    embed_concurrency: int = 4
+    embed_batch_tokens: int = 8000
+    embed_batch_size: int = 64
+    upload_batch_size: int = 100            # AI Search 업로드 1건당 최대 문서 수
+    upload_batch_bytes: int = 8 * 1024 * 1024   # 1건당 최대 추정 페이로드 (서비스 한도 16MB)
+    upload_concurrency: int = 4             # 동시 AI Search 업로드 요청 수
+    search_sender: str = "parallel"         # parallel | buffered (SearchIndexingBufferedSender)
+    blob_concurrency: int = 8               # 동시 Blob 업로드 파일 수
+    blob_block_concurrency: int = 4         # 큰 파일 1개당 동시 블록 업로드 수
+    manifest: Path = DEFAULT_MANIFEST
+    full: bool = False
+    extract_workers: int | None = field(default_factory=os.cpu_count)
+    text_cache_dir: Path | None = DEFAULT_TEXT_CACHE
+    embedding_store: Path | None = DEFAULT_EMBEDDING_STORE
+    local_index: Path | None = None         # 지정 시 AI Search 대신 로컬 JSONL 인덱스에 기록
+
+    @classmethod
+    def from_args(cls, args) -> "IngestOptions":
+        return cls(
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            embed_concurrency=args.embed_concurrency,
+            embed_batch_tokens=args.embed_batch_tokens,
+            embed_batch_size=args.embed_batch_size,
+            upload_batch_size=args.upload_batch_size,
+            upload_batch_bytes=args.upload_batch_mb * 1024 * 1024,
+            upload_concurrency=args.upload_concurrency,
+            search_sender=args.search_sender,
+            blob_concurrency=args.blob_concurrency,
+            blob_block_concurrency=args.blob_block_concurrency,
+            manifest=Path(args.manifest),
+            full=args.full,
+            extract_workers=args.extract_workers,
+            text_cache_dir=Path(args.text_cache_dir) if args.text_cache_dir else None,
+            embedding_store=Path(args.embedding_store) if args.embedding_store else None,
+            local_index=Path(args.local_index) if args.local_index else None,
+        )
+
+
+def add_ingest_arguments(parser) -> None:
+    defaults = IngestOptions()
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size,
+                        help="청크 최대 토큰 수")
+    parser.add_argument("--chunk-overlap", type=int, default=defaults.chunk_overlap,
+                        help="인접 청크 간 겹치는 토큰 수")
+    parser.add_argument("--embed-concurrency", type=int, default=defaults.embed_concurrency,
+                        help="동시 임베딩 요청 수")
+    parser.add_argument("--embed-batch-tokens", type=int, default=defaults.embed_batch_tokens,
+                        help="임베딩 요청 1건당 토큰 예산")
+    parser.add_argument("--embed-batch-size", type=int, default=defaults.embed_batch_size,
+                        help="임베딩 요청 1건당 최대 청크 수")
+    parser.add_argument("--upload-batch-size", type=int, default=defaults.upload_batch_size,
+                        help="AI Search 업로드 1건당 최대 문서 수")
+    parser.add_argument("--upload-batch-mb", type=int, default=defaults.upload_batch_bytes // (1024 * 1024),
+                        help="AI Search 업로드 1건당 최대 페이로드(MB, 추정치 기준)")
+    parser.add_argument("--upload-concurrency", type=int, default=defaults.upload_concurrency,
+                        help="동시 AI Search 업로드 요청 수")
+    parser.add_argument("--search-sender", choices=("parallel", "buffered"), default=defaults.search_sender,
+                        help="parallel: 동시 배치 + 실패 키 재시도, buffered: SearchIndexingBufferedSender")
+    parser.add_argument("--blob-concurrency", type=int, default=defaults.blob_concurrency,
+                        help="동시에 업로드할 Blob 파일 수")
+    parser.add_argument("--blob-block-concurrency", type=int, default=defaults.blob_block_concurrency,
+                        help="큰 파일 1개당 동시 블록 업로드 수")
+    parser.add_argument("--manifest", default=str(defaults.manifest),
+                        help="증분 인덱싱 매니페스트(SQLite) 경로")
+    parser.add_argument("--extract-workers", type=int, default=defaults.extract_workers,
+                        help="PDF 텍스트 추출 프로세스 수")
+    parser.add_argument("--text-cache-dir", default=str(defaults.text_cache_dir),
+                        help="추출 텍스트 캐시 디렉터리 (파일 해시 기준, 빈 문자열이면 사용 안 함)")
+    parser.add_argument("--embedding-store", default=str(defaults.embedding_store),
+                        help="임베딩 디스크 캐시 디렉터리 (빈 문자열이면 사용 안 함)")
+    parser.add_argument("--local-index", default=None,
+                        help="AI Search 대신 로컬 인덱스 파일(JSONL)에 기록 — 웹앱 RETRIEVAL_BACKEND=local 용")
+    parser.add_argument("--full", action="store_true",
+                        help="매니페스트를 무시하고 전체 재인덱싱 (매니페스트에 없는 문서는 삭제)")
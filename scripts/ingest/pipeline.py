@@ -0,0 +1,276 @@
+"""
+인덱싱 파이프라인 — source → extractor → chunker → embedder → sink
+
+각 단계는 아래 메서드만 갖추면 교체할 수 있다.
+- source    : 파일 Path를 내는 iterable (LocalSource)
+- extractor : workers, async extract_async(path, file_hash) -> str (TextExtractor)
+- chunker   : split(text) -> list[str] (Chunker)
+- embedder  : async embed(texts) -> list[vector], report() (BatchEmbedder) — None이면 벡터 없이 업로드
+- sink      : document(), payload_bytes(), async upload()/delete()/move(), purge_untracked(), report()
+              (SearchSink, BufferedSearchSink, LocalIndexSink)
+"""
+import asyncio
+from collections import deque
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from azure.search.documents import SearchClient
+
+from .chunker import DEFAULT_ENCODING, Chunker
+from .embedder import BatchEmbedder, TokenBatcher, create_async_openai
+from .embedding_store import EmbeddingStore
+from .extract import EXTRACTOR_VERSION, TextExtractor
+from .local import LocalIndexSink
+from .manifest import IngestManifest, file_sha256
+from .options import IngestOptions
+from .search import DEFAULT_BATCH_BYTES, BufferedSearchSink, SearchSink
+
+
+class IngestPipeline:
+    """추출 → 청킹 → 임베딩 → 업로드 스트리밍 파이프라인 (증분)
+
+    단계 사이는 크기 제한 큐로 연결되어, 업로드가 밀리면 임베딩이, 임베딩이 밀리면
+    추출이 대기한다(backpressure). 메모리에는 큐 용량만큼의 청크/벡터만 머문다.
+    매니페스트와 파일 해시가 같으면 추출부터 생략하고, 바뀐 파일은 신규 청크만 임베딩한다.
+    PDF 추출은 프로세스 풀에서 여러 파일을 동시에 진행한다.
+    파일의 모든 신규 청크 업로드가 성공한 시점에만 매니페스트에 기록한다.
+    업로드 배치는 문서 수와 추정 페이로드 바이트로 자르고, 최대 upload_concurrency개를 동시에 보낸다.
+    """
+
+    def __init__(self, source, extractor, chunker, embedder, sink,
+                 manifest: IngestManifest, embed_concurrency: int = 4,
+                 embed_batch_tokens: int = 8000, embed_batch_size: int = 64,
+                 upload_batch_size: int = 100, upload_batch_bytes: int = DEFAULT_BATCH_BYTES,
+                 upload_concurrency: int = 4):
+        self.source = source
+        self.extractor = extractor
+        self.chunker = chunker
+        self.embedder = embedder
+        self.sink = sink
+        self.manifest = manifest
+        self.embed_concurrency = embed_concurrency
+        self.embed_batch_tokens = embed_batch_tokens
+        self.embed_batch_size = embed_batch_size
+        self.upload_batch_size = upload_batch_size
+        self.upload_batch_bytes = upload_batch_bytes
+        self.upload_concurrency = upload_concurrency
+
+    async def run(self) -> dict:
+        manifest, sink = self.manifest, self.sink
+        workers = self.embed_concurrency
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        upload_queue: asyncio.Queue = asyncio.Queue(maxsize=self.upload_batch_size * 2)
+        stats = {
+            "batches": 0, "succeeded": 0, "failed": 0,
+            "skipped_files": 0, "reused_chunks": 0, "deleted_chunks": 0,
+        }
+        seen: set[str] = set()
+        # source → [FilePlan, 업로드 대기 중인 청크 수]
+        pending: dict[str, list] = {}
+
+        async def apply_plan_without_embedding(plan):
+            """삭제된 청크 제거, 위치만 바뀐 청크는 chunk_id만 갱신"""
+            if plan.deleted:
+                await sink.delete(plan.deleted)
+                stats["deleted_chunks"] += len(plan.deleted)
+            if plan.moved:
+                await sink.move(plan.moved)
+
+        async def produce():
+            """변경 파일 병렬 추출 + 청킹 → 토큰 예산 배치 단위로 임베딩 큐에 투입"""
+            batcher = TokenBatcher(self.embed_batch_tokens, self.embed_batch_size)
+
+            async def chunk_file(path: Path, extraction: asyncio.Task, file_hash: str):
+                print(f"  📄 처리 중: {path.name}")
+                text = await extraction
+                plan = manifest.plan(path.name, file_hash, self.chunker.split(text))
+                stats["reused_chunks"] += plan.reused
+                await apply_plan_without_embedding(plan)
+                if not plan.new:
+                    manifest.commit(plan)
+                    return
+
+                pending[path.name] = [plan, len(plan.new)]
+                for r in plan.new:
+                    if batch := batcher.add((path.name, r), r.content):
+                        await embed_queue.put(batch)
+
+            # 추출은 workers * 2개까지 미리 시작하고, 청킹/투입은 파일 순서대로
+            window: deque = deque()
+            for path in self.source:
+                seen.add(path.name)
+                file_hash = await asyncio.to_thread(file_sha256, path)
+                if manifest.is_unchanged(path.name, file_hash):
+                    stats["skipped_files"] += 1
+                    continue
+                extraction = asyncio.create_task(self.extractor.extract_async(path, file_hash))
+                window.append((path, extraction, file_hash))
+                if len(window) >= self.extractor.workers * 2:
+                    await chunk_file(*window.popleft())
+            while window:
+                await chunk_file(*window.popleft())
+
+            if batch := batcher.flush():
+                await embed_queue.put(batch)
+            for _ in range(workers):
+                await embed_queue.put(None)
+
+        async def embed_worker():
+            while (batch := await embed_queue.get()) is not None:
+                if self.embedder is not None:
+                    vectors = await self.embedder.embed([r.content for _, r in batch])
+                else:
+                    vectors = [None] * len(batch)
+                for (source, r), vector in zip(batch, vectors):
+                    await upload_queue.put(sink.document(source, r, vector))
+            await upload_queue.put(None)
+
+        upload_slots = asyncio.Semaphore(self.upload_concurrency)
+
+        async def flush(batch: list[dict]):
+            try:
+                succeeded = await sink.upload(batch)
+            finally:
+                upload_slots.release()
+            for doc in batch:
+                if doc["id"] not in succeeded:
+                    continue
+                entry = pending[doc["source"]]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    manifest.commit(entry[0])
+            stats["batches"] += 1
+            stats["succeeded"] += len(succeeded)
+            stats["failed"] += len(batch) - len(succeeded)
+            print(f"  ✅ 배치 {stats['batches']}: {len(succeeded)}/{len(batch)} 인덱싱 완료")
+
+        async def upload_worker():
+            """문서 수 / 바이트 예산이 차는 즉시 업로드 — 동시 업로드 수가 차면 대기(backpressure)"""
+            finished, batch, batch_bytes = 0, [], 0
+            async with asyncio.TaskGroup() as uploads:
+                async def submit(docs: list[dict]):
+                    await upload_slots.acquire()
+                    uploads.create_task(flush(docs))
+
+                while finished < workers:
+                    doc = await upload_queue.get()
+                    if doc is None:
+                        finished += 1
+                        continue
+                    size = sink.payload_bytes(doc)
+                    if batch and (len(batch) >= self.upload_batch_size
+                                  or batch_bytes + size > self.upload_batch_bytes):
+                        await submit(batch)
+                        batch, batch_bytes = [], 0
+                    batch.append(doc)
+                    batch_bytes += size
+                if batch:
+                    await submit(batch)
+
+        # 한 단계가 실패하면 TaskGroup이 나머지를 취소
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(produce())
+            for _ in range(workers):
+                tg.create_task(embed_worker())
+            tg.create_task(upload_worker())
+
+        # 소스에서 사라진 파일의 청크 제거
+        for source, doc_ids in manifest.removed_sources(seen).items():
+            if doc_ids:
+                await sink.delete(doc_ids)
+            manifest.forget(source)
+            stats["deleted_chunks"] += len(doc_ids)
+            print(f"  🗑️  {source}: {len(doc_ids)}개 청크 삭제")
+
+        if self.embedder is not None:
+            print(f"  ⚡ 임베딩: {self.embedder.report()}")
+        print(f"  📤 업로드: {sink.report()}")
+        return stats
+
+
+def ingest_config(options: IngestOptions, embed_model: str | None) -> str:
+    """매니페스트에 기록하는 인덱싱 설정 지문 — 바뀌면 해시가 같은 파일도 다시 인덱싱"""
+    return (
+        f"chunk={options.chunk_size}/{options.chunk_overlap}/{DEFAULT_ENCODING};"
+        f"extract={EXTRACTOR_VERSION};embed={embed_model or '-'}"
+    )
+
+
+def index_directory(credential, search_name: str, index_name: str, source,
+                    cognitive_name: str | None, embed_model: str | None,
+                    options: IngestOptions | None = None,
+                    metadata=None, search_client: SearchClient | None = None) -> dict:
+    """소스 파일을 청킹 → 임베딩 → 인덱싱 (변경분만)
+
+    cognitive_name/embed_model이 None이면 벡터 없이 텍스트만 인덱싱한다.
+    options.local_index가 있으면 AI Search 대신 로컬 JSONL 파일에 기록한다 (search_name 불필요).
+    """
+    options = options or IngestOptions()
+    scope = f"{search_name}/{index_name}"
+    if options.local_index:
+        sink = LocalIndexSink(options.local_index, metadata)
+        scope = f"local/{options.local_index.resolve()}"
+    else:
+        search_client = search_client or SearchClient(
+            f"https://{search_name}.search.windows.net", index_name, credential
+        )
+        if options.search_sender == "buffered":
+            sink = BufferedSearchSink(
+                search_client, f"https://{search_name}.search.windows.net", index_name, credential,
+                metadata, batch_size=options.upload_batch_size,
+            )
+        else:
+            sink = SearchSink(search_client, metadata)
+
+    manifest = IngestManifest(options.manifest, scope=scope, config=ingest_config(options, embed_model))
+    if options.full:
+        manifest.reset()
+    # 이 인덱스의 첫 실행(매니페스트 비어 있음) — 이전 스크립트가 순번 id로 올린 문서는 매니페스트에 없어
+    # 증분 삭제 대상이 되지 못하므로, --full과 같이 실행 후 매니페스트에 없는 문서를 정리
+    purge = options.full or not manifest.doc_ids()
+    extractor = TextExtractor(options.extract_workers, options.text_cache_dir)
+    store = (
+        EmbeddingStore(options.embedding_store, embed_model)
+        if options.embedding_store and embed_model else None
+    )
+
+    async def run() -> dict:
+        chunker = Chunker(options.chunk_size, options.chunk_overlap)
+        async with AsyncExitStack() as stack:
+            embedder = None
+            if embed_model:
+                client = await stack.enter_async_context(create_async_openai(credential, cognitive_name))
+                embedder = BatchEmbedder(
+                    client, embed_model, concurrency=options.embed_concurrency,
+                    batch_tokens=options.embed_batch_tokens, batch_size=options.embed_batch_size,
+                    store=store,
+                )
+            return await IngestPipeline(
+                source, extractor, chunker, embedder, sink, manifest,
+                options.embed_concurrency, options.embed_batch_tokens,
+                options.embed_batch_size, options.upload_batch_size,
+                options.upload_batch_bytes, options.upload_concurrency,
+            ).run()
+
+    try:
+        stats = asyncio.run(run())
+        print(f"  📑 텍스트: {extractor.report()}")
+        if store:
+            print(f"  💾 임베딩 캐시: {store.report()}")
+        if purge:
+            purged = sink.purge_untracked(manifest)
+            stats["deleted_chunks"] += purged
+            print(f"  🧹 매니페스트에 없는 문서 {purged}개 삭제")
+    finally:
+        if store:
+            store.close()
+        sink.close()
+        extractor.close()
+        manifest.close()
+
+    print(
+        f"  총 {stats['succeeded']}개 청크 인덱싱 완료 "
+        f"(실패 {stats['failed']}, 재사용 {stats['reused_chunks']}, "
+        f"삭제 {stats['deleted_chunks']}, 변경 없는 파일 {stats['skipped_files']}개)"
+    )
+    return stats
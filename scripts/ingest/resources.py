@@ -0,0 +1,44 @@
+"""
+리소스 그룹에서 Storage / AI Search / Azure OpenAI(Cognitive) 이름 감지
+"""
+import json
+import subprocess
+
+
+def get_resource_names(rg: str) -> dict:
+    """리소스 그룹에서 리소스 이름을 자동 감지"""
+    result = subprocess.run(
+        ["az", "resource", "list", "-g", rg, "--query",
+         "[].{name:name, type:type}", "-o", "json"],
+        capture_output=True, text=True
+    )
+    resources = json.loads(result.stdout)
+    names = {}
+    for r in resources:
+        t = r["type"]
+        n = r["name"]
+        if "CognitiveServices/accounts" in t and "/" not in n:
+            names["cognitive"] = n
+        elif "Storage/storageAccounts" in t:
+            names["storage"] = n
+        elif "Search/searchServices" in t:
+            names["search"] = n
+    return names
+
+
+def add_resource_arguments(parser, required: bool = False) -> None:
+    """-g 자동 감지 + 개별 이름 지정 옵션"""
+    parser.add_argument("--resource-group", "-g", required=required,
+                        help="리소스 이름을 자동 감지할 리소스 그룹")
+    parser.add_argument("--storage", help="Storage 계정 이름 (자동 감지보다 우선)")
+    parser.add_argument("--search", help="AI Search 서비스 이름 (자동 감지보다 우선)")
+    parser.add_argument("--cognitive", help="Azure OpenAI(AI Services) 계정 이름 (자동 감지보다 우선)")
+
+
+def resolve_resource_names(args) -> dict:
+    """-g 자동 감지 결과에 명시한 이름을 덮어씀"""
+    names = get_resource_names(args.resource_group) if args.resource_group else {}
+    for key in ("storage", "search", "cognitive"):
+        if value := getattr(args, key, None):
+            names[key] = value
+    return names
@@ -0,0 +1,291 @@
+"""
+싱크 단계 — Azure AI Search 인덱스 생성 및 청크 문서 업로드/삭제
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Callable
+
+from azure.core.exceptions import HttpResponseError
+
+from azure.search.documents import SearchClient, SearchIndexingBufferedSender
+from azure.search.documents.indexes import SearchIndexClient
+from azure.search.documents.indexes.models import (
+    SearchIndex,
+    SearchField,
+    SearchFieldDataType,
+    SimpleField,
+    SearchableField,
+    VectorSearch,
+    HnswAlgorithmConfiguration,
+    VectorSearchProfile,
+    SemanticConfiguration,
+    SemanticSearch,
+    SemanticPrioritizedFields,
+    SemanticField,
+)
+
+from .manifest import ChunkRecord, IngestManifest
+from .tokens import retry_after
+
+
+def create_search_index(credential, search_name: str, index_name: str,
+                        dimensions: int | None = 3072, extra_fields: list | None = None,
+                        title_field: str | None = None):
+    """AI Search 벡터 인덱스 생성 (dimensions=None이면 벡터 필드 없이 텍스트/시맨틱만)"""
+    endpoint = f"https://{search_name}.search.windows.net"
+    index_client = SearchIndexClient(endpoint, credential)
+
+    fields = [
+        SimpleField(name="id", type=SearchFieldDataType.String, key=True, filterable=True),
+        SearchableField(name="content", type=SearchFieldDataType.String, analyzer_name="ko.microsoft"),
+        SimpleField(name="source", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="chunk_id", type=SearchFieldDataType.Int32, filterable=True),
+        *(extra_fields or []),
+    ]
+    vector_search = None
+    if dimensions:
+        fields.append(SearchField(
+            name="content_vector",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+            searchable=True,
+            vector_search_dimensions=dimensions,
+            vector_search_profile_name="vector-profile",
+        ))
+        vector_search = VectorSearch(
+            algorithms=[HnswAlgorithmConfiguration(name="hnsw-config")],
+            profiles=[VectorSearchProfile(name="vector-profile", algorithm_configuration_name="hnsw-config")],
+        )
+
+    semantic_config = SemanticConfiguration(
+        name="semantic-config",
+        prioritized_fields=SemanticPrioritizedFields(
+            content_fields=[SemanticField(field_name="content")],
+            title_field=SemanticField(field_name=title_field) if title_field else None,
+        ),
+    )
+    semantic_search = SemanticSearch(configurations=[semantic_config])
+
+    index = SearchIndex(
+        name=index_name,
+        fields=fields,
+        vector_search=vector_search,
+        semantic_search=semantic_search,
+    )
+
+    result = index_client.create_or_update_index(index)
+    print(f"  ✅ 인덱스 '{result.name}' 생성 완료")
+    return result
+
+
+# 문서 단위로 다시 보내면 성공할 수 있는 상태 코드 (충돌/일시적 과부하)
+RETRIABLE_STATUS = {409, 422, 429, 503}
+# AI Search 요청 1건 제한은 16MB / 1000개 — 여유를 두고 배치를 자름
+DEFAULT_BATCH_BYTES = 8 * 1024 * 1024
+# 검색 결과 페이지 크기 / $skip 상한 — 이보다 많은 문서는 id 범위로 나눠 조회
+LIST_PAGE_SIZE = 1000
+MAX_SKIP = 100_000
+
+
+def estimate_payload_bytes(doc: dict) -> int:
+    """JSON 직렬화 크기 추정 (직렬화 없이) — 벡터 float 1개당 최대 20바이트로 계산"""
+    size = 2
+    for key, value in doc.items():
+        size += len(key) + 4
+        if isinstance(value, str):
+            size += len(value.encode("utf-8")) + 2
+        elif isinstance(value, (list, tuple)):
+            size += 20 * len(value) + 2
+        else:
+            size += 24
+    return size
+
+
+class SearchSink:
+    """청크 → AI Search 문서 변환 및 업로드 (동기 SDK 호출은 스레드에서 실행)
+
+    metadata(source)가 주어지면 그 결과를 문서에 추가한다 (예: 제목/분류 필드, 기본 필드는 덮어쓰지 않음).
+    업로드는 여러 배치를 동시에 호출해도 되고, IndexingResult에서 실패한 키만 골라 재시도한다.
+    """
+
+    def __init__(self, search_client: SearchClient,
+                 metadata: Callable[[str], dict] | None = None, max_retries: int = 5):
+        self.client = search_client
+        self.metadata = metadata
+        self.max_retries = max_retries
+        self.documents = 0
+        self.failed = 0
+        self.bytes = 0
+        self.requests = 0
+        self.retries = 0
+        self._started: float | None = None
+
+    def document(self, source: str, record: ChunkRecord, vector: list[float] | None) -> dict:
+        doc = self.metadata(source) if self.metadata else {}
+        doc.update({
+            "id": record.doc_id,
+            "content": record.content,
+            "source": source,
+            "chunk_id": record.chunk_id,
+        })
+        if vector is not None:
+            doc["content_vector"] = vector
+        return doc
+
+    payload_bytes = staticmethod(estimate_payload_bytes)
+
+    async def _backoff(self, attempt: int, error=None) -> None:
+        delay = retry_after(error) or min(30.0, 2.0 ** attempt)
+        self.retries += 1
+        await asyncio.sleep(delay + random.uniform(0, delay * 0.25))
+
+    async def upload(self, docs: list[dict]) -> set[str]:
+        """업로드 후 성공한 문서 id 반환 — 실패한 키만 재시도, 재시도 불가 실패는 출력"""
+        if self._started is None:
+            self._started = time.perf_counter()
+        by_key = {d["id"]: d for d in docs}
+        pending = docs
+        succeeded: set[str] = set()
+        errors: dict[str, str] = {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.requests += 1
+                results = await asyncio.to_thread(self.client.upload_documents, pending)
+            except HttpResponseError as e:
+                if e.status_code == 413 and len(pending) > 1:
+                    # SDK가 분할하지 못한 경우 절반씩 나눠 다시 보냄
+                    half = len(pending) // 2
+                    parts = await asyncio.gather(self.upload(pending[:half]), self.upload(pending[half:]))
+                    return succeeded.union(*parts)
+                if e.status_code not in RETRIABLE_STATUS and e.status_code not in (500, 502, 504):
+                    raise
+                if attempt == self.max_retries:
+                    errors.update({d["id"]: str(e) for d in pending})
+                    break
+                await self._backoff(attempt, e)
+                continue
+
+            retry = []
+            for r in results:
+                if r.succeeded:
+                    succeeded.add(r.key)
+                    self.bytes += estimate_payload_bytes(by_key[r.key])
+                elif r.status_code in RETRIABLE_STATUS and attempt < self.max_retries:
+                    retry.append(by_key[r.key])
+                else:
+                    errors[r.key] = f"{r.status_code} {r.error_message}"
+            if not retry:
+                break
+            pending = retry
+            await self._backoff(attempt)
+
+        self.documents += len(succeeded)
+        self.failed += len(errors)
+        for key, message in list(errors.items())[:3]:
+            print(f"  ⚠️ 인덱싱 실패 {key}: {message}")
+        return succeeded
+
+    def close(self) -> None:
+        pass
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - (self._started or time.perf_counter()), 1e-9)
+        return (
+            f"{self.documents}개 문서 / {self.bytes / 1e6:.1f}MB / {self.requests}회 요청 "
+            f"(재시도 {self.retries}회, 실패 {self.failed}개), {elapsed:.1f}초 — "
+            f"{self.documents / elapsed:.1f} docs/s, {self.bytes / 1e6 / elapsed:.2f}MB/s"
+        )
+
+    async def delete(self, doc_ids: list[str]) -> None:
+        for i in range(0, len(doc_ids), 1000):
+            await asyncio.to_thread(
+                self.client.delete_documents, [{"id": d} for d in doc_ids[i:i + 1000]]
+            )
+
+    async def move(self, records: list[ChunkRecord]) -> None:
+        """위치만 바뀐 청크는 chunk_id만 갱신 (재임베딩 없음)"""
+        await asyncio.to_thread(
+            self.client.merge_documents,
+            [{"id": r.doc_id, "chunk_id": r.chunk_id} for r in records],
+        )
+
+    def _index_ids(self, lo: str | None = None, hi: str | None = None) -> list[str]:
+        """[lo, hi) 범위의 인덱스 문서 id 전체
+
+        $skip은 100,000까지만 허용되므로, 범위 안 문서가 그보다 많으면 첫 페이지 id의 중앙값으로
+        범위를 둘로 나눠 각각 조회한다 (id 필드는 filterable만 필요 — sortable이 아닌 기존 인덱스도 동작).
+        """
+        clauses = []
+        if lo is not None:
+            clauses.append("id ge '{}'".format(lo.replace("'", "''")))
+        if hi is not None:
+            clauses.append("id lt '{}'".format(hi.replace("'", "''")))
+        query = {"search_text": "*", "select": ["id"], "filter": " and ".join(clauses) or None}
+        results = self.client.search(**query, top=LIST_PAGE_SIZE, include_total_count=True)
+        ids = [r["id"] for r in results]
+        total = results.get_count() or 0
+        if total > MAX_SKIP and len(ids) > 1:
+            pivot = sorted(ids)[len(ids) // 2]
+            return self._index_ids(lo, pivot) + self._index_ids(pivot, hi)
+        for skip in range(len(ids), total, LIST_PAGE_SIZE):
+            ids.extend(r["id"] for r in self.client.search(**query, top=LIST_PAGE_SIZE, skip=skip))
+        return ids
+
+    def purge_untracked(self, manifest: IngestManifest) -> int:
+        """매니페스트에 없는 인덱스 문서 삭제 (--full, 이전 순번 id 정리)"""
+        tracked = manifest.doc_ids()
+        stale = [{"id": doc_id} for doc_id in self._index_ids() if doc_id not in tracked]
+        for i in range(0, len(stale), 1000):
+            self.client.delete_documents(stale[i:i + 1000])
+        return len(stale)
+
+
+class BufferedSearchSink(SearchSink):
+    """SearchIndexingBufferedSender 기반 싱크 — 배치 분할/재시도를 SDK에 맡김
+
+    SearchSink와 같은 인터페이스. 전송기는 스레드 안전하지 않아 업로드 호출을 직렬화하며,
+    호출마다 flush해 해당 문서들의 성공 여부를 돌려준다.
+    """
+
+    def __init__(self, search_client: SearchClient, endpoint: str, index_name: str, credential,
+                 metadata: Callable[[str], dict] | None = None, batch_size: int = 100,
+                 max_retries: int = 5):
+        super().__init__(search_client, metadata, max_retries)
+        self._lock = threading.Lock()
+        self._ok: set[str] = set()
+        self._failed: dict[str, str] = {}
+        self.sender = SearchIndexingBufferedSender(
+            endpoint, index_name, credential,
+            auto_flush=False,
+            initial_batch_action_count=batch_size,
+            max_retries_per_action=max_retries,
+            on_progress=lambda action: self._ok.add(self._key(action)),
+            on_error=lambda action: self._failed.setdefault(self._key(action), "failed"),
+        )
+
+    @staticmethod
+    def _key(action) -> str:
+        return action.additional_properties["id"]
+
+    def _send(self, docs: list[dict]) -> tuple[set[str], dict[str, str]]:
+        with self._lock:
+            self._ok, self._failed = set(), {}
+            self.sender.upload_documents(docs)
+            self.sender.flush()
+            return self._ok, self._failed
+
+    async def upload(self, docs: list[dict]) -> set[str]:
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.requests += 1
+        succeeded, errors = await asyncio.to_thread(self._send, docs)
+        self.documents += len(succeeded)
+        self.failed += len(errors)
+        self.bytes += sum(estimate_payload_bytes(d) for d in docs if d["id"] in succeeded)
+        for key in list(errors)[:3]:
+            print(f"  ⚠️ 인덱싱 실패 {key}")
+        return succeeded
+
+    def close(self) -> None:
+        self.sender.close()
@@ -0,0 +1,18 @@
+"""
+소스 단계 — 인덱싱 대상 파일 목록
+"""
+from pathlib import Path
+
+DEFAULT_PATTERNS = ("*.pdf", "*.md")
+
+
+class LocalSource:
+    """로컬 디렉터리의 대상 파일 (패턴 순서, 패턴 안에서는 이름순)"""
+
+    def __init__(self, data_dir: str | Path, patterns: tuple[str, ...] = DEFAULT_PATTERNS):
+        self.data_dir = Path(data_dir)
+        self.patterns = patterns
+
+    def __iter__(self):
+        for pattern in self.patterns:
+            yield from sorted(self.data_dir.glob(pattern))
@@ -0,0 +1 @@
+../../src/webapp/tokens.py
\ No newline at end of file
@@ -1,107 +1,100 @@
 #!/usr/bin/env python3
-"""Classic Hub RAG 인덱스 구성 - text-embedding-ada-002 + 한국어 지원"""
-from pathlib import Path
+"""Classic Hub RAG 인덱스 구성 - text-embedding-ada-002 + 한국어 지원
+
+재실행 시 매니페스트(SQLite) 기준 변경된 파일/청크만 업로드·임베딩 (--full: 전체)
+--local-index 지정 시 Storage/AI Search 없이 로컬 인덱스 파일만 생성
+"""
+import sys
+import argparse
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from azure.search.documents import SearchClient
 from azure.search.documents.models import VectorizedQuery
 from openai import AzureOpenAI
-from PyPDF2 import PdfReader
 
-STORAGE = "stcn4v5czon"
-SEARCH = "srch-mmf5sjfd"
-OAI = "oai-mmf5sjfd"
+from ingest import (
+    DEFAULT_CONTAINER,
+    IngestManifest,
+    IngestOptions,
+    LocalSource,
+    add_ingest_arguments,
+    add_resource_arguments,
+    index_directory,
+    resolve_resource_names,
+    upload_files,
+)
+
 DATA_DIR = "/tmp/azure-search-openai-demo/data"
 INDEX = "rag-index"
 EMBED_MODEL = "text-embedding-ada-002"
 
-cred = DefaultAzureCredential()
-
-# [1] Storage 업로드
-print("[1/3] Storage 업로드...")
-blob_client = BlobServiceClient(f"https://{STORAGE}.blob.core.windows.net", credential=cred)
-container = blob_client.get_container_client("rag-documents")
-for f in list(Path(DATA_DIR).glob("*.pdf")) + list(Path(DATA_DIR).glob("*.md")):
-    blob = container.get_blob_client(f.name)
-    with open(f, "rb") as data:
-        blob.upload_blob(data, overwrite=True)
-    print(f"  OK: {f.name}")
-
-# [2] 임베딩 + 인덱싱
-print("[2/3] 청킹 + 임베딩 + 인덱싱...")
-token = cred.get_token("https://cognitiveservices.azure.com/.default")
-oai = AzureOpenAI(
-    azure_endpoint=f"https://{OAI}.openai.azure.com",
-    api_version="2024-10-21",
-    azure_ad_token=token.token,
-)
-search = SearchClient(f"https://{SEARCH}.search.windows.net", INDEX, cred)
-
-docs = []
-doc_id = 0
-
-for pdf in sorted(Path(DATA_DIR).glob("*.pdf")):
-    print(f"  {pdf.name}")
-    reader = PdfReader(str(pdf))
-    text = "".join(p.extract_text() or "" for p in reader.pages)
-    for i in range(0, len(text), 800):
-        chunk = text[i:i+1000].strip()
-        if not chunk:
-            continue
-        # 토큰 갱신 (대용량 PDF 처리 시 만료 방지)
-        token = cred.get_token("https://cognitiveservices.azure.com/.default")
-        oai = AzureOpenAI(
-            azure_endpoint=f"https://{OAI}.openai.azure.com",
-            api_version="2024-10-21",
-            azure_ad_token=token.token,
-        )
-        emb = oai.embeddings.create(input=chunk, model=EMBED_MODEL).data[0].embedding
-        docs.append({"id": str(doc_id), "content": chunk, "source": pdf.name, "chunk_id": i // 800, "content_vector": emb})
-        doc_id += 1
-
-for md in sorted(Path(DATA_DIR).glob("*.md")):
-    print(f"  {md.name}")
-    text = md.read_text(encoding="utf-8")
-    for i in range(0, len(text), 800):
-        chunk = text[i:i+1000].strip()
-        if not chunk:
-            continue
-        token = cred.get_token("https://cognitiveservices.azure.com/.default")
-        oai = AzureOpenAI(
-            azure_endpoint=f"https://{OAI}.openai.azure.com",
-            api_version="2024-10-21",
-            azure_ad_token=token.token,
-        )
-        emb = oai.embeddings.create(input=chunk, model=EMBED_MODEL).data[0].embedding
-        docs.append({"id": str(doc_id), "content": chunk, "source": md.name, "chunk_id": i // 800, "content_vector": emb})
-        doc_id += 1
-
-for i in range(0, len(docs), 100):
-    batch = docs[i:i+100]
-    result = search.upload_documents(batch)
-    ok = sum(1 for r in result if r.succeeded)
-    print(f"  batch {i//100+1}: {ok}/{len(batch)}")
-print(f"  total: {doc_id} chunks")
-
-# [3] 한국어 검색 테스트
-print("[3/3] 한국어 검색 테스트...")
-token2 = cred.get_token("https://cognitiveservices.azure.com/.default")
-oai2 = AzureOpenAI(azure_endpoint=f"https://{OAI}.openai.azure.com", api_version="2024-10-21", azure_ad_token=token2.token)
-
-q = "치과 혜택은 어떤 것들이 있나요?"
-qe = oai2.embeddings.create(input=q, model=EMBED_MODEL).data[0].embedding
-vq = VectorizedQuery(vector=qe, k_nearest_neighbors=3, fields="content_vector")
-results = search.search(search_text=q, vector_queries=[vq], query_type="semantic", semantic_configuration_name="semantic-config", top=3)
-print(f"  Q: {q}")
-for i, r in enumerate(results):
-    print(f"  [{i+1}] {r['source']} (score={r.get('@search.score',0):.4f}): {r['content'][:100]}...")
-
-# GPT-4o RAG 응답
-print("\n  GPT-4o RAG 응답:")
-context = "\n---\n".join(r["content"] for r in search.search(search_text=q, vector_queries=[vq], query_type="semantic", semantic_configuration_name="semantic-config", top=3))
-resp = oai2.chat.completions.create(model="gpt-4o", messages=[
-    {"role": "system", "content": "내부 문서 기반으로 답변. 소스 파일명을 [brackets]로 표시."},
-    {"role": "user", "content": f"Sources:\n{context}\n\nQuestion: {q}"},
-], temperature=0, max_tokens=500)
-print(f"  {resp.choices[0].message.content}")
-print("\nDONE!")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Classic Hub RAG 인덱스 구성 (ada-002)")
+    add_resource_arguments(parser)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--index-name", default=INDEX)
+    add_ingest_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = resolve_resource_names(args)
+    options = IngestOptions.from_args(args)
+    required = ("cognitive",) if options.local_index else ("cognitive", "storage", "search")
+    if not all(k in names for k in required):
+        print("리소스 이름이 필요합니다: -g <resource-group> 또는 --storage/--search/--cognitive")
+        sys.exit(1)
+
+    cred = DefaultAzureCredential()
+    source = LocalSource(args.data_dir)
+
+    if options.local_index:
+        print(f"[1/1] 청킹 + 임베딩 → 로컬 인덱스 ({options.local_index})...")
+        index_directory(cred, None, args.index_name, source, names["cognitive"], EMBED_MODEL, options)
+        print("\nDONE!")
+        return
+    storage, search_name, oai = names["storage"], names["search"], names["cognitive"]
+
+    # [1] Storage 업로드
+    print("[1/3] Storage 업로드...")
+    manifest = IngestManifest(options.manifest, scope=f"{search_name}/{args.index_name}")
+    try:
+        upload_files(cred, storage, source, DEFAULT_CONTAINER, manifest, force=options.full,
+                     concurrency=options.blob_concurrency, block_concurrency=options.blob_block_concurrency)
+    finally:
+        manifest.close()
+
+    # [2] 임베딩 + 인덱싱 (공용 ingest 파이프라인 — 배치/동시 임베딩, 캐시, 증분)
+    print("[2/3] 청킹 + 임베딩 + 인덱싱...")
+    search = SearchClient(f"https://{search_name}.search.windows.net", args.index_name, cred)
+    index_directory(cred, search_name, args.index_name, source, oai, EMBED_MODEL, options,
+                    search_client=search)
+
+    # [3] 한국어 검색 테스트
+    print("[3/3] 한국어 검색 테스트...")
+    token2 = cred.get_token("https://cognitiveservices.azure.com/.default")
+    oai2 = AzureOpenAI(azure_endpoint=f"https://{oai}.openai.azure.com", api_version="2024-10-21", azure_ad_token=token2.token)
+
+    q = "치과 혜택은 어떤 것들이 있나요?"
+    qe = oai2.embeddings.create(input=q, model=EMBED_MODEL).data[0].embedding
+    vq = VectorizedQuery(vector=qe, k_nearest_neighbors=3, fields="content_vector")
+    results = search.search(search_text=q, vector_queries=[vq], query_type="semantic", semantic_configuration_name="semantic-config", top=3)
+    print(f"  Q: {q}")
+    for i, r in enumerate(results):
+        print(f"  [{i+1}] {r['source']} (score={r.get('@search.score',0):.4f}): {r['content'][:100]}...")
+
+    # GPT-4o RAG 응답
+    print("\n  GPT-4o RAG 응답:")
+    context = "\n---\n".join(r["content"] for r in search.search(search_text=q, vector_queries=[vq], query_type="semantic", semantic_configuration_name="semantic-config", top=3))
+    resp = oai2.chat.completions.create(model="gpt-4o", messages=[
+        {"role": "system", "content": "내부 문서 기반으로 답변. 소스 파일명을 [brackets]로 표시."},
+        {"role": "user", "content": f"Sources:\n{context}\n\nQuestion: {q}"},
+    ], temperature=0, max_tokens=500)
+    print(f"  {resp.choices[0].message.content}")
+    print("\nDONE!")
+
+
+# 프로세스 풀(spawn) 워커가 스크립트를 다시 실행하지 않도록 가드
+if __name__ == "__main__":
+    main()
@@ -1,237 +1,45 @@
 #!/usr/bin/env python3
 """
 RAG 인덱스 구성 스크립트
-- PDF 문서를 텍스트로 변환 + 청킹
+- PDF 문서를 텍스트로 변환 + 토큰 기준 청킹 (문장/제목/페이지 경계 유지)
 - Azure AI Search에 벡터 인덱스 생성
 - text-embedding-3-large로 임베딩 생성 후 인덱싱
 - GPT-4o로 RAG 검색 테스트
+- --local-index: Storage/AI Search 없이 로컬 인덱스 파일만 생성 (웹앱 RETRIEVAL_BACKEND=local)
 """
-import os
 import sys
-import json
 import argparse
-from pathlib import Path
 
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from azure.search.documents import SearchClient
-from azure.search.documents.indexes import SearchIndexClient
-from azure.search.documents.indexes.models import (
-    SearchIndex,
-    SearchField,
-    SearchFieldDataType,
-    SimpleField,
-    SearchableField,
-    VectorSearch,
-    HnswAlgorithmConfiguration,
-    VectorSearchProfile,
-    SearchIndex,
-    SemanticConfiguration,
-    SemanticSearch,
-    SemanticPrioritizedFields,
-    SemanticField,
-)
 from openai import AzureOpenAI
-from PyPDF2 import PdfReader
+
+from ingest import (
+    DEFAULT_CONTAINER,
+    IngestManifest,
+    IngestOptions,
+    LocalSource,
+    add_ingest_arguments,
+    add_resource_arguments,
+    create_search_index,
+    index_directory,
+    resolve_resource_names,
+    upload_files,
+)
+
+EMBED_MODEL = "text-embedding-3-large"
+EMBED_DIMENSIONS = 3072
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="RAG 인덱스 구성")
-    parser.add_argument("--resource-group", "-g", required=True)
+    add_resource_arguments(parser)
     parser.add_argument("--data-dir", default="/tmp/azure-search-openai-demo/data")
     parser.add_argument("--index-name", default="rag-index")
-    parser.add_argument("--chunk-size", type=int, default=1000)
-    parser.add_argument("--chunk-overlap", type=int, default=200)
+    add_ingest_arguments(parser)
     return parser.parse_args()
 
 
-def get_resource_names(rg: str) -> dict:
-    """리소스 그룹에서 리소스 이름을 자동 감지"""
-    import subprocess
-    result = subprocess.run(
-        ["az", "resource", "list", "-g", rg, "--query",
-         "[].{name:name, type:type}", "-o", "json"],
-        capture_output=True, text=True
-    )
-    resources = json.loads(result.stdout)
-    names = {}
-    for r in resources:
-        t = r["type"]
-        n = r["name"]
-        if "CognitiveServices/accounts" in t and "/" not in n:
-            names["cognitive"] = n
-        elif "Storage/storageAccounts" in t:
-            names["storage"] = n
-        elif "Search/searchServices" in t:
-            names["search"] = n
-    return names
-
-
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """PDF에서 텍스트 추출"""
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text + "\n"
-    return text
-
-
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list[str]:
-    """텍스트를 청킹"""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        if chunk.strip():
-            chunks.append(chunk.strip())
-        start = end - overlap
-    return chunks
-
-
-def upload_to_storage(credential, storage_name: str, data_dir: str):
-    """문서를 Storage에 업로드"""
-    blob_url = f"https://{storage_name}.blob.core.windows.net"
-    blob_client = BlobServiceClient(blob_url, credential=credential)
-    container_client = blob_client.get_container_client("rag-documents")
-
-    uploaded = 0
-    for f in Path(data_dir).glob("*.pdf"):
-        blob = container_client.get_blob_client(f.name)
-        with open(f, "rb") as data:
-            blob.upload_blob(data, overwrite=True)
-        uploaded += 1
-        print(f"  ✅ {f.name} 업로드 완료")
-
-    # MD 파일도
-    for f in Path(data_dir).glob("*.md"):
-        blob = container_client.get_blob_client(f.name)
-        with open(f, "rb") as data:
-            blob.upload_blob(data, overwrite=True)
-        uploaded += 1
-        print(f"  ✅ {f.name} 업로드 완료")
-
-    print(f"  총 {uploaded}개 파일 업로드 완료")
-
-
-def create_search_index(credential, search_name: str, index_name: str):
-    """AI Search 벡터 인덱스 생성"""
-    endpoint = f"https://{search_name}.search.windows.net"
-    index_client = SearchIndexClient(endpoint, credential)
-
-    fields = [
-        SimpleField(name="id", type=SearchFieldDataType.String, key=True, filterable=True),
-        SearchableField(name="content", type=SearchFieldDataType.String, analyzer_name="ko.microsoft"),
-        SimpleField(name="source", type=SearchFieldDataType.String, filterable=True),
-        SimpleField(name="chunk_id", type=SearchFieldDataType.Int32, filterable=True),
-        SearchField(
-            name="content_vector",
-            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-            searchable=True,
-            vector_search_dimensions=3072,
-            vector_search_profile_name="vector-profile",
-        ),
-    ]
-
-    vector_search = VectorSearch(
-        algorithms=[HnswAlgorithmConfiguration(name="hnsw-config")],
-        profiles=[VectorSearchProfile(name="vector-profile", algorithm_configuration_name="hnsw-config")],
-    )
-
-    semantic_config = SemanticConfiguration(
-        name="semantic-config",
-        prioritized_fields=SemanticPrioritizedFields(
-            content_fields=[SemanticField(field_name="content")]
-        ),
-    )
-    semantic_search = SemanticSearch(configurations=[semantic_config])
-
-    index = SearchIndex(
-        name=index_name,
-        fields=fields,
-        vector_search=vector_search,
-        semantic_search=semantic_search,
-    )
-
-    result = index_client.create_or_update_index(index)
-    print(f"  ✅ 인덱스 '{result.name}' 생성 완료")
-
-
-def index_documents(credential, search_name: str, cognitive_name: str,
-                    index_name: str, data_dir: str, chunk_size: int, chunk_overlap: int):
-    """문서를 청킹 → 임베딩 → 인덱싱"""
-    search_endpoint = f"https://{search_name}.search.windows.net"
-    search_client = SearchClient(search_endpoint, index_name, credential)
-
-    # OpenAI 클라이언트 (임베딩용)
-    token = credential.get_token("https://cognitiveservices.azure.com/.default")
-    oai_client = AzureOpenAI(
-        azure_endpoint=f"https://{cognitive_name}.openai.azure.com",
-        api_version="2024-10-21",
-        azure_ad_token=token.token,
-    )
-
-    documents = []
-    doc_id = 0
-
-    # PDF 처리
-    for pdf_path in Path(data_dir).glob("*.pdf"):
-        print(f"  📄 처리 중: {pdf_path.name}")
-        text = extract_text_from_pdf(str(pdf_path))
-        chunks = chunk_text(text, chunk_size, chunk_overlap)
-
-        for i, chunk in enumerate(chunks):
-            # 임베딩 생성
-            response = oai_client.embeddings.create(
-                input=chunk,
-                model="text-embedding-3-large"
-            )
-            embedding = response.data[0].embedding
-
-            documents.append({
-                "id": str(doc_id),
-                "content": chunk,
-                "source": pdf_path.name,
-                "chunk_id": i,
-                "content_vector": embedding,
-            })
-            doc_id += 1
-
-    # MD 처리
-    for md_path in Path(data_dir).glob("*.md"):
-        print(f"  📄 처리 중: {md_path.name}")
-        text = md_path.read_text(encoding="utf-8")
-        chunks = chunk_text(text, chunk_size, chunk_overlap)
-
-        for i, chunk in enumerate(chunks):
-            response = oai_client.embeddings.create(
-                input=chunk,
-                model="text-embedding-3-large"
-            )
-            embedding = response.data[0].embedding
-
-            documents.append({
-                "id": str(doc_id),
-                "content": chunk,
-                "source": md_path.name,
-                "chunk_id": i,
-                "content_vector": embedding,
-            })
-            doc_id += 1
-
-    # 배치 업로드
-    batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
-        result = search_client.upload_documents(batch)
-        succeeded = sum(1 for r in result if r.succeeded)
-        print(f"  ✅ 배치 {i // batch_size + 1}: {succeeded}/{len(batch)} 인덱싱 완료")
-
-    print(f"  총 {doc_id}개 청크 인덱싱 완료")
-
-
 def test_rag(credential, search_name: str, cognitive_name: str, index_name: str):
     """RAG 검색 + GPT 응답 테스트"""
     from azure.search.documents.models import VectorizedQuery
@@ -250,7 +58,7 @@ def test_rag(credential, search_name: str, cognitive_name: str, index_name: str)
     print(f"\n  🔍 테스트 질문: {query}")
 
     # 쿼리 임베딩
-    query_response = oai_client.embeddings.create(input=query, model="text-embedding-3-large")
+    query_response = oai_client.embeddings.create(input=query, model=EMBED_MODEL)
     query_vector = query_response.data[0].embedding
 
     vector_query = VectorizedQuery(vector=query_vector, k_nearest_neighbors=3, fields="content_vector")
@@ -300,28 +108,47 @@ def main():
 
     # 리소스 이름 감지
     print("\n[1/5] 리소스 이름 감지...")
-    names = get_resource_names(args.resource_group)
+    names = resolve_resource_names(args)
     print(f"  Cognitive: {names.get('cognitive')}")
     print(f"  Storage:   {names.get('storage')}")
     print(f"  Search:    {names.get('search')}")
 
-    if not all(k in names for k in ("cognitive", "storage", "search")):
-        print("❌ 필요한 리소스를 찾을 수 없습니다.")
+    options = IngestOptions.from_args(args)
+    required = ("cognitive",) if options.local_index else ("cognitive", "storage", "search")
+    if not all(k in names for k in required):
+        print("❌ 필요한 리소스를 찾을 수 없습니다. (-g 또는 --storage/--search/--cognitive 지정)")
         sys.exit(1)
 
+    source = LocalSource(args.data_dir)
+
+    if options.local_index:
+        # 로컬 인덱스 — 임베딩만 Azure OpenAI 사용, Storage/AI Search 단계 생략
+        print(f"\n[2/2] 문서 청킹 → 임베딩 → 로컬 인덱스 ({options.local_index})...")
+        index_directory(
+            credential, None, args.index_name, source,
+            names["cognitive"], EMBED_MODEL, options,
+        )
+        print(f"\n  웹앱: RETRIEVAL_BACKEND=local LOCAL_INDEX_PATH={options.local_index}")
+        return
+
     # Storage에 문서 업로드
     print("\n[2/5] Storage에 문서 업로드...")
-    upload_to_storage(credential, names["storage"], args.data_dir)
+    manifest = IngestManifest(options.manifest, scope=f"{names['search']}/{args.index_name}")
+    try:
+        upload_files(credential, names["storage"], source, DEFAULT_CONTAINER, manifest, force=options.full,
+                     concurrency=options.blob_concurrency, block_concurrency=options.blob_block_concurrency)
+    finally:
+        manifest.close()
 
     # AI Search 인덱스 생성
     print("\n[3/5] AI Search 벡터 인덱스 생성...")
-    create_search_index(credential, names["search"], args.index_name)
+    create_search_index(credential, names["search"], args.index_name, EMBED_DIMENSIONS)
 
     # 문서 인덱싱
     print("\n[4/5] 문서 청킹 → 임베딩 → 인덱싱...")
-    index_documents(
-        credential, names["search"], names["cognitive"],
-        args.index_name, args.data_dir, args.chunk_size, args.chunk_overlap
+    index_directory(
+        credential, names["search"], args.index_name, source,
+        names["cognitive"], EMBED_MODEL, options,
     )
 
     # RAG 테스트
@@ -4,11 +4,14 @@ Azure AI Foundry Agent 생성 및 RAG 테스트
 - AI Search 벡터 인덱스 연동
 - azure-search-openai-demo 시스템 프롬프트 적용
 - 원본 문서 소스 링크 포함 응답
+- --local-index: AI Search 대신 로컬 인덱스 파일(JSONL)로 검색 (src/webapp/local_index.py)
 """
 import json
 import sys
 import argparse
 import subprocess
+import time
+from pathlib import Path
 
 from azure.identity import DefaultAzureCredential
 from azure.search.documents import SearchClient
@@ -41,6 +44,9 @@ def parse_args():
     parser.add_argument("--resource-group", "-g", required=True)
     parser.add_argument("--index-name", default="rag-index")
     parser.add_argument("--query", "-q", default="What does the PerksPlus program cover? Is there a spending limit?")
+    parser.add_argument("--local-index", default=None,
+                        help="로컬 인덱스 파일(JSONL) — setup-rag-index.py --local-index로 생성")
+    parser.add_argument("--ann", action="store_true", help="로컬 인덱스에서 HNSW 근사 탐색 사용")
     return parser.parse_args()
 
 
@@ -65,11 +71,9 @@ def get_resource_names(rg: str) -> dict:
 
 
 def search_documents(credential, search_name: str, cognitive_name: str,
-                     index_name: str, query: str, top_k: int = 5) -> list[dict]:
-    """벡터 + 시맨틱 하이브리드 검색"""
-    search_endpoint = f"https://{search_name}.search.windows.net"
-    search_client = SearchClient(search_endpoint, index_name, credential)
-
+                     index_name: str, query: str, top_k: int = 5,
+                     local_index: str | None = None, ann: bool = False) -> list[dict]:
+    """벡터 + 시맨틱 하이브리드 검색 (local_index 지정 시 로컬 BM25 + 벡터 RRF)"""
     token = credential.get_token("https://cognitiveservices.azure.com/.default")
     oai_client = AzureOpenAI(
         azure_endpoint=f"https://{cognitive_name}.openai.azure.com",
@@ -81,6 +85,24 @@ def search_documents(credential, search_name: str, cognitive_name: str,
     emb_response = oai_client.embeddings.create(input=query, model="text-embedding-3-large")
     query_vector = emb_response.data[0].embedding
 
+    if local_index:
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "webapp"))
+        from local_index import LocalIndex
+
+        started = time.perf_counter()
+        index = LocalIndex.load(local_index, ann=ann)
+        print(f"  로컬 인덱스 적재: {len(index)}개 문서, {time.perf_counter() - started:.2f}초")
+        started = time.perf_counter()
+        results = index.search(query, query_vector, top_k)
+        print(f"  로컬 검색: {(time.perf_counter() - started) * 1000:.1f}ms")
+        return [
+            {"source": r.get("source", "unknown"), "content": r["content"], "score": r["score"]}
+            for r in results
+        ]
+
+    search_endpoint = f"https://{search_name}.search.windows.net"
+    search_client = SearchClient(search_endpoint, index_name, credential)
+
     vector_query = VectorizedQuery(
         vector=query_vector, k_nearest_neighbors=top_k, fields="content_vector"
     )
@@ -151,14 +173,14 @@ def main():
     print("\n📡 리소스 감지 중...")
     names = get_resource_names(args.resource_group)
     print(f"  Cognitive: {names['cognitive']}")
-    print(f"  Storage:   {names['storage']}")
-    print(f"  Search:    {names['search']}")
+    print(f"  Storage:   {names.get('storage')}")
+    print(f"  Search:    {names.get('search', '(로컬 인덱스)' if args.local_index else None)}")
 
     # 벡터 검색
     print(f"\n🔍 검색 중: \"{args.query}\"")
     sources = search_documents(
-        credential, names["search"], names["cognitive"],
-        args.index_name, args.query
+        credential, names.get("search"), names["cognitive"],
+        args.index_name, args.query, local_index=args.local_index, ann=args.ann,
     )
     print(f"  {len(sources)}개 소스 문서 검색 완료")
     for i, s in enumerate(sources):
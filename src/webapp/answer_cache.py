@@ -0,0 +1,155 @@
+"""
+시맨틱 답변 캐시 — 유사 질문에 대한 GPT-4o 호출 생략
+- 질문 임베딩을 정규화해 float32 행렬에 저장, 코사인 유사도는 행렬-벡터 곱 1회로 계산
+- 적중 조건: 유사도 ≥ threshold AND 검색 소스 집합 동일 AND 인덱스 버전 동일
+- 값: 답변 + 응답에 내보낸 소스 (프롬프트에 실제로 들어간 소스 — 키인 검색 소스 집합과 다를 수 있음)
+- 제거: TTL 만료 + 가장 오래 사용되지 않은 항목 (LRU)
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def source_key(sources: list[dict]) -> str:
+    """검색 결과 집합 식별자 — id와 본문을 함께 해시 (순서 무관)"""
+    parts = sorted(f"{s.get('id', s['source'])}\x1f{s['content']}" for s in sources)
+    return hashlib.sha256("\x1e".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: list[dict]
+    source_key: str
+    index_version: str
+    stored_at: float
+
+
+class AnswerCache:
+    """임베딩 최근접 이웃 기반 답변 캐시"""
+
+    def __init__(self, max_size: int = 1000, threshold: float = 0.97, ttl: float = 86400):
+        if max_size < 0:
+            raise ValueError("max_size는 0 이상이어야 합니다 (0이면 비활성화)")
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold는 0 초과 1 이하여야 합니다")
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self._matrix: np.ndarray | None = None  # (max_size, dim) 정규화 벡터
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._stored_at = np.zeros(max_size, dtype=np.float64)
+        self._entries: list[CachedAnswer | None] = [None] * max_size
+        self._size = 0
+        self._index_version: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _check_version(self, index_version: str) -> None:
+        """인덱스 버전이 바뀌면(재인덱싱) 전체 무효화"""
+        if self._index_version != index_version:
+            if self._size:
+                self.invalidations += 1
+            self.clear()
+            self._index_version = index_version
+
+    def lookup(self, vector: list[float], sources: list[dict],
+               index_version: str) -> CachedAnswer | None:
+        if not self.enabled:
+            return None
+        self._check_version(index_version)
+        if not self._size:
+            self.misses += 1
+            return None
+
+        q = self._normalize(vector)
+        if q.shape[0] != self._matrix.shape[1]:
+            self.misses += 1
+            return None
+
+        sims = self._matrix[:self._size] @ q
+        now = time.time()
+        key = source_key(sources)
+        # 임계값 이상인 후보만 유사도 높은 순으로 검사
+        candidates = np.flatnonzero(sims >= self.threshold)
+        for row in candidates[np.argsort(-sims[candidates])]:
+            entry = self._entries[row]
+            if self.ttl and now - entry.stored_at > self.ttl:
+                continue
+            if entry.source_key != key:
+                continue
+            self._last_used[row] = now
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def store(self, vector: list[float], question: str, answer: str,
+              sources: list[dict], index_version: str,
+              key_sources: list[dict] | None = None) -> None:
+        """sources는 적중 시 반환할 소스, key_sources는 적중 판정용 검색 소스 집합 (기본: sources)"""
+        if not self.enabled:
+            return
+        self._check_version(index_version)
+        q = self._normalize(vector)
+        if self._matrix is None or self._matrix.shape[1] != q.shape[0]:
+            self.clear()
+            self._matrix = np.zeros((self.max_size, q.shape[0]), dtype=np.float32)
+
+        now = time.time()
+        if self._size < self.max_size:
+            row = self._size
+            self._size += 1
+        else:
+            # 만료 항목 우선, 없으면 LRU 제거
+            expired = np.flatnonzero(now - self._stored_at > self.ttl) if self.ttl else []
+            row = int(expired[0]) if len(expired) else int(np.argmin(self._last_used))
+            self.evictions += 1
+
+        self._matrix[row] = q
+        self._last_used[row] = now
+        self._stored_at[row] = now
+        self._entries[row] = CachedAnswer(
+            question=question,
+            answer=answer,
+            sources=sources,
+            source_key=source_key(sources if key_sources is None else key_sources),
+            index_version=index_version,
+            stored_at=now,
+        )
+
+    def clear(self) -> None:
+        self._entries = [None] * self.max_size
+        self._last_used[:] = 0
+        self._stored_at[:] = 0
+        self._size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "index_version": self._index_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
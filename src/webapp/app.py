@@ -2,15 +2,34 @@
 Azure Search OpenAI Demo — Classic Hub 맞춤 웹앱
 azure-search-openai-demo 패턴 기반, infra-foundry-classic/basic 리소스 연동
 """
+import asyncio
 import json
 import logging
+import math
 import os
+import re
+import time
 
-from quart import Quart, request, jsonify, render_template, send_from_directory
+import aiohttp
+from quart import Quart, Response, g, request, jsonify, render_template, send_from_directory
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.identity.aio import DefaultAzureCredential
 from azure.search.documents.aio import SearchClient
-from azure.search.documents.models import VectorizedQuery
-from openai import AsyncAzureOpenAI
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+from answer_cache import AnswerCache
+from context_packer import ContextPacker
+from embedding_cache import EmbeddingCache, normalize_query
+from rate_limit import DeploymentLimiter, RateLimited, estimate_prompt_tokens
+from retrieval import AzureSearchRetriever, LocalRetriever, doc_key, fuse
+from sessions import MemorySessionStore, RedisSessionStore, new_session_id
+from streaming import CitationParser, sse_event
+import telemetry
+from telemetry import instrumented, record_cache, record_usage, track_stream
+from timing import StageTimer
+from token_cache import TokenCache
+from tokens import estimate_tokens
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("webapp")
@@ -23,9 +42,81 @@ app = Quart(__name__, static_folder="static", template_folder="templates")
 AZURE_OPENAI_ENDPOINT = os.environ["AZURE_OPENAI_ENDPOINT"]
 AZURE_OPENAI_CHAT_DEPLOYMENT = os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT", "gpt-4o")
 AZURE_OPENAI_EMB_DEPLOYMENT = os.environ.get("AZURE_OPENAI_EMB_DEPLOYMENT", "text-embedding-ada-002")
-AZURE_SEARCH_ENDPOINT = os.environ["AZURE_SEARCH_ENDPOINT"]
+# 검색 백엔드 — azure(AI Search) | local(로컬 인덱스 파일, 오프라인 개발/벤치마크)
+RETRIEVAL_BACKEND = os.environ.get("RETRIEVAL_BACKEND", "azure").lower()
+AZURE_SEARCH_ENDPOINT = os.environ.get("AZURE_SEARCH_ENDPOINT", "") if RETRIEVAL_BACKEND == "local" \
+    else os.environ["AZURE_SEARCH_ENDPOINT"]
 AZURE_SEARCH_INDEX = os.environ.get("AZURE_SEARCH_INDEX", "rag-index")
 AZURE_STORAGE_ACCOUNT = os.environ.get("AZURE_STORAGE_ACCOUNT", "")
+AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-10-21")
+# 지정 시 AAD 대신 API 키 인증 — 로컬 가짜 서버(fake_openai.py)로 부하 테스트할 때 사용
+AZURE_OPENAI_API_KEY = os.environ.get("AZURE_OPENAI_API_KEY", "")
+# 토큰 만료 몇 초 전부터 선제 갱신할지
+TOKEN_REFRESH_MARGIN = int(os.environ.get("TOKEN_REFRESH_MARGIN", "300"))
+# AI Search 커넥션 풀 — 전체 / 호스트당 최대 연결 수
+SEARCH_MAX_CONNECTIONS = int(os.environ.get("SEARCH_MAX_CONNECTIONS", "100"))
+SEARCH_KEEPALIVE_TIMEOUT = float(os.environ.get("SEARCH_KEEPALIVE_TIMEOUT", "60"))
+# 쿼리 임베딩 캐시 — 크기 0이면 비활성화, COMPACT=true면 float32로 저장
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL = float(os.environ.get("EMBEDDING_CACHE_TTL", "3600"))
+EMBEDDING_CACHE_COMPACT = os.environ.get("EMBEDDING_CACHE_COMPACT", "true").lower() == "true"
+# 시맨틱 답변 캐시 (/ask) — 유사도 임계값 이상 + 동일 소스 집합이면 저장된 답변 반환 (크기 0이면 비활성화)
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.97"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "86400"))
+# 인덱스 버전 — 미지정 시 문서 수로 추정 (INDEX_VERSION_TTL초마다 재확인)
+AZURE_SEARCH_INDEX_VERSION = os.environ.get("AZURE_SEARCH_INDEX_VERSION", "")
+INDEX_VERSION_TTL = float(os.environ.get("INDEX_VERSION_TTL", "300"))
+# 로컬 인덱스 — setup-rag-index.py --local-index로 만든 JSONL, ANN=true면 HNSW 근사 탐색
+LOCAL_INDEX_PATH = os.environ.get("LOCAL_INDEX_PATH", "local-index.jsonl")
+LOCAL_INDEX_ANN = os.environ.get("LOCAL_INDEX_ANN", "false").lower() == "true"
+LOCAL_INDEX_EF_SEARCH = int(os.environ.get("LOCAL_INDEX_EF_SEARCH", "64"))
+# 대화 기반 쿼리 재작성 (/chat) — 히스토리를 독립 검색 쿼리 최대 N개로 바꿔 병렬 검색 후 RRF 결합
+# 요청 본문 "rewrite": true/false로 요청별 지정 가능
+QUERY_REWRITE_ENABLED = os.environ.get("QUERY_REWRITE_ENABLED", "false").lower() == "true"
+QUERY_REWRITE_MAX_QUERIES = int(os.environ.get("QUERY_REWRITE_MAX_QUERIES", "3"))
+# 재작성 프롬프트에 넣을 최근 메시지 수
+QUERY_REWRITE_HISTORY = int(os.environ.get("QUERY_REWRITE_HISTORY", "6"))
+# 추측 실행 검색 — 임베딩을 기다리지 않고 텍스트 검색을 먼저 시작, 벡터 검색 결과와 로컬 RRF 결합
+SEARCH_SPECULATIVE = os.environ.get("SEARCH_SPECULATIVE", "false").lower() == "true"
+# 검색 마감 시간(초, 0이면 없음) — 지나면 끝난 쪽 결과만으로 답변 (둘 다 안 끝났으면 먼저 끝나는 쪽까지 대기)
+SEARCH_DEADLINE = float(os.environ.get("SEARCH_DEADLINE", "0"))
+# 프롬프트 토큰 예산 — 전체(시스템 프롬프트 + 히스토리 + 소스 + 질문) / 그중 히스토리 상한
+CONTEXT_MAX_TOKENS = int(os.environ.get("CONTEXT_MAX_TOKENS", "6000"))
+CONTEXT_HISTORY_TOKENS = int(os.environ.get("CONTEXT_HISTORY_TOKENS", "1500"))
+# 서버 측 대화 세션 — memory(워커 내 LRU) | redis(Redis 호환 서버, 멀티 워커/인스턴스 공유)
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory").lower()
+SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_MAX_SIZE = int(os.environ.get("SESSION_MAX_SIZE", "10000"))
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "3600"))
+SESSION_MAX_MESSAGES = int(os.environ.get("SESSION_MAX_MESSAGES", "40"))
+# 직전 턴 검색 결과를 후속 질문 후보에 섞을 때의 점수 가중치 (0이면 섞지 않음)
+SESSION_CARRY_WEIGHT = float(os.environ.get("SESSION_CARRY_WEIGHT", "0.5"))
+# 일괄 질문 (/ask/batch) — 워커당 동시 처리 질문 수(대화형 요청과 별도 풀) / 요청당 최대 질문 수
+# 임베딩 배치 크기 / 한도 초과 시 질문별 재시도 횟수
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_QUESTIONS = int(os.environ.get("BATCH_MAX_QUESTIONS", "1000"))
+BATCH_EMBED_SIZE = int(os.environ.get("BATCH_EMBED_SIZE", "256"))
+BATCH_MAX_ATTEMPTS = int(os.environ.get("BATCH_MAX_ATTEMPTS", "5"))
+# 배포 TPM/RPM 중 일괄 질문이 쓸 수 있는 상한 — 배치는 별도 대기열에서 이 몫까지만 쓰고,
+# 대화형 요청은 배치가 쓰지 않는 몫을 포함해 배포 한도 전체를 사용 (0이면 배치도 대화형 한도를 그대로 공유)
+BATCH_LIMIT_SHARE = float(os.environ.get("BATCH_LIMIT_SHARE", "0.25"))
+if not 0 <= BATCH_LIMIT_SHARE <= 1:
+    raise ValueError("BATCH_LIMIT_SHARE는 0 이상 1 이하여야 합니다")
+# Azure OpenAI 호출 한도 — 배포 전체 TPM (0이면 무제한), RPM 미지정 시 Azure 비율(1000 TPM당 6 RPM)
+# 워커마다 한도를 따로 적용하므로 워커 수(serve.py가 WEB_WORKERS로 전달)로 나눔
+OPENAI_CHAT_TPM = float(os.environ.get("OPENAI_CHAT_TPM", "0"))
+OPENAI_CHAT_RPM = float(os.environ.get("OPENAI_CHAT_RPM", "") or OPENAI_CHAT_TPM * 6 / 1000)
+OPENAI_EMB_TPM = float(os.environ.get("OPENAI_EMB_TPM", "0"))
+OPENAI_EMB_RPM = float(os.environ.get("OPENAI_EMB_RPM", "") or OPENAI_EMB_TPM * 6 / 1000)
+# 한도 대기열 — 최대 대기 요청 수(초과 시 503) / 최대 대기 시간(초, 초과 예상 시 429) / 429 재시도 횟수
+OPENAI_MAX_QUEUE = int(os.environ.get("OPENAI_MAX_QUEUE", "100"))
+OPENAI_MAX_WAIT = float(os.environ.get("OPENAI_MAX_WAIT", "10"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "3"))
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "1") or "1") or 1
+# 답변 최대 토큰 — Azure는 TPM 한도 계산에 max_tokens를 포함
+MAX_COMPLETION_TOKENS = 1024
 
 # azure-search-openai-demo 시스템 프롬프트
 SYSTEM_PROMPT = """Assistant helps the company employees with their questions about internal documents.
@@ -49,76 +140,466 @@ Enclose the follow-up questions in double angle brackets. Example:
 Do not repeat questions that have already been asked.
 Make sure the last question ends with ">>"."""
 
+# azure-search-openai-demo 쿼리 생성 프롬프트 (여러 쿼리를 줄 단위로 받도록 변형)
+QUERY_REWRITE_PROMPT = """Below is a history of the conversation so far, and a new question asked by the user that needs to be answered by searching in a knowledge base.
+Generate up to {max_queries} standalone search queries based on the conversation and the new question, one per line.
+Each query must make sense without the conversation (resolve pronouns and follow-ups like "what about dental?").
+Use more than one query only when the question asks about several distinct things.
+Do not include cited source filenames and document names e.g info.txt or doc.pdf in the search query terms.
+Do not include any text inside [] or <<>> in the search query terms.
+Do not include any special characters like '+'.
+If the question is not in English, generate the queries in the language used in the question.
+If you cannot generate a search query, return just the number 0."""
+
+# 재작성 응답 줄 앞의 글머리표 / 번호 ("- ", "1. ", "2) ")
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
 # ---------------------------------------------------------------------------
 # 전역 리소스 (앱 수명 주기)
 # ---------------------------------------------------------------------------
 credential: DefaultAzureCredential | None = None
+token_cache: TokenCache | None = None
 openai_client: AsyncAzureOpenAI | None = None
+# 워커당 단일 클라이언트 재사용 횟수 (/stats)
+openai_client_reuses = 0
+search_session: aiohttp.ClientSession | None = None
+search_client: SearchClient | None = None
+retriever: AzureSearchRetriever | LocalRetriever | None = None
+session_store: MemorySessionStore | RedisSessionStore | None = None
+embedding_cache = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_SIZE,
+    ttl=EMBEDDING_CACHE_TTL,
+    compact=EMBEDDING_CACHE_COMPACT,
+)
+answer_cache = AnswerCache(
+    max_size=ANSWER_CACHE_SIZE,
+    threshold=ANSWER_CACHE_THRESHOLD,
+    ttl=ANSWER_CACHE_TTL,
+) if ANSWER_CACHE_ENABLED and ANSWER_CACHE_SIZE > 0 else None
+index_version: str | None = None
+index_version_checked_at = 0.0
+# 일괄 질문 전용 동시 실행 풀 — 배치 요청이 여러 개여도 워커당 BATCH_CONCURRENCY개까지만 처리
+batch_pool = asyncio.Semaphore(BATCH_CONCURRENCY)
+context_packer = ContextPacker(
+    max_tokens=CONTEXT_MAX_TOKENS,
+    history_tokens=CONTEXT_HISTORY_TOKENS,
+)
+
+
+def _deployment_limiter(name: str, tpm: float, rpm: float, share: float = 1.0,
+                        parent: DeploymentLimiter | None = None) -> DeploymentLimiter:
+    """워커당 호출 한도 = 배포 한도 × share / 워커 수"""
+    return DeploymentLimiter(
+        name,
+        tpm=tpm * share / WEB_WORKERS,
+        rpm=rpm * share / WEB_WORKERS,
+        max_queue=OPENAI_MAX_QUEUE,
+        max_wait=OPENAI_MAX_WAIT,
+        max_retries=OPENAI_MAX_RETRIES,
+        parent=parent,
+    )
+
+
+chat_limiter = _deployment_limiter(AZURE_OPENAI_CHAT_DEPLOYMENT, OPENAI_CHAT_TPM, OPENAI_CHAT_RPM)
+embedding_limiter = _deployment_limiter(AZURE_OPENAI_EMB_DEPLOYMENT, OPENAI_EMB_TPM, OPENAI_EMB_RPM)
+# 일괄 질문(/ask/batch) 한도 — 자기 대기열에서 BATCH_LIMIT_SHARE 몫까지, 예약은 대화형 버킷에도 함께 반영
+if BATCH_LIMIT_SHARE:
+    batch_chat_limiter = _deployment_limiter(
+        f"{AZURE_OPENAI_CHAT_DEPLOYMENT}/batch", OPENAI_CHAT_TPM, OPENAI_CHAT_RPM,
+        BATCH_LIMIT_SHARE, parent=chat_limiter,
+    )
+    batch_embedding_limiter = _deployment_limiter(
+        f"{AZURE_OPENAI_EMB_DEPLOYMENT}/batch", OPENAI_EMB_TPM, OPENAI_EMB_RPM,
+        BATCH_LIMIT_SHARE, parent=embedding_limiter,
+    )
+else:
+    batch_chat_limiter, batch_embedding_limiter = chat_limiter, embedding_limiter
 
 
 @app.before_serving
 async def startup():
-    global credential, openai_client
-    credential = DefaultAzureCredential()
-    token = await credential.get_token("https://cognitiveservices.azure.com/.default")
-    openai_client = AsyncAzureOpenAI(
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        azure_ad_token=token.token,
-        api_version="2024-10-21",
+    """워커 프로세스마다 1회 실행 — 클라이언트/커넥션 풀은 워커 간에 공유하지 않음"""
+    global credential, token_cache, openai_client, search_session, search_client, retriever, session_store
+    if telemetry.configure_tracing():
+        logger.info("OpenTelemetry tracing enabled — exporting to Application Insights")
+    # 토크나이저 인코딩은 백그라운드 스레드에서 읽음 — 폐쇄망에서 다운로드가 멈춰도 기동을 막지 않음 (그동안 추정치)
+    asyncio.get_running_loop().run_in_executor(None, context_packer.tokenizer.preload)
+    # 429 응답 훅 — 재시도로 흡수된 스로틀링도 /metrics에 집계
+    # 재시도는 SDK 대신 DeploymentLimiter가 담당 (Retry-After 동안 배포 전체 대기)
+    http_client = DefaultAsyncHttpxClient(event_hooks={"response": [telemetry.count_throttled_response]})
+    # 키 인증 + 로컬 검색이면 AAD 자격 증명이 필요 없음 (완전 오프라인)
+    if not AZURE_OPENAI_API_KEY or RETRIEVAL_BACKEND != "local":
+        credential = DefaultAzureCredential()
+    if AZURE_OPENAI_API_KEY:
+        openai_client = AsyncAzureOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version=AZURE_OPENAI_API_VERSION,
+            http_client=http_client,
+            max_retries=0,
+        )
+    else:
+        token_cache = TokenCache(credential, refresh_margin=TOKEN_REFRESH_MARGIN)
+        # 토큰 공급자 방식 — 클라이언트(커넥션 풀)는 유지하고 토큰만 갱신
+        openai_client = AsyncAzureOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            azure_ad_token_provider=token_cache,
+            api_version=AZURE_OPENAI_API_VERSION,
+            http_client=http_client,
+            max_retries=0,
+        )
+    logger.info(
+        "OpenAI client initialized — endpoint=%s, auth=%s, pid=%d",
+        AZURE_OPENAI_ENDPOINT, "key" if AZURE_OPENAI_API_KEY else "aad", os.getpid(),
+    )
+    if SESSION_STORE == "redis":
+        session_store = RedisSessionStore(SESSION_REDIS_URL, ttl=SESSION_TTL, max_messages=SESSION_MAX_MESSAGES)
+    else:
+        session_store = MemorySessionStore(
+            max_size=SESSION_MAX_SIZE, ttl=SESSION_TTL, max_messages=SESSION_MAX_MESSAGES
+        )
+
+    if RETRIEVAL_BACKEND == "local":
+        retriever = await LocalRetriever.open(
+            LOCAL_INDEX_PATH, ann=LOCAL_INDEX_ANN, ef_search=LOCAL_INDEX_EF_SEARCH
+        )
+        logger.info(
+            "Local index loaded — path=%s, documents=%d, ann=%s",
+            LOCAL_INDEX_PATH, len(retriever.index), LOCAL_INDEX_ANN,
+        )
+        return
+
+    # AI Search — 공유 aiohttp 세션으로 연결/TLS 세션을 요청 간 재사용
+    connector = aiohttp.TCPConnector(
+        limit=SEARCH_MAX_CONNECTIONS,
+        limit_per_host=SEARCH_MAX_CONNECTIONS,
+        keepalive_timeout=SEARCH_KEEPALIVE_TIMEOUT,
+    )
+    search_session = aiohttp.ClientSession(connector=connector)
+    search_client = SearchClient(
+        AZURE_SEARCH_ENDPOINT,
+        AZURE_SEARCH_INDEX,
+        credential,
+        transport=AioHttpTransport(session=search_session, session_owner=False),
+    )
+    retriever = AzureSearchRetriever(search_client, AZURE_SEARCH_INDEX)
+    logger.info(
+        "Search client initialized — endpoint=%s, max_connections=%d",
+        AZURE_SEARCH_ENDPOINT, SEARCH_MAX_CONNECTIONS,
     )
-    logger.info("OpenAI client initialized — endpoint=%s", AZURE_OPENAI_ENDPOINT)
 
 
 @app.after_serving
 async def shutdown():
+    if session_store:
+        await session_store.close()
+    if retriever:
+        await retriever.close()
+    if search_session:
+        await search_session.close()
+    if openai_client:
+        await openai_client.close()
     if credential:
         await credential.close()
+    telemetry.worker_exit()
 
 
 # ---------------------------------------------------------------------------
 # 헬퍼
 # ---------------------------------------------------------------------------
-async def _refresh_openai():
-    """토큰 갱신 후 새 클라이언트 반환"""
-    global openai_client
-    token = await credential.get_token("https://cognitiveservices.azure.com/.default")
-    openai_client = AsyncAzureOpenAI(
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        azure_ad_token=token.token,
-        api_version="2024-10-21",
-    )
+def _openai() -> AsyncAzureOpenAI:
+    """앱 수명 동안 공유하는 OpenAI 클라이언트 반환"""
+    global openai_client_reuses
+    openai_client_reuses += 1
     return openai_client
 
 
-async def _search(query: str, top_k: int = 5) -> list[dict]:
-    """AI Search 벡터 + 시맨틱 하이브리드 검색"""
-    client = await _refresh_openai()
+async def _embed(query: str) -> list[float]:
+    """쿼리 임베딩 — 캐시 적중 시 Azure OpenAI 호출 생략"""
+    return (await _embed_many([query]))[0]
 
-    emb = await client.embeddings.create(input=query, model=AZURE_OPENAI_EMB_DEPLOYMENT)
-    query_vector = emb.data[0].embedding
 
-    vector_query = VectorizedQuery(
-        vector=query_vector, k_nearest_neighbors=top_k, fields="content_vector"
+async def _embed_many(queries: list[str], limiter: DeploymentLimiter | None = None,
+                      use_cache: bool = True) -> list[list[float]]:
+    """여러 쿼리 임베딩 — 캐시 미스만 모아 1회 배치 호출 (limiter 기본: 대화형 embedding_limiter)
+
+    use_cache=False면 쿼리 임베딩 캐시를 조회·저장하지 않음 (일괄 질문이 대화형 캐시 항목을 밀어내지 않도록)
+    """
+    if use_cache:
+        vectors = [embedding_cache.get(AZURE_OPENAI_EMB_DEPLOYMENT, q) for q in queries]
+        for vector in vectors:
+            record_cache("embedding", vector is not None)
+    else:
+        vectors = [None] * len(queries)
+    misses = [i for i, vector in enumerate(vectors) if vector is None]
+    if not misses:
+        return vectors
+
+    inputs = [queries[i] for i in misses]
+    emb = await (limiter or embedding_limiter).call(
+        lambda: _openai().embeddings.create(input=inputs, model=AZURE_OPENAI_EMB_DEPLOYMENT),
+        tokens=sum(estimate_tokens(q) for q in inputs),
     )
+    record_usage(AZURE_OPENAI_EMB_DEPLOYMENT, emb.usage)
+    for i, item in zip(misses, sorted(emb.data, key=lambda d: d.index)):
+        vectors[i] = item.embedding
+        if use_cache:
+            embedding_cache.put(AZURE_OPENAI_EMB_DEPLOYMENT, queries[i], item.embedding)
+    return vectors
+
+
+async def _index_version() -> str:
+    """답변 캐시 무효화용 인덱스 버전 — 재인덱싱 시 값이 바뀜"""
+    global index_version, index_version_checked_at
+    if AZURE_SEARCH_INDEX_VERSION:
+        return AZURE_SEARCH_INDEX_VERSION
+    now = time.monotonic()
+    if index_version is None or now - index_version_checked_at > INDEX_VERSION_TTL:
+        index_version = await retriever.version()
+        index_version_checked_at = now
+    return index_version
+
+
+async def _search(query: str | None, top_k: int = 5,
+                  query_vector: list[float] | None = None) -> list[dict]:
+    """텍스트 + 벡터 하이브리드 검색 (AI Search 시맨틱 또는 로컬 인덱스 RRF) — 한쪽이 None이면 나머지만"""
+    try:
+        return await retriever.search(query, query_vector, top_k)
+    except HttpResponseError as e:
+        if e.status_code == 429:
+            telemetry.UPSTREAM_THROTTLED.labels("search").inc()
+        raise
+
+
+async def _search_many(queries: list[str], query_vectors: list[list[float]], top_k: int) -> list[dict]:
+    """쿼리별 검색을 동시에 실행하고 RRF로 결합 (지연 ≈ 가장 느린 검색 1회)"""
+    results = await asyncio.gather(*(
+        _search(q, top_k, v) for q, v in zip(queries, query_vectors)
+    ))
+    return fuse(list(results), top_k)
+
+
+async def _speculative_search(query: str, top_k: int, timer) -> tuple[list[dict], list[float] | None]:
+    """텍스트 검색을 임베딩과 동시에 시작하고, 이어지는 벡터 검색 결과와 RRF 결합 → (소스, 쿼리 벡터)
+
+    임베딩 왕복 1회가 임계 경로에서 빠짐. SEARCH_DEADLINE이 지나면 끝난 쪽 결과만 사용하고,
+    한쪽이 실패해도 나머지로 답변. 쿼리 벡터는 임베딩이 끝나지 않았으면 None.
+    """
+    query_vector = None
+    # 마감으로 벡터 쪽이 취소돼도 임베딩은 끝까지 받아 캐시에 남김 (같은 질문의 다음 요청은 적중)
+    embedding = asyncio.create_task(_embed(query))
+    embedding.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def text_side():
+        with timer.stage("text_search"):
+            return await _search(query, top_k)
+
+    async def vector_side():
+        nonlocal query_vector
+        with timer.stage("embed"):
+            query_vector = await asyncio.shield(embedding)
+        with timer.stage("vector_search"):
+            return await _search(None, top_k, query_vector)
+
+    with timer.stage("retrieval"):
+        tasks = [asyncio.create_task(text_side()), asyncio.create_task(vector_side())]
+        done, pending = await asyncio.wait(tasks, timeout=SEARCH_DEADLINE or None)
+
+        def succeeded(task):
+            return task in done and task.exception() is None
+
+        # 마감까지 성공한 쪽이 없으면 먼저 성공하는 쪽(또는 모두 실패)까지 대기
+        while pending and not any(succeeded(t) for t in tasks):
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            done |= finished
+        for task in pending:
+            task.cancel()
+
+    results = [t.result() for t in tasks if succeeded(t)]
+    if not results:
+        raise tasks[0].exception()
+    for side, task in zip(("text", "vector"), tasks):
+        if not succeeded(task):
+            telemetry.SEARCH_PARTIAL.labels(side, "deadline" if task in pending else "error").inc()
+            if task in done:
+                logger.warning("%s search failed — answering with partial retrieval", side,
+                               exc_info=task.exception())
+    return fuse(results, top_k), query_vector
+
+
+def _carry_sources(sources: list[dict], previous: list[dict], top_k: int) -> list[dict]:
+    """직전 턴 검색 결과를 가중치를 낮춰 후보에 추가 — 후속 질문이 이전 문서를 계속 참조할 수 있게 함"""
+    if not previous or SESSION_CARRY_WEIGHT <= 0:
+        return sources
+    seen = {doc_key(s) for s in sources}
+    carried = [
+        {**s, "score": s["score"] * SESSION_CARRY_WEIGHT} for s in previous if doc_key(s) not in seen
+    ]
+    return sorted([*sources, *carried], key=lambda s: -s["score"])[:top_k]
+
 
-    async with SearchClient(
-        AZURE_SEARCH_ENDPOINT, AZURE_SEARCH_INDEX, credential
-    ) as search:
-        results = await search.search(
-            search_text=query,
-            vector_queries=[vector_query],
-            query_type="semantic",
-            semantic_configuration_name="semantic-config",
-            top=top_k,
+def _parse_queries(text: str, max_queries: int) -> list[str]:
+    """재작성 응답 → 쿼리 목록 (번호/글머리표/따옴표 제거, 중복 제거)"""
+    queries = []
+    for line in text.splitlines():
+        query = _LIST_MARKER_RE.sub("", line).strip().strip('"\'')
+        if not query or query == "0" or query.startswith("<<") or query in queries:
+            continue
+        queries.append(query)
+    return queries[:max_queries]
+
+
+async def _rewrite_queries(messages: list[dict]) -> list[str]:
+    """대화 히스토리 + 새 질문 → 독립 검색 쿼리 목록 (첫 턴이거나 실패하면 원래 질문 그대로)"""
+    user_query = messages[-1].get("content", "")
+    if len(messages) < 2:
+        return [user_query]
+    history = "\n".join(
+        f"{m['role']}: {m['content'][:1000]}" for m in messages[-QUERY_REWRITE_HISTORY - 1:-1]
+    )
+    prompt = [
+        {"role": "system", "content": QUERY_REWRITE_PROMPT.format(max_queries=QUERY_REWRITE_MAX_QUERIES)},
+        {"role": "user", "content": f"Conversation:\n{history}\n\nNew question: {user_query}"},
+    ]
+    try:
+        completion = await _complete(prompt, 0.0, max_tokens=100)
+    except Exception:
+        # 재작성은 품질 향상용 — 실패(한도 초과 포함)해도 원래 질문으로 검색
+        logger.warning("Query rewrite failed — falling back to the last message", exc_info=True)
+        return [user_query]
+    record_usage(AZURE_OPENAI_CHAT_DEPLOYMENT, completion.usage)
+    return _parse_queries(completion.choices[0].message.content or "", QUERY_REWRITE_MAX_QUERIES) or [user_query]
+
+
+def _build_messages(history: list[dict], question: str,
+                    sources: list[dict]) -> tuple[list[dict], list[dict]]:
+    """시스템 프롬프트 + 대화 히스토리 + 소스 컨텍스트로 프롬프트 구성 (토큰 예산 적용)
+
+    → (메시지, 프롬프트에 실제로 들어간 소스)
+    """
+    packed = context_packer.pack(SYSTEM_PROMPT, history, question, sources)
+    if packed.history_dropped or packed.sources_dropped:
+        logger.debug(
+            "Context packed — prompt_tokens=%d, history_dropped=%d, sources_dropped=%d",
+            packed.prompt_tokens, packed.history_dropped, packed.sources_dropped,
         )
-        docs = []
-        async for r in results:
-            docs.append({
-                "source": r.get("source", "unknown"),
-                "content": r["content"],
-                "score": r.get("@search.score", 0),
-            })
-    return docs
+    telemetry.PROMPT_TOKENS.observe(packed.prompt_tokens)
+    return packed.messages, packed.sources
+
+
+def _source_payload(sources: list[dict]) -> list[dict]:
+    """응답용 소스 요약 (본문 200자)"""
+    return [
+        {
+            "source": s["source"],
+            "score": round(s["score"], 4),
+            "content": s["content"][:200],
+        }
+        for s in sources
+    ]
+
+
+async def _complete(chat_messages: list[dict], temperature: float, stream: bool = False,
+                    max_tokens: int = MAX_COMPLETION_TOKENS, limiter: DeploymentLimiter | None = None):
+    """GPT-4o 호출 — 배포 한도 대기 + 429 재시도 (한도 초과 시 RateLimited, limiter 기본: chat_limiter)
+
+    stream=True면 응답 헤더까지만 기다린 스트림을 반환 — 거절/오류를 SSE 시작 전에 HTTP 상태로 돌려줌
+    """
+    options = {"stream": True, "stream_options": {"include_usage": True}} if stream else {}
+    return await (limiter or chat_limiter).call(
+        lambda: _openai().chat.completions.create(
+            model=AZURE_OPENAI_CHAT_DEPLOYMENT,
+            messages=chat_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **options,
+        ),
+        tokens=estimate_prompt_tokens(chat_messages) + max_tokens,
+    )
+
+
+async def _stream_answer(stream, sources: list[dict], started: float, timer, on_done=None):
+    """SSE 이벤트 생성 — sources → delta(토큰) … → done(후속 질문·인용)
+
+    stream은 _complete(..., stream=True) 결과, started는 호출 시작 시각 (first_token 기준)
+    await on_done(answer)은 생성이 정상 완료된 경우에만 호출 (답변 캐시·세션 저장 등)
+    """
+    yield sse_event("sources", _source_payload(sources))
+
+    parser = CitationParser()
+    first_token = None
+    try:
+        async for chunk in stream:
+            # 마지막 청크(choices 없음)에 토큰 사용량이 담김
+            if chunk.usage:
+                record_usage(AZURE_OPENAI_CHAT_DEPLOYMENT, chunk.usage)
+            # Azure는 콘텐츠 필터 결과만 담긴 빈 choices 청크를 보낼 수 있음
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+                timer.record("first_token", first_token)
+            text = parser.feed(chunk.choices[0].delta.content)
+            if text:
+                yield sse_event("delta", {"content": text})
+        rest = parser.flush()
+        if rest:
+            yield sse_event("delta", {"content": rest})
+    except Exception as e:
+        logger.exception("OpenAI streaming call failed")
+        yield sse_event("error", {"error": f"OpenAI call failed: {e}"})
+        return
+    finally:
+        timer.record("completion", time.perf_counter() - started)
+
+    if on_done:
+        await on_done(parser.answer)
+    yield sse_event("done", {
+        "answer": parser.answer,
+        "followups": parser.followups,
+        "citations": parser.citations,
+    })
+
+
+async def _cached_answer_events(answer: str, sources: list[dict]):
+    """답변 캐시 적중 시 스트리밍 응답과 동일한 이벤트 순서로 방출"""
+    parser = CitationParser()
+    text = parser.feed(answer) + parser.flush()
+    yield sse_event("sources", _source_payload(sources))
+    yield sse_event("delta", {"content": text})
+    yield sse_event("done", {
+        "answer": answer,
+        "followups": parser.followups,
+        "citations": parser.citations,
+        "cached": True,
+    })
+
+
+async def _open_stream(chat_messages: list[dict], temperature: float):
+    """스트리밍 호출 시작 → (스트림, 시작 시각)"""
+    started = time.perf_counter()
+    try:
+        return await _complete(chat_messages, temperature, stream=True), started
+    except Exception:
+        g.timer.record("completion", time.perf_counter() - started)
+        raise
+
+
+def _json_response(payload: dict) -> Response:
+    response = jsonify(payload)
+    response.headers["Server-Timing"] = g.timer.header()
+    return response
+
+
+def _sse_response(events) -> Response:
+    response = Response(track_stream(events), mimetype="text/event-stream")
+    # 스트리밍은 응답 시작 전 단계(embed/search)만 포함
+    response.headers["Server-Timing"] = g.timer.header()
+    response.headers["Cache-Control"] = "no-cache"
+    # 리버스 프록시(nginx 등) 버퍼링 비활성화
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None
+    return response
 
 
 # ---------------------------------------------------------------------------
@@ -138,105 +619,354 @@ async def favicon():
 # API 엔드포인트
 # ---------------------------------------------------------------------------
 @app.route("/chat", methods=["POST"])
+@app.route("/chat/stream", methods=["POST"])
+@instrumented
 async def chat():
-    """채팅 API — RAG 기반 응답 (azure-search-openai-demo /chat 패턴)"""
+    """채팅 API — RAG 기반 응답 (azure-search-openai-demo /chat 패턴)
+
+    "stream": true 또는 /chat/stream 호출 시 SSE로 응답
+    "rewrite": true(또는 QUERY_REWRITE_ENABLED)면 히스토리를 반영한 독립 쿼리들로 검색
+    세션 모드: {"session_id", "message"}로 새 턴만 전송 (첫 턴은 "session": true, 만료 시 404)
+    """
     body = await request.get_json()
-    messages = body.get("messages", [])
-    if not messages:
+    session_id, session = None, None
+    if body.get("session_id"):
+        session_id = body["session_id"]
+        session = await session_store.get(session_id)
+        if session is None:
+            # 클라이언트가 전체 히스토리와 "session": true로 다시 보내 새 세션을 만듦
+            return jsonify({"error": "session not found or expired", "session_id": session_id}), 404
+        messages = [*session["messages"], {"role": "user", "content": body.get("message", "")}]
+    elif body.get("session"):
+        session_id = new_session_id()
+        messages = body.get("messages") or [{"role": "user", "content": body.get("message", "")}]
+    else:
+        messages = body.get("messages", [])
+    if not messages or not messages[-1].get("content"):
         return jsonify({"error": "messages required"}), 400
 
     user_query = messages[-1].get("content", "")
     top_k = body.get("top", 5)
     temperature = body.get("temperature", 0.3)
+    stream = bool(body.get("stream", False)) or request.path == "/chat/stream"
+    rewrite = bool(body.get("rewrite", QUERY_REWRITE_ENABLED))
 
-    # 1. 검색
+    # 1. 검색 (재작성 시 쿼리 여러 개 — 임베딩 1회 배치, 검색은 동시 실행)
+    timer = g.timer
+    queries = [user_query]
+    previous = session or {}
     try:
-        sources = await _search(user_query, top_k)
+        if previous.get("query") == normalize_query(user_query):
+            # 같은 질문 재전송(재생성) — 직전 턴 검색 결과 재사용
+            sources = previous["sources"]
+            record_cache("session_retrieval", True)
+        else:
+            if session is not None:
+                record_cache("session_retrieval", False)
+            if rewrite:
+                with timer.stage("rewrite"):
+                    queries = await _rewrite_queries(messages)
+            if SEARCH_SPECULATIVE and len(queries) == 1:
+                sources, _ = await _speculative_search(queries[0], top_k, timer)
+            else:
+                with timer.stage("embed"):
+                    query_vectors = await _embed_many(queries)
+                with timer.stage("search"):
+                    sources = await _search_many(queries, query_vectors, top_k)
+            sources = _carry_sources(sources, previous.get("sources", []), top_k)
+    except RateLimited:
+        raise
     except Exception as e:
         logger.exception("Search failed")
         return jsonify({"error": f"Search failed: {e}"}), 500
+    retrieved = sources
 
-    # 2. 소스 컨텍스트 구성
-    source_texts = [f"{s['source']}: {s['content']}" for s in sources]
-    context = "\n\n".join(source_texts)
+    # 2. 소스 컨텍스트 + 이전 대화 히스토리로 프롬프트 구성
+    chat_messages, sources = _build_messages(messages[:-1], user_query, sources)
 
-    # 3. GPT-4o 호출
-    client = await _refresh_openai()
-    chat_messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-    ]
-    # 이전 대화 히스토리 추가
-    for m in messages[:-1]:
-        chat_messages.append({"role": m["role"], "content": m["content"]})
-    chat_messages.append({
-        "role": "user",
-        "content": f"Sources:\n{context}\n\nQuestion: {user_query}",
-    })
+    async def save_turn(answer: str):
+        if session_id is not None:
+            await session_store.put(session_id, {
+                "messages": [*messages, {"role": "assistant", "content": answer}],
+                "query": normalize_query(user_query),
+                "sources": retrieved,
+            })
 
+    # 3. GPT-4o 호출
     try:
-        completion = await client.chat.completions.create(
-            model=AZURE_OPENAI_CHAT_DEPLOYMENT,
-            messages=chat_messages,
-            temperature=temperature,
-            max_tokens=1024,
-        )
+        if stream:
+            answer_stream, started = await _open_stream(chat_messages, temperature)
+            response = _sse_response(_stream_answer(answer_stream, sources, started, timer, on_done=save_turn))
+            if session_id is not None:
+                response.headers["X-Session-Id"] = session_id
+            return response
+        with timer.stage("completion"):
+            completion = await _complete(chat_messages, temperature)
+    except RateLimited:
+        raise
     except Exception as e:
         logger.exception("OpenAI call failed")
         return jsonify({"error": f"OpenAI call failed: {e}"}), 500
 
     answer = completion.choices[0].message.content
+    record_usage(AZURE_OPENAI_CHAT_DEPLOYMENT, completion.usage)
+    await save_turn(answer)
 
     # 4. 응답
-    return jsonify({
+    payload = {
         "answer": answer,
-        "sources": [
-            {
-                "source": s["source"],
-                "score": round(s["score"], 4),
-                "content": s["content"][:200],
-            }
-            for s in sources
-        ],
-    })
+        "sources": _source_payload(sources),
+    }
+    if rewrite:
+        payload["queries"] = queries
+    if session_id is not None:
+        payload["session_id"] = session_id
+    response = _json_response(payload)
+    if session_id is not None:
+        response.headers["X-Session-Id"] = session_id
+    return response
 
 
 @app.route("/ask", methods=["POST"])
+@instrumented
 async def ask():
-    """단일 질문 API — 대화 기록 없이 1-turn RAG"""
+    """단일 질문 API — 대화 기록 없이 1-turn RAG ("stream": true 시 SSE)"""
     body = await request.get_json()
     question = body.get("question", "")
     if not question:
         return jsonify({"error": "question required"}), 400
 
-    sources = await _search(question, body.get("top", 5))
+    timer = g.timer
+    top_k = body.get("top", 5)
+    if SEARCH_SPECULATIVE:
+        sources, query_vector = await _speculative_search(question, top_k, timer)
+    else:
+        with timer.stage("embed"):
+            query_vector = await _embed(question)
+        with timer.stage("search"):
+            sources = await _search(question, top_k, query_vector)
+    stream = body.get("stream", False)
+
+    # 시맨틱 답변 캐시 — 유사 질문 + 동일 소스 집합이면 GPT-4o 호출 생략
+    # (추측 실행 검색이 마감 전에 임베딩을 받지 못했으면 건너뜀)
+    store = None
+    if answer_cache is not None and query_vector is not None:
+        with timer.stage("cache"):
+            version = await _index_version()
+            cached = answer_cache.lookup(query_vector, sources, version)
+        record_cache("answer", cached is not None)
+        if cached is not None:
+            if stream:
+                return _sse_response(_cached_answer_events(cached.answer, cached.sources))
+            return _json_response({
+                "answer": cached.answer,
+                "sources": _source_payload(cached.sources),
+                "cached": True,
+            })
+
+    # 답변 캐시 키는 검색된 소스 그대로, 값과 응답에는 프롬프트에 들어간 소스
+    chat_messages, prompt_sources = _build_messages([], question, sources)
+    if answer_cache is not None and query_vector is not None:
+        async def store(answer: str):
+            answer_cache.store(query_vector, question, answer, prompt_sources, version, key_sources=sources)
 
-    source_texts = [f"{s['source']}: {s['content']}" for s in sources]
-    context = "\n\n".join(source_texts)
+    if stream:
+        answer_stream, started = await _open_stream(chat_messages, 0.3)
+        return _sse_response(_stream_answer(answer_stream, prompt_sources, started, timer, on_done=store))
 
-    client = await _refresh_openai()
-    completion = await client.chat.completions.create(
-        model=AZURE_OPENAI_CHAT_DEPLOYMENT,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Sources:\n{context}\n\nQuestion: {question}"},
-        ],
-        temperature=0.3,
-        max_tokens=1024,
-    )
+    with timer.stage("completion"):
+        completion = await _complete(chat_messages, 0.3)
+    answer = completion.choices[0].message.content
+    record_usage(AZURE_OPENAI_CHAT_DEPLOYMENT, completion.usage)
+    if store:
+        await store(answer)
 
-    return jsonify({
-        "answer": completion.choices[0].message.content,
-        "sources": [
-            {"source": s["source"], "score": round(s["score"], 4), "content": s["content"][:200]}
-            for s in sources
-        ],
+    return _json_response({
+        "answer": answer,
+        "sources": _source_payload(prompt_sources),
     })
 
 
+def _parse_batch(raw: str) -> list[dict]:
+    """JSON 배열(또는 {"questions": [...]}) / NDJSON → [{"question", "id"?}]
+
+    항목은 질문 문자열 또는 {"question": ..., "id": ...} 객체
+    """
+    try:
+        items = json.loads(raw)
+    except json.JSONDecodeError:
+        items = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    if isinstance(items, dict):
+        items = items["questions"] if "questions" in items else [items]
+    parsed = []
+    for item in items:
+        item = {"question": item} if isinstance(item, str) else item
+        if not isinstance(item, dict) or not item.get("question"):
+            raise ValueError(f"item {len(parsed)}: question required")
+        parsed.append(item)
+    return parsed
+
+
+async def _embed_batch(questions: list[str]) -> list[list[float]]:
+    """BATCH_EMBED_SIZE개씩 묶어 임베딩 (묶음끼리는 동시 요청)"""
+    chunks = [questions[i:i + BATCH_EMBED_SIZE] for i in range(0, len(questions), BATCH_EMBED_SIZE)]
+    results = await asyncio.gather(
+        *(_embed_many(chunk, batch_embedding_limiter, use_cache=False) for chunk in chunks)
+    )
+    return [vector for chunk in results for vector in chunk]
+
+
+async def _answer_batch_item(index: int, item: dict, query_vector: list[float],
+                             top_k: int, temperature: float) -> dict:
+    """일괄 질문 1건 — 검색 → 프롬프트 구성 → 생성 (한도 초과는 Retry-After만큼 기다렸다 재시도)
+
+    생성은 배치 전용 한도(batch_chat_limiter)로 호출하고, Retry-After 대기 중에는 풀 슬롯을 반납
+    """
+    question = item["question"]
+    result = {"index": index, "question": question}
+    if "id" in item:
+        result["id"] = item["id"]
+    timer = StageTimer()
+    for attempt in range(BATCH_MAX_ATTEMPTS):
+        try:
+            async with batch_pool:
+                if attempt == 0:
+                    timer.record("queue", timer.elapsed())
+                with timer.stage("search"):
+                    sources = await _search(question, item.get("top", top_k), query_vector)
+                chat_messages, sources = _build_messages([], question, sources)
+                with timer.stage("completion"):
+                    completion = await _complete(chat_messages, temperature, limiter=batch_chat_limiter)
+            break
+        except RateLimited as e:
+            if attempt == BATCH_MAX_ATTEMPTS - 1:
+                result["error"] = str(e)
+                return result
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            logger.warning("Batch item %d failed", index, exc_info=True)
+            result["error"] = f"{type(e).__name__}: {e}"
+            return result
+    record_usage(AZURE_OPENAI_CHAT_DEPLOYMENT, completion.usage)
+    result.update(
+        answer=completion.choices[0].message.content,
+        sources=_source_payload(sources),
+        timings={stage: round(seconds * 1000, 1) for stage, seconds in timer.stages.items()},
+    )
+    return result
+
+
+async def _batch_lines(items: list[dict], vectors: list[list[float]], top_k: int, temperature: float):
+    """완료되는 순서대로 NDJSON 한 줄씩 — 마지막 줄은 요약 {"summary": ...}"""
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(_answer_batch_item(i, item, vector, top_k, temperature))
+        for i, (item, vector) in enumerate(zip(items, vectors))
+    ]
+    errors = 0
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            errors += "error" in result
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    finally:
+        # 클라이언트가 연결을 끊으면 남은 질문 취소
+        for task in tasks:
+            task.cancel()
+    yield json.dumps({"summary": {
+        "count": len(items),
+        "errors": errors,
+        "elapsed": round(time.perf_counter() - started, 3),
+    }}) + "\n"
+
+
+@app.route("/ask/batch", methods=["POST"])
+@instrumented
+async def ask_batch():
+    """일괄 질문 API — JSON 배열 또는 NDJSON 입력, 답변이 끝나는 순서대로 NDJSON 스트리밍 (야간 평가용)
+
+    임베딩은 배치로 요청하고, 검색·생성은 대화형 요청과 분리된 풀(BATCH_CONCURRENCY)에서 실행
+    옵션: ?top=5&temperature=0.3, 답변 캐시는 사용하지 않음
+    """
+    try:
+        items = _parse_batch(await request.get_data(as_text=True))
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": f"invalid batch: {e}"}), 400
+    if not items:
+        return jsonify({"error": "questions required"}), 400
+    if len(items) > BATCH_MAX_QUESTIONS:
+        return jsonify({"error": f"too many questions (max {BATCH_MAX_QUESTIONS})"}), 413
+
+    top_k = request.args.get("top", 5, type=int)
+    temperature = request.args.get("temperature", 0.3, type=float)
+    with g.timer.stage("embed"):
+        vectors = await _embed_batch([item["question"] for item in items])
+
+    response = Response(track_stream(_batch_lines(items, vectors, top_k, temperature)),
+                        mimetype="application/x-ndjson")
+    response.headers["Server-Timing"] = g.timer.header()
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None
+    return response
+
+
+@app.errorhandler(RateLimited)
+async def rate_limited(e: RateLimited):
+    """한도 초과 — 429(예산/업스트림) 또는 503(대기열 가득), 클라이언트 재시도 시점을 Retry-After로 안내"""
+    response = jsonify({"error": str(e), "reason": e.reason})
+    response.status_code = e.status
+    response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+    return response
+
+
+@app.route("/sessions/<session_id>", methods=["GET"])
+async def get_session(session_id: str):
+    """세션 히스토리 조회 (새로고침 후 대화 복원)"""
+    session = await session_store.get(session_id)
+    if session is None:
+        return jsonify({"error": "session not found or expired"}), 404
+    return jsonify({"session_id": session_id, "messages": session["messages"]})
+
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+async def delete_session(session_id: str):
+    await session_store.delete(session_id)
+    return "", 204
+
+
 @app.route("/health")
 async def health():
     return jsonify({"status": "ok"})
 
 
+@app.route("/metrics")
+async def metrics():
+    """Prometheus 메트릭 — 단계별 지연, 토큰, 캐시 적중, 업스트림 429, 처리 중 요청"""
+    body, content_type = telemetry.render()
+    return Response(body, content_type=content_type)
+
+
+@app.route("/stats")
+async def stats():
+    """토큰 갱신 / 클라이언트 재사용 / 캐시 카운터"""
+    return jsonify({
+        "openai": {
+            **(token_cache.stats() if token_cache else {}),
+            "client_reuses": openai_client_reuses,
+        },
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "retrieval": RETRIEVAL_BACKEND,
+        "sessions": session_store.stats() if session_store else None,
+        "limits": {
+            "chat": chat_limiter.stats(),
+            "embedding": embedding_limiter.stats(),
+            "batch_chat": batch_chat_limiter.stats(),
+            "batch_embedding": batch_embedding_limiter.stats(),
+        },
+    })
+
+
+# 개발 서버 (단일 프로세스, 디버그) — 운영은 serve.py (Hypercorn 멀티 워커)
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "8000")), debug=True)
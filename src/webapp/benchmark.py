@@ -0,0 +1,417 @@
+"""
+RAG 웹앱 부하 테스트 / 지연 시간 벤치마크
+- 비동기 부하 생성기: 동시 사용자 수(closed loop), 실행 시간 또는 요청 수, 엔드포인트 비율(/ask, /chat, /chat/stream)
+- 질문 믹스: 영어 + 한국어 기본 질문 (--questions 파일로 교체 가능)
+- 엔드포인트별 p50/p95/p99, 스트리밍 첫 토큰 시간, Server-Timing 기반 단계별(embed/search/completion) 분해
+- JSON / Markdown 리포트, --baseline과 비교해 p95 회귀 시 종료 코드 1
+
+--self-host: 가짜 Azure OpenAI(fake_openai.py) + 합성 로컬 인덱스 + 운영 모드 앱(serve.py)을 띄워 Azure 없이 측정
+
+실행:
+    python benchmark.py --self-host --concurrency 32 --duration 60 --markdown report.md --json report.json
+    python benchmark.py --url http://localhost:8000 --requests 500 --mix ask=1,chat=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+from fake_openai import fake_embedding
+from timing import parse_server_timing
+
+WEBAPP_DIR = Path(__file__).resolve().parent
+
+QUESTIONS = [
+    "What does the PerksPlus program cover?",
+    "Is there a spending limit for PerksPlus?",
+    "What are the employee benefits for dental care?",
+    "How do I enroll in the Northwind Health Plus plan?",
+    "What is the deductible for the Northwind Standard plan?",
+    "What happens during a performance review?",
+    "치과 혜택은 어떤 것들이 있나요?",
+    "PerksPlus 프로그램으로 어떤 비용을 지원받을 수 있나요?",
+    "연차 휴가는 며칠까지 사용할 수 있나요?",
+    "건강 보험 가입 절차를 알려주세요.",
+    "성과 평가는 어떻게 진행되나요?",
+    "재택 근무 규정이 있나요?",
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+# ---------------------------------------------------------------------------
+# 로컬 스탠드인 (--self-host)
+# ---------------------------------------------------------------------------
+def build_synthetic_index(path: Path, documents: int, dimensions: int, seed: int = 0) -> None:
+    """질문 키워드가 섞인 합성 청크로 로컬 인덱스(JSONL) 생성 — 벡터는 가짜 서버와 같은 해시 임베딩"""
+    rng = random.Random(seed)
+    vocabulary = " ".join(QUESTIONS).replace("?", "").replace(".", "").split()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(documents):
+            content = " ".join(rng.choice(vocabulary) for _ in range(120))
+            doc = {
+                "id": f"bench-{i}",
+                "content": content,
+                "source": f"bench_{i % 50}.pdf",
+                "chunk_id": i,
+                "content_vector": fake_embedding(content, dimensions),
+            }
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+
+
+async def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{url} not ready after {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+@asynccontextmanager
+async def self_host(args):
+    """가짜 OpenAI + serve.py(Hypercorn)를 하위 프로세스로 실행 (부하 생성기와 CPU를 나눠 쓰지 않도록)
+
+    합성 인덱스와 서버 로그는 임시 디렉터리에 만들고 종료 시 삭제 (--keep이면 남기고 경로 출력)
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    log = None
+    procs: list[subprocess.Popen] = []
+    try:
+        index_path = workdir / "index.jsonl"
+        build_synthetic_index(index_path, args.documents, args.dimensions, args.seed)
+
+        fake_url = f"http://127.0.0.1:{args.fake_port}"
+        app_url = f"http://127.0.0.1:{args.app_port}"
+        env = {
+            **os.environ,
+            "AZURE_OPENAI_ENDPOINT": fake_url,
+            "AZURE_OPENAI_API_KEY": "fake",
+            "RETRIEVAL_BACKEND": "local",
+            "LOCAL_INDEX_PATH": str(index_path),
+            "PYTHONUNBUFFERED": "1",
+        }
+        log = open(workdir / "server.log", "w")
+        procs.append(subprocess.Popen(
+            [sys.executable, "fake_openai.py", "--port", str(args.fake_port),
+             "--dimensions", str(args.dimensions), "--seed", str(args.seed), *shlex.split(args.fake_args)],
+            cwd=WEBAPP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+        procs.append(subprocess.Popen(
+            [sys.executable, "serve.py"],
+            cwd=WEBAPP_DIR, stdout=log, stderr=subprocess.STDOUT,
+            env={**env, "HOST": "127.0.0.1", "PORT": str(args.app_port), "WEB_WORKERS": str(args.workers)},
+        ))
+        await wait_ready(f"{fake_url}/stats")
+        await wait_ready(f"{app_url}/health")
+        print(f"🧪 self-host: app={app_url}, fake openai={fake_url}")
+        yield app_url, fake_url
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if log is not None:
+            log.close()
+        if args.keep:
+            print(f"🧪 self-host 작업 디렉터리 유지: {workdir} (로그={workdir / 'server.log'})")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# 부하 생성
+# ---------------------------------------------------------------------------
+def parse_mix(spec: str) -> dict[str, float]:
+    """"ask=2,chat=1,chat_stream=1" → 가중치"""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("ask", "ask_stream", "chat", "chat_stream"):
+            raise ValueError(f"unknown endpoint in mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_request(kind: str, question: str, rng: random.Random) -> tuple[str, dict]:
+    if kind.startswith("ask"):
+        return "/ask", {"question": question, "stream": kind == "ask_stream"}
+    # 대화형 요청은 절반 확률로 이전 턴 1개를 포함
+    messages = []
+    if rng.random() < 0.5:
+        messages += [
+            {"role": "user", "content": rng.choice(QUESTIONS)},
+            {"role": "assistant", "content": "이전 답변입니다 [bench_0.pdf]."},
+        ]
+    messages.append({"role": "user", "content": question})
+    return ("/chat/stream" if kind == "chat_stream" else "/chat"), {"messages": messages}
+
+
+async def send(session: aiohttp.ClientSession, base_url: str, kind: str, question: str,
+               rng: random.Random) -> dict:
+    path, payload = make_request(kind, question, rng)
+    started = time.perf_counter()
+    result = {"endpoint": kind, "status": 0, "latency": 0.0, "ttft": None, "stages": {}, "cached": False}
+    try:
+        async with session.post(base_url + path, json=payload) as response:
+            result["status"] = response.status
+            result["stages"] = parse_server_timing(response.headers.get("Server-Timing", ""))
+            if response.content_type == "text/event-stream":
+                event = None
+                async for line in response.content:
+                    line = line.decode("utf-8").rstrip("\n")
+                    if line.startswith("event: "):
+                        event = line[7:]
+                        if event == "delta" and result["ttft"] is None:
+                            result["ttft"] = time.perf_counter() - started
+                    elif line.startswith("data: ") and event == "done":
+                        result["cached"] = bool(json.loads(line[6:]).get("cached"))
+                    elif line.startswith("data: ") and event == "error":
+                        result["status"] = 599
+            else:
+                body = await response.json()
+                result["cached"] = bool(body.get("cached"))
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        result["error"] = str(e)
+    result["latency"] = time.perf_counter() - started
+    return result
+
+
+async def run_load(base_url: str, questions: list[str], mix: dict[str, float], concurrency: int,
+                   duration: float | None, requests: int | None, seed: int,
+                   timeout: float) -> tuple[list[dict], float]:
+    """closed loop — concurrency명의 가상 사용자가 응답을 받는 즉시 다음 요청"""
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    results: list[dict] = []
+    issued = 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def user():
+            nonlocal issued
+            while True:
+                if requests is not None and issued >= requests:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                issued += 1
+                kind = rng.choices(kinds, weights)[0]
+                results.append(await send(session, base_url, kind, rng.choice(questions), rng))
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+
+# ---------------------------------------------------------------------------
+# 리포트
+# ---------------------------------------------------------------------------
+def _summary(values: list[float]) -> dict | None:
+    if not values:
+        return None
+    arr = np.asarray(values) * 1000
+    return {
+        "mean_ms": round(float(arr.mean()), 1),
+        **{f"p{p}_ms": round(float(np.percentile(arr, p)), 1) for p in PERCENTILES},
+        "max_ms": round(float(arr.max()), 1),
+    }
+
+
+def summarize(results: list[dict], elapsed: float) -> dict:
+    endpoints = {}
+    for kind in sorted({r["endpoint"] for r in results}):
+        rows = [r for r in results if r["endpoint"] == kind]
+        ok = [r for r in rows if 200 <= r["status"] < 300]
+        stage_names = sorted({name for r in ok for name in r["stages"]})
+        endpoints[kind] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "rps": round(len(ok) / elapsed, 2),
+            "cached": sum(r["cached"] for r in ok),
+            "latency": _summary([r["latency"] for r in ok]),
+            "ttft": _summary([r["ttft"] for r in ok if r["ttft"] is not None]),
+            "stages": {name: _summary([r["stages"][name] for r in ok if name in r["stages"]])
+                       for name in stage_names},
+        }
+    ok = [r for r in results if 200 <= r["status"] < 300]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "rps": round(len(ok) / elapsed, 2),
+        "latency": _summary([r["latency"] for r in ok]),
+        "endpoints": endpoints,
+    }
+
+
+def render_markdown(report: dict) -> str:
+    s = report["summary"]
+    cfg = report["config"]
+    lines = [
+        "# RAG 웹앱 벤치마크",
+        "",
+        f"- 대상: `{cfg['url']}` (동시 사용자 {cfg['concurrency']}, mix `{cfg['mix']}`)",
+        f"- 총 {s['requests']}건 / 오류 {s['errors']}건 / {s['elapsed_s']}초 — **{s['rps']} RPS**",
+        "",
+        "| 엔드포인트 | 요청 | 오류 | RPS | 캐시 | p50 | p95 | p99 | 첫 토큰 p50 | 첫 토큰 p95 |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for kind, e in s["endpoints"].items():
+        lat = e["latency"] or {}
+        ttft = e["ttft"] or {}
+        lines.append(
+            f"| {kind} | {e['requests']} | {e['errors']} | {e['rps']} | {e['cached']} | "
+            f"{lat.get('p50_ms', '-')} | {lat.get('p95_ms', '-')} | {lat.get('p99_ms', '-')} | "
+            f"{ttft.get('p50_ms', '-')} | {ttft.get('p95_ms', '-')} |"
+        )
+    lines += ["", "## 단계별 (Server-Timing, ms)", "",
+              "| 엔드포인트 | 단계 | 평균 | p50 | p95 | p99 |", "|---|---|---|---|---|---|"]
+    for kind, e in s["endpoints"].items():
+        for name, st in e["stages"].items():
+            lines.append(
+                f"| {kind} | {name} | {st['mean_ms']} | {st['p50_ms']} | {st['p95_ms']} | {st['p99_ms']} |"
+            )
+    if report.get("regressions"):
+        lines += ["", "## 회귀", ""] + [f"- {r}" for r in report["regressions"]]
+    return "\n".join(lines) + "\n"
+
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """엔드포인트별 p95 / 오류율이 기준선보다 tolerance 이상 나빠졌는지"""
+    regressions = []
+    for kind, e in summary["endpoints"].items():
+        base = baseline["summary"]["endpoints"].get(kind)
+        if not base or not base["latency"] or not e["latency"]:
+            continue
+        before, after = base["latency"]["p95_ms"], e["latency"]["p95_ms"]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{kind} p95 {before}ms → {after}ms (+{(after / before - 1) * 100:.0f}%)")
+        if e["errors"] / max(e["requests"], 1) > base["errors"] / max(base["requests"], 1) + 0.01:
+            regressions.append(f"{kind} 오류 {base['errors']}/{base['requests']} → {e['errors']}/{e['requests']}")
+    return regressions
+
+
+async def fetch_stats(url: str | None) -> dict | None:
+    if not url:
+        return None
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                return await response.json()
+    except (aiohttp.ClientError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="RAG 웹앱 부하 테스트 / 지연 시간 벤치마크")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="실행 중인 웹앱 주소 (예: http://localhost:8000)")
+    target.add_argument("--self-host", action="store_true",
+                        help="가짜 OpenAI + 합성 로컬 인덱스 + serve.py(운영 모드) 앱을 직접 띄워 측정")
+    parser.add_argument("--concurrency", "-c", type=int, default=16, help="동시 가상 사용자 수")
+    parser.add_argument("--duration", "-d", type=float, default=None, help="측정 시간(초)")
+    parser.add_argument("--requests", "-n", type=int, default=None, help="총 요청 수 (duration 대신)")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--mix", default="ask=1,chat=1,chat_stream=1",
+                        help="엔드포인트 가중치 — ask, ask_stream, chat, chat_stream")
+    parser.add_argument("--questions", help="질문 파일 (한 줄에 하나, 기본: 영어/한국어 내장 질문)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="요청 1건 제한 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="JSON 리포트 경로")
+    parser.add_argument("--markdown", help="Markdown 리포트 경로 (미지정 시 표준 출력)")
+    parser.add_argument("--baseline", help="비교할 이전 JSON 리포트 — p95 회귀 시 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 p95 증가율 (기본 20%%)")
+    self_host_args = parser.add_argument_group("--self-host")
+    self_host_args.add_argument("--app-port", type=int, default=8000)
+    self_host_args.add_argument("--fake-port", type=int, default=8100)
+    self_host_args.add_argument("--workers", type=int, default=1, help="앱 워커 수 (serve.py WEB_WORKERS)")
+    self_host_args.add_argument("--documents", type=int, default=2000, help="합성 인덱스 문서 수")
+    self_host_args.add_argument("--dimensions", type=int, default=1536)
+    self_host_args.add_argument("--fake-args", default="",
+                                help='fake_openai.py에 넘길 옵션 (예: "--chat-latency lognormal:0.6,0.4 --error-rate 0.02")')
+    self_host_args.add_argument("--keep", action="store_true",
+                                help="종료 후 합성 인덱스·서버 로그 임시 디렉터리를 삭제하지 않음")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+    return args
+
+
+async def main_async(args) -> int:
+    questions = QUESTIONS
+    if args.questions:
+        questions = [q.strip() for q in Path(args.questions).read_text(encoding="utf-8").splitlines() if q.strip()]
+    mix = parse_mix(args.mix)
+
+    async def measure(base_url: str, fake_url: str | None) -> dict:
+        if args.warmup:
+            await run_load(base_url, questions, mix, min(args.concurrency, args.warmup), None,
+                           args.warmup, args.seed + 1, args.timeout)
+        print(f"🚀 부하 시작 — 동시 {args.concurrency}, "
+              + (f"{args.requests}건" if args.requests else f"{args.duration}초"))
+        results, elapsed = await run_load(base_url, questions, mix, args.concurrency, args.duration,
+                                          args.requests, args.seed, args.timeout)
+        return {
+            "config": {
+                "url": base_url, "concurrency": args.concurrency, "mix": args.mix,
+                "duration": args.duration, "requests": args.requests, "seed": args.seed,
+                "self_host": args.self_host, "fake_args": args.fake_args if args.self_host else None,
+            },
+            "summary": summarize(results, elapsed),
+            "app_stats": await fetch_stats(f"{base_url}/stats"),
+            "upstream_stats": await fetch_stats(f"{fake_url}/stats" if fake_url else None),
+        }
+
+    if args.self_host:
+        async with self_host(args) as (app_url, fake_url):
+            report = await measure(app_url, fake_url)
+    else:
+        report = await measure(args.url.rstrip("/"), None)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["regressions"] = compare(report["summary"], baseline, args.tolerance)
+
+    markdown = render_markdown(report)
+    if args.markdown:
+        Path(args.markdown).write_text(markdown, encoding="utf-8")
+    else:
+        print(markdown)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 1 if report.get("regressions") else 0
+
+
+def main():
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
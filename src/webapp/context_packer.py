@@ -0,0 +1,152 @@
+"""
+토큰 예산 기반 프롬프트 구성 (/chat, /ask)
+- 소스: 같은 문서의 청크 겹침(이전 청크 끝 = 다음 청크 앞)은 이어 붙이고, 포함 관계 청크는 제거한 뒤
+  점수 순으로 예산 안에서 채움 (마지막 소스는 예산에 맞춰 자름)
+- 히스토리: 최근 턴부터 히스토리 예산 안에서 유지, 밀려난 턴은 이전 사용자 질문 목록으로 요약
+- 토크나이저: tiktoken(gpt-4o = o200k_base) 우선, 인코딩을 받을 수 없는 환경(폐쇄망)에서는 문자 기반 추정 (tokens.py)
+"""
+from dataclasses import dataclass
+
+from tokens import Tokenizer
+
+DEFAULT_ENCODING = "o200k_base"
+# 메시지마다 역할/구분자 오버헤드
+MESSAGE_OVERHEAD = 4
+# 겹침을 찾을 때 비교하는 다음 청크 앞부분 길이 / 이전 청크 끝에서 찾는 범위 (문자)
+OVERLAP_PROBE = 40
+OVERLAP_WINDOW = 2000
+# 남은 예산이 이보다 작으면 소스·히스토리 요약을 잘라 넣지 않음
+MIN_SOURCE_TOKENS = 50
+
+
+@dataclass
+class PackResult:
+    messages: list[dict]
+    sources: list[dict]         # 프롬프트에 실제로 들어간 소스 (병합/잘림 반영)
+    prompt_tokens: int
+    history_dropped: int        # 요약으로 대체된 메시지 수
+    sources_dropped: int        # 병합 또는 예산 초과로 빠진 소스 수
+
+
+def _stitch(head: str, tail: str) -> str | None:
+    """head 끝과 tail 앞이 겹치면 이어 붙인 문자열, tail이 head에 포함되면 head, 아니면 None"""
+    if tail in head:
+        return head
+    probe = tail[:OVERLAP_PROBE]
+    if len(probe) < OVERLAP_PROBE:
+        return None
+    start = max(0, len(head) - OVERLAP_WINDOW)
+    pos = head.find(probe, start)
+    while pos != -1:
+        if tail.startswith(head[pos:]):
+            return head[:pos] + tail
+        pos = head.find(probe, pos + 1)
+    return None
+
+
+def merge_overlapping(sources: list[dict]) -> list[dict]:
+    """같은 source의 청크 중 겹치는 것을 하나로 합침 — 점수는 큰 쪽, 순서는 점수 순 유지"""
+    merged: list[dict] = []
+    for doc in sources:
+        for i, kept in enumerate(merged):
+            if kept["source"] != doc["source"]:
+                continue
+            content = _stitch(kept["content"], doc["content"]) or _stitch(doc["content"], kept["content"])
+            if content is not None:
+                merged[i] = {**kept, "content": content, "score": max(kept["score"], doc["score"])}
+                break
+        else:
+            merged.append(doc)
+    return merged
+
+
+class ContextPacker:
+    """시스템 프롬프트 + 히스토리 + 소스 + 질문을 max_tokens 이내로 구성
+
+    질문과 시스템 프롬프트는 항상 포함하고, 히스토리는 history_tokens까지, 소스는 남은 예산을 사용
+    """
+
+    def __init__(self, tokenizer: Tokenizer | None = None, max_tokens: int = 6000, history_tokens: int = 1500):
+        self.tokenizer = tokenizer or Tokenizer(DEFAULT_ENCODING)
+        self.max_tokens = max_tokens
+        self.history_tokens = history_tokens
+
+    def _message_tokens(self, content: str) -> int:
+        return self.tokenizer.count(content) + MESSAGE_OVERHEAD
+
+    def _pack_history(self, history: list[dict], budget: int) -> tuple[list[dict], int]:
+        """최근 메시지부터 budget 안에서 유지 → (메시지, 밀려난 수). 밀려난 턴은 사용자 질문 요약 1개로 대체"""
+        kept: list[dict] = []
+        used = 0
+        for m in reversed(history):
+            tokens = self._message_tokens(m["content"])
+            if used + tokens > budget:
+                break
+            kept.append({"role": m["role"], "content": m["content"]})
+            used += tokens
+        kept.reverse()
+        # 첫 메시지가 assistant면 질문 없는 답변만 남으므로 함께 밀어냄
+        while kept and kept[0]["role"] == "assistant":
+            used -= self._message_tokens(kept.pop(0)["content"])
+        dropped = history[:len(history) - len(kept)]
+
+        remaining = budget - used - MESSAGE_OVERHEAD
+        if remaining >= MIN_SOURCE_TOKENS:
+            summary = self._summarize(dropped, remaining)
+            if summary:
+                kept.insert(0, {"role": "system", "content": summary})
+        return kept, len(dropped)
+
+    def _summarize(self, dropped: list[dict], budget: int) -> str | None:
+        """밀려난 턴 요약 — 사용자 질문을 최근 것부터 budget 안에서 모아 시간순으로 나열"""
+        prefix = "Earlier in this conversation the user asked: "
+        budget -= self.tokenizer.count(prefix)
+        questions = []
+        for m in reversed(dropped):
+            if m["role"] != "user":
+                continue
+            question = self.tokenizer.truncate(" ".join(m["content"].split()), max(budget, 0) // 2)
+            tokens = self.tokenizer.count(question) + 1
+            if tokens > budget:
+                break
+            questions.append(question)
+            budget -= tokens
+        return prefix + " | ".join(reversed(questions)) if questions else None
+
+    def _pack_sources(self, sources: list[dict], budget: int) -> list[dict]:
+        packed = []
+        for doc in sorted(merge_overlapping(sources), key=lambda d: -d["score"]):
+            line = f"{doc['source']}: {doc['content']}"
+            # 소스 사이 구분자("\n\n")
+            tokens = self.tokenizer.count(line) + 1
+            if tokens <= budget:
+                packed.append(doc)
+                budget -= tokens
+                continue
+            if budget >= MIN_SOURCE_TOKENS:
+                prefix = self.tokenizer.count(f"{doc['source']}: ") + 1
+                packed.append({**doc, "content": self.tokenizer.truncate(doc["content"], budget - prefix)})
+            break
+        return packed
+
+    def pack(self, system_prompt: str, history: list[dict], question: str,
+             sources: list[dict]) -> PackResult:
+        fixed = self._message_tokens(system_prompt) + self._message_tokens(f"Sources:\n\n\nQuestion: {question}")
+        history_messages, history_dropped = self._pack_history(
+            history, min(self.history_tokens, max(self.max_tokens - fixed, 0))
+        )
+        used = fixed + sum(self._message_tokens(m["content"]) for m in history_messages)
+        packed = self._pack_sources(sources, max(self.max_tokens - used, 0))
+        context = "\n\n".join(f"{s['source']}: {s['content']}" for s in packed)
+
+        messages = [{"role": "system", "content": system_prompt}, *history_messages, {
+            "role": "user",
+            "content": f"Sources:\n{context}\n\nQuestion: {question}",
+        }]
+        return PackResult(
+            messages=messages,
+            sources=packed,
+            prompt_tokens=sum(self._message_tokens(m["content"]) for m in messages),
+            history_dropped=history_dropped,
+            sources_dropped=len(sources) - len(packed),
+        )
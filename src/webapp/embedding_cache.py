@@ -0,0 +1,88 @@
+"""
+쿼리 임베딩 LRU 캐시 (TTL)
+- 키: (임베딩 배포 이름, 정규화된 쿼리 텍스트)
+- compact=True면 벡터를 array('f') float32로 저장 (Python float 리스트 대비 약 1/8 메모리)
+"""
+import re
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """NFKC 정규화 + 공백 축약 + 대소문자 무시 ("PerksPlus  limit?" == "perksplus limit?")"""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+class EmbeddingCache:
+    """크기 제한 + TTL이 있는 프로세스 내 임베딩 캐시"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, compact: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.compact = compact
+        self._entries: OrderedDict[tuple[str, str], tuple[float, array | list[float]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, deployment: str, text: str) -> list[float] | None:
+        if not self.enabled:
+            return None
+        key = (deployment, normalize_query(text))
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, vector = entry
+        if self.ttl and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector.tolist() if self.compact else vector
+
+    def put(self, deployment: str, text: str, vector: list[float]) -> None:
+        if not self.enabled:
+            return
+        key = (deployment, normalize_query(text))
+        stored = array("f", vector) if self.compact else list(vector)
+        self._entries[key] = (time.monotonic(), stored)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        # list[float]는 요소당 포인터 8B + float 객체 24B
+        vector_bytes = sum(
+            (v.itemsize * len(v)) if isinstance(v, array) else 32 * len(v)
+            for _, v in self._entries.values()
+        )
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "vector_bytes": vector_bytes,
+        }
@@ -0,0 +1,261 @@
+"""
+가짜 Azure OpenAI 서버 — 부하 테스트/벤치마크용 로컬 대역
+- embeddings / chat.completions (stream 포함) 를 Azure OpenAI REST 형식 그대로 응답
+- 응답 지연 분포(const / uniform / normal / lognormal), 스트리밍 토큰 속도, 429 주입 설정 가능
+- 같은 입력이면 같은 임베딩(텍스트 해시 시드) — 캐시 적중/검색 결과가 실행마다 동일
+- 채팅 답변은 프롬프트의 첫 소스를 [source]로 인용하고 <<후속 질문>> 3개를 붙임
+
+실행:
+    python fake_openai.py --port 8100 --chat-latency lognormal:0.6,0.4 --tokens-per-second 60
+    AZURE_OPENAI_ENDPOINT=http://localhost:8100 AZURE_OPENAI_API_KEY=fake python app.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import numpy as np
+from aiohttp import web
+
+_SOURCE_RE = re.compile(r"^([^\s:]+\.\w+): ", re.MULTILINE)
+
+
+class Latency:
+    """지연 분포 — "const:0.05", "uniform:0.02,0.2", "normal:0.1,0.02", "lognormal:0.1,0.5"(중앙값, sigma)"""
+
+    def __init__(self, spec: str = "const:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        if kind not in ("const", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "const":
+            return p[0] if p else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(p[0], p[1]))
+        return rng.lognormvariate(math.log(p[0]), p[1])
+
+
+@dataclass
+class FakeConfig:
+    embed_latency: Latency = field(default_factory=lambda: Latency("lognormal:0.05,0.3"))
+    chat_latency: Latency = field(default_factory=lambda: Latency("lognormal:0.5,0.4"))   # 첫 토큰까지
+    tokens_per_second: float = 50.0          # 스트리밍/비스트리밍 생성 속도
+    answer_tokens: int = 120                 # 답변 길이(토큰, 대략)
+    dimensions: int = 1536
+    error_rate: float = 0.0                  # 429 응답 비율
+    retry_after: float = 1.0                 # 429 Retry-After(초)
+    seed: int | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def fake_embedding(text: str, dimensions: int) -> list[float]:
+    """텍스트 해시를 시드로 한 단위 벡터 (같은 텍스트 → 같은 벡터)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    v /= np.linalg.norm(v)
+    return v.tolist()
+
+
+def fake_answer(messages: list[dict], answer_tokens: int) -> str:
+    """마지막 user 메시지의 소스 중 첫 번째를 인용하는 답변 + 후속 질문"""
+    prompt = messages[-1].get("content", "") if messages else ""
+    sources = _SOURCE_RE.findall(prompt)
+    cite = f" [{sources[0]}]" if sources else ""
+    words = ["The", "documents", "describe", "this", "policy", "in", "detail", "and", "list", "the", "conditions."]
+    body = " ".join(words[i % len(words)] for i in range(max(answer_tokens - 30, 1)))
+    return (
+        f"{body}{cite}\n\n"
+        "<<What are the eligibility rules?>>\n"
+        "<<How do I apply?>>\n"
+        "<<Is there a spending limit?>>"
+    )
+
+
+def _pieces(text: str) -> list[str]:
+    """스트리밍용 토큰 조각 — 공백 단위 (대략 1토큰)"""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeOpenAI:
+    """aiohttp 앱 + 호출 카운터 (/stats)"""
+
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.rng = random.Random(self.config.seed)
+        self.counters = {"embeddings": 0, "embedding_inputs": 0, "chat": 0, "chat_stream": 0,
+                         "throttled": 0, "in_flight": 0, "max_in_flight": 0}
+        self.app = web.Application()
+        self.app.router.add_post("/openai/deployments/{deployment}/embeddings", self.embeddings)
+        self.app.router.add_post("/openai/deployments/{deployment}/chat/completions", self.chat)
+        self.app.router.add_get("/stats", self.stats)
+
+    def _throttle(self) -> web.Response | None:
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.counters["throttled"] += 1
+            retry = self.config.retry_after
+            return web.json_response(
+                {"error": {"code": "429", "message": "Requests to the deployment have exceeded the rate limit (fake)."}},
+                status=429,
+                headers={"Retry-After": str(max(1, round(retry))), "retry-after-ms": str(int(retry * 1000))},
+            )
+        return None
+
+    def _enter(self) -> None:
+        self.counters["in_flight"] += 1
+        self.counters["max_in_flight"] = max(self.counters["max_in_flight"], self.counters["in_flight"])
+
+    async def embeddings(self, request: web.Request) -> web.StreamResponse:
+        if (throttled := self._throttle()) is not None:
+            return throttled
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions") or self.config.dimensions
+        self._enter()
+        try:
+            await asyncio.sleep(self.config.embed_latency.sample(self.rng))
+        finally:
+            self.counters["in_flight"] -= 1
+        self.counters["embeddings"] += 1
+        self.counters["embedding_inputs"] += len(inputs)
+        tokens = sum(estimate_tokens(t) for t in inputs)
+        return web.json_response({
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(t, dimensions)}
+                for i, t in enumerate(inputs)
+            ],
+            "model": request.match_info["deployment"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        if (throttled := self._throttle()) is not None:
+            return throttled
+        body = await request.json()
+        messages = body.get("messages", [])
+        max_tokens = body.get("max_tokens") or self.config.answer_tokens
+        answer = fake_answer(messages, min(self.config.answer_tokens, max_tokens))
+        pieces = _pieces(answer)
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                 "total_tokens": prompt_tokens + len(pieces)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.match_info["deployment"]
+        interval = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+        self._enter()
+        try:
+            await asyncio.sleep(self.config.chat_latency.sample(self.rng))
+            if not body.get("stream"):
+                self.counters["chat"] += 1
+                await asyncio.sleep(interval * len(pieces))
+                return web.json_response({
+                    "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}],
+                    "usage": usage,
+                })
+
+            self.counters["chat_stream"] += 1
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+
+            async def send(delta: dict, finish_reason=None, extra=None):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    **(extra or {}),
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+            # Azure는 첫 청크로 choices 없는 콘텐츠 필터 결과를 보냄
+            await response.write(b'data: {"id":"","object":"","created":0,"model":"","choices":[],'
+                                 b'"prompt_filter_results":[]}\n\n')
+            await send({"role": "assistant", "content": ""})
+            for piece in pieces:
+                await send({"content": piece})
+                await asyncio.sleep(interval)
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            await send({}, "stop")
+            if include_usage:
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [], "usage": usage}
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        finally:
+            self.counters["in_flight"] -= 1
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.counters)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8100) -> web.AppRunner:
+        """현재 이벤트 루프에서 서버 시작 (벤치마크에서 인프로세스로 띄울 때)"""
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeConfig()
+    parser.add_argument("--embed-latency", default=defaults.embed_latency.spec,
+                        help="임베딩 응답 지연 분포 (초) — const:x | uniform:a,b | normal:m,sd | lognormal:median,sigma")
+    parser.add_argument("--chat-latency", default=defaults.chat_latency.spec,
+                        help="채팅 첫 토큰까지 지연 분포 (초)")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second,
+                        help="답변 생성 속도 (0이면 즉시)")
+    parser.add_argument("--answer-tokens", type=int, default=defaults.answer_tokens)
+    parser.add_argument("--dimensions", type=int, default=defaults.dimensions)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="429 응답 비율 (0~1)")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after,
+                        help="429 응답의 Retry-After (초)")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args) -> FakeConfig:
+    return FakeConfig(
+        embed_latency=Latency(args.embed_latency),
+        chat_latency=Latency(args.chat_latency),
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+        dimensions=args.dimensions,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 Azure OpenAI 서버 (부하 테스트용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+    fake = FakeOpenAI(config_from_args(args))
+    print(f"🧪 Fake Azure OpenAI — http://{args.host}:{args.port}")
+    web.run_app(fake.app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+로컬 인프로세스 검색 엔진 — AI Search 없이 RAG를 실행/벤치마크하기 위한 대체 구현
+- 스키마는 인덱스와 동일: id, content, source, chunk_id, content_vector (JSONL 1줄 = 문서 1개)
+- 벡터: NumPy 전수 탐색(정확) 또는 HNSW 근사 그래프 (ann=True)
+- 텍스트: content에 대한 BM25 (k1=1.2, b=0.75 — AI Search 기본값), 한글은 음절 bigram 토큰
+- 하이브리드: 두 결과를 RRF(k=60)로 결합 — AI Search 하이브리드 쿼리와 같은 방식 (시맨틱 재순위는 없음)
+"""
+import heapq
+import json
+import math
+import random
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+RRF_K = 60
+# 하이브리드에서 각 하위 쿼리가 융합에 넘기는 후보 수 (AI Search 텍스트 쿼리 기본 50)
+HYBRID_CANDIDATES = 50
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """영숫자는 단어, 한글은 음절 bigram (형태소 분석기 없이 조사/어미 변화에 견딤)"""
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 인덱스 (내림차순) — 전체 정렬 대신 argpartition"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def rrf(rankings: list[list[int]], k: int = RRF_K) -> list[tuple[int, float]]:
+    """Reciprocal Rank Fusion — 순위 목록들을 1/(k + rank) 합으로 결합"""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc] = scores.get(doc, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class BM25:
+    """content 역색인 + BM25 점수 (질의어별 posting 배열에 벡터 연산으로 누적)"""
+
+    def __init__(self, texts: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n = len(texts)
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        lengths = np.zeros(self.n, dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(i)
+                tfs.append(tf)
+        self._norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()) if self.n else 1.0, 1.0))
+        self._postings = {
+            term: (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        scores = np.zeros(self.n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            idf = math.log(1 + (self.n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[ids])
+        top = _top_k(scores, k)
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+class HNSW:
+    """HNSW(계층형 근접 그래프) 근사 최근접 탐색 — 정규화 벡터의 코사인 거리 사용
+
+    계층 l의 이웃 목록은 노드당 최대 m개(0층은 2m), 탐색 폭은 ef_construction / ef_search.
+    """
+
+    def __init__(self, vectors: np.ndarray, m: int = 16, ef_construction: int = 100,
+                 seed: int = 42):
+        self.vectors = vectors
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self._ml = 1 / math.log(m)
+        self._rng = random.Random(seed)
+        self._layers: list[dict[int, list[int]]] = []
+        self._entry: int | None = None
+        for i in range(len(vectors)):
+            self._insert(i)
+
+    def _distances(self, q: np.ndarray, ids: list[int]) -> np.ndarray:
+        return 1.0 - self.vectors[ids] @ q
+
+    def _search_layer(self, q: np.ndarray, entry: list[int], ef: int, layer: int) -> list[tuple[float, int]]:
+        graph = self._layers[layer]
+        visited = set(entry)
+        dists = self._distances(q, entry)
+        candidates = [(float(d), e) for d, e in zip(dists, entry)]
+        heapq.heapify(candidates)
+        results = [(-d, e) for d, e in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        while candidates:
+            d, node = heapq.heappop(candidates)
+            if d > -results[0][0]:
+                break
+            neighbors = [n for n in graph.get(node, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for dn, n in zip(self._distances(q, neighbors).tolist(), neighbors):
+                if len(results) < ef or dn < -results[0][0]:
+                    heapq.heappush(candidates, (dn, n))
+                    heapq.heappush(results, (-dn, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-d, n) for d, n in results)
+
+    def _select(self, candidates: list[tuple[float, int]], m: int) -> list[int]:
+        """이웃 선택 휴리스틱 — 이미 고른 이웃보다 질의에 더 가까운 후보만 (다양한 방향 유지)"""
+        selected: list[int] = []
+        for d, c in candidates:
+            if len(selected) >= m:
+                break
+            if not selected or (1.0 - self.vectors[selected] @ self.vectors[c]).min() > d:
+                selected.append(c)
+        if len(selected) < m:
+            chosen = set(selected)
+            selected += [c for _, c in candidates if c not in chosen][:m - len(selected)]
+        return selected
+
+    def _insert(self, i: int) -> None:
+        q = self.vectors[i]
+        level = int(-math.log(1.0 - self._rng.random()) * self._ml)
+        if self._entry is None:
+            self._layers = [{i: []} for _ in range(level + 1)]
+            self._entry = i
+            return
+
+        entry = [self._entry]
+        top = len(self._layers) - 1
+        for layer in range(top, level, -1):
+            entry = [self._search_layer(q, entry, 1, layer)[0][1]]
+        for layer in range(min(level, top), -1, -1):
+            candidates = self._search_layer(q, entry, self.ef_construction, layer)
+            max_links = self.m0 if layer == 0 else self.m
+            neighbors = self._select(candidates, self.m)
+            graph = self._layers[layer]
+            graph[i] = neighbors
+            for n in neighbors:
+                links = graph[n]
+                links.append(i)
+                if len(links) > max_links:
+                    # 가장 먼 연결부터 제거
+                    order = np.argsort(self._distances(self.vectors[n], links))[:max_links]
+                    graph[n] = [links[j] for j in order]
+            entry = [c for _, c in candidates]
+        for _ in range(top + 1, level + 1):
+            self._layers.append({i: []})
+        if level > top:
+            self._entry = i
+
+    def search(self, q: np.ndarray, k: int, ef: int = 64) -> list[tuple[int, float]]:
+        if self._entry is None:
+            return []
+        entry = [self._entry]
+        for layer in range(len(self._layers) - 1, 0, -1):
+            entry = [self._search_layer(q, entry, 1, layer)[0][1]]
+        found = self._search_layer(q, entry, max(ef, k), 0)[:k]
+        return [(n, 1.0 - d) for d, n in found]
+
+
+class LocalIndex:
+    """문서 + 벡터 행렬 + BM25 (+ 선택적 HNSW)"""
+
+    def __init__(self, docs: list[dict], ann: bool = False, m: int = 16,
+                 ef_construction: int = 100, ef_search: int = 64):
+        vectors = [d.pop("content_vector", None) for d in docs]
+        self.docs = docs
+        self.dim = next((len(v) for v in vectors if v is not None and len(v)), 0)
+        matrix = np.zeros((len(docs), self.dim), dtype=np.float32)
+        for i, v in enumerate(vectors):
+            if v is not None and len(v):
+                matrix[i] = v
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.vectors = matrix / np.where(norms == 0, 1, norms)
+        self.bm25 = BM25([d.get("content", "") for d in docs])
+        self.ef_search = ef_search
+        self.hnsw = HNSW(self.vectors, m, ef_construction) if ann and len(docs) else None
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "LocalIndex":
+        with open(path, encoding="utf-8") as f:
+            docs = [json.loads(line) for line in f if line.strip()]
+        return cls(docs, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def vector_search(self, query_vector: list[float], k: int) -> list[tuple[int, float]]:
+        if not self.dim:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        if self.hnsw is not None:
+            return self.hnsw.search(q, k, self.ef_search)
+        scores = self.vectors @ q
+        return [(int(i), float(scores[i])) for i in _top_k(scores, k)]
+
+    def text_search(self, query: str, k: int) -> list[tuple[int, float]]:
+        return self.bm25.search(query, k)
+
+    def search(self, query: str | None, query_vector: list[float] | None, top_k: int = 5) -> list[dict]:
+        """하이브리드(텍스트 + 벡터, RRF) — 한쪽만 주면 해당 점수 그대로"""
+        rankings = []
+        if query:
+            rankings.append(self.text_search(query, max(HYBRID_CANDIDATES, top_k)))
+        if query_vector is not None:
+            rankings.append(self.vector_search(query_vector, max(top_k, 1)))
+        if len(rankings) == 2:
+            fused = rrf([[i for i, _ in r] for r in rankings])[:top_k]
+        else:
+            fused = rankings[0][:top_k] if rankings else []
+        return [{**self.docs[i], "score": score} for i, score in fused]
@@ -0,0 +1,180 @@
+"""
+Azure OpenAI 배포별 호출 한도 — TPM/RPM 토큰 버킷 + 제한된 대기열 + Retry-After 재시도
+- 요청 전에 (예상 토큰, 요청 1건)을 버킷에서 예약하고, 부족하면 채워질 때까지 대기
+  (Azure와 같은 방식으로 예상 토큰 = 프롬프트 추정치 + max_tokens)
+- 대기열이 가득 차면 503, 예상 대기 시간이 max_wait를 넘으면 429로 즉시 거절 (Retry-After 포함)
+- 업스트림 429는 Retry-After(-ms)만큼 배포 전체를 멈춘 뒤 재시도 — 다른 요청도 같이 기다림
+- 한도는 워커 프로세스마다 적용되므로 배포 한도를 워커 수로 나눈 값을 사용
+- parent가 있는 한도(일괄 질문용)는 자기 버킷을 통과한 뒤 parent 버킷에서도 예약 — parent 대기열은 차지하지 않고
+  자기 몫 이상은 쓰지 못하며, parent(대화형)는 하위 한도가 쉬는 동안 배포 한도 전체를 사용
+"""
+import asyncio
+import logging
+import random
+import time
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from telemetry import LIMITER_REJECTED, LIMITER_WAIT_SECONDS
+from tokens import estimate_tokens, retry_after
+
+logger = logging.getLogger("webapp.rate_limit")
+
+# 버킷 용량 = 이 시간(초) 동안 채워지는 양 — Azure는 분당 한도를 1~10초 구간으로 나눠 적용
+BURST_SECONDS = 10.0
+
+
+def estimate_prompt_tokens(messages: list[dict]) -> int:
+    # 메시지마다 역할/구분자 오버헤드 약 4토큰
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+class RateLimited(Exception):
+    """한도 초과로 요청을 거절 — 라우트 오류 핸들러가 status + Retry-After 응답으로 변환"""
+
+    def __init__(self, deployment: str, status: int, retry_after: float, reason: str):
+        super().__init__(f"{deployment}: {reason} (retry after {retry_after:.1f}s)")
+        self.deployment = deployment
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class TokenBucket:
+    """분당 per_minute만큼 연속으로 채워지는 버킷 (0이면 무제한)
+
+    잔량이 0 이상이면 바로 통과하고 잔량을 음수(빚)까지 차감 — 용량보다 큰 요청도 굶지 않음
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60
+        self.capacity = self.rate * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """amount를 예약하고 통과까지 기다려야 할 시간(초) 반환"""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        wait = max(0.0, -self.tokens) / self.rate
+        self.tokens -= amount
+        return wait
+
+    def refund(self, amount: float) -> None:
+        if self.enabled:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class DeploymentLimiter:
+    """배포 1개의 TPM/RPM 예산, 대기열, 429 재시도"""
+
+    def __init__(self, deployment: str, tpm: float = 0, rpm: float = 0,
+                 max_queue: int = 100, max_wait: float = 10.0, max_retries: int = 3,
+                 parent: "DeploymentLimiter | None" = None):
+        self.deployment = deployment
+        self.parent = parent
+        self.token_bucket = TokenBucket(tpm)
+        self.request_bucket = TokenBucket(rpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.retries = 0
+
+    def _reject(self, status: int, retry_after: float, reason: str) -> RateLimited:
+        self.rejected += 1
+        LIMITER_REJECTED.labels(self.deployment, reason).inc()
+        return RateLimited(self.deployment, status, retry_after, reason)
+
+    def _reserve(self, tokens: int, now: float) -> float:
+        """버킷에서 예약 → 통과까지 기다려야 할 시간(초)"""
+        return max(
+            self.token_bucket.reserve(tokens, now),
+            self.request_bucket.reserve(1, now),
+            self.paused_until - now,
+        )
+
+    def _refund(self, tokens: int) -> None:
+        self.token_bucket.refund(tokens)
+        self.request_bucket.refund(1)
+
+    async def _admit(self, limiter: "DeploymentLimiter", tokens: int) -> float:
+        """limiter 버킷에서 예약하고 통과까지 대기 — 대기/거절은 이 한도의 대기열로 집계"""
+        wait = limiter._reserve(tokens, time.monotonic())
+        if wait > self.max_wait:
+            # 통과하지 않을 요청의 예약은 돌려줌
+            limiter._refund(tokens)
+            raise self._reject(429, wait, "budget")
+        if wait > 0:
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+        return wait
+
+    async def acquire(self, tokens: int) -> float:
+        """예산이 생길 때까지 대기 (대기 시간 반환) — 대기열 초과 시 RateLimited"""
+        if self.waiting >= self.max_queue:
+            raise self._reject(503, self.max_wait, "queue_full")
+        wait = await self._admit(self, tokens)
+        if self.parent is not None:
+            # 자기 몫을 통과한 뒤에 parent 예산을 예약 — 대기 중인 요청이 parent(대화형) 예산을 미리 잡지 않음
+            try:
+                wait += await self._admit(self.parent, tokens)
+            except RateLimited:
+                self._refund(tokens)
+                raise
+        self.admitted += 1
+        LIMITER_WAIT_SECONDS.labels(self.deployment).observe(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """업스트림 429 — 이후 요청도 seconds 동안 대기열에서 기다리게 함 (같은 배포인 parent도 함께)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        if self.parent is not None:
+            self.parent.pause(seconds)
+
+    async def call(self, factory, tokens: int):
+        """예산 확보 후 factory() 호출, 429/일시 오류는 Retry-After·지수 백오프로 재시도
+
+        factory는 호출할 때마다 새 코루틴을 반환해야 함 (예: lambda: client.embeddings.create(...))
+        """
+        await self.acquire(tokens)
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await factory()
+            except RateLimitError as e:
+                delay = retry_after(e) or min(2 ** attempt, 30)
+                self.pause(delay)
+                if attempt == self.max_retries or delay > self.max_wait:
+                    raise self._reject(429, delay, "upstream") from e
+            except (APIConnectionError, InternalServerError):
+                if attempt == self.max_retries:
+                    raise
+                delay = min(2 ** attempt, 30) * (0.5 + random.random())
+            self.retries += 1
+            logger.warning("%s throttled or failed — retry %d in %.1fs", self.deployment, attempt + 1, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "tpm": round(self.token_bucket.rate * 60),
+            "rpm": round(self.request_bucket.rate * 60),
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retries": self.retries,
+        }
@@ -0,0 +1,116 @@
+"""
+검색 백엔드 — RETRIEVAL_BACKEND로 선택
+- azure: AI Search 벡터 + 시맨틱 하이브리드 (운영)
+- local: 로컬 인프로세스 인덱스 (local_index.py) — 오프라인 개발/벤치마크용, 시맨틱 재순위 없음
+
+두 백엔드 모두 search() 결과를 {id, source, chunk_id, content, score} dict 목록으로 돌려준다.
+로컬 인덱스/이전 인덱스 문서는 id가 없을 수 있으므로 중복 판정은 doc_key()로 한다.
+query / query_vector 중 하나만 주면 텍스트 전용 / 벡터 전용 검색 (임베딩과 겹쳐 실행할 때 사용)
+여러 쿼리(또는 텍스트·벡터 각각)의 결과는 fuse()로 RRF 결합한다.
+"""
+import asyncio
+import hashlib
+import os
+
+from azure.search.documents.models import VectorizedQuery
+
+from local_index import LocalIndex, rrf
+
+
+class AzureSearchRetriever:
+    """azure.search.documents.aio.SearchClient 래퍼"""
+
+    name = "azure"
+
+    def __init__(self, search_client, index_name: str):
+        self.client = search_client
+        self.index_name = index_name
+
+    async def search(self, query: str | None, query_vector: list[float] | None, top_k: int) -> list[dict]:
+        options = {}
+        if query_vector is not None:
+            options["vector_queries"] = [VectorizedQuery(
+                vector=query_vector, k_nearest_neighbors=top_k, fields="content_vector"
+            )]
+        # 시맨틱 재순위는 검색어가 있어야 적용 가능
+        if query:
+            options.update(query_type="semantic", semantic_configuration_name="semantic-config")
+        results = await self.client.search(search_text=query, top=top_k, **options)
+        docs = []
+        async for r in results:
+            docs.append({
+                "id": r.get("id"),
+                "source": r.get("source", "unknown"),
+                "chunk_id": r.get("chunk_id"),
+                "content": r["content"],
+                "score": r.get("@search.score", 0),
+            })
+        return docs
+
+    async def version(self) -> str:
+        count = await self.client.get_document_count()
+        return f"{self.index_name}:{count}"
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class LocalRetriever:
+    """JSONL 인덱스 파일을 메모리에 적재해 검색 (CPU 작업은 스레드에서 실행)"""
+
+    name = "local"
+
+    def __init__(self, index: LocalIndex, path: str):
+        self.index = index
+        self.path = path
+        # 적재 시점의 파일 수정 시각 — 재시작 전까지 메모리 인덱스는 그대로
+        self._version = f"{os.path.basename(path)}:{len(index)}:{int(os.path.getmtime(path))}"
+
+    @classmethod
+    async def open(cls, path: str, ann: bool = False, ef_search: int = 64) -> "LocalRetriever":
+        index = await asyncio.to_thread(LocalIndex.load, path, ann=ann, ef_search=ef_search)
+        return cls(index, path)
+
+    async def search(self, query: str | None, query_vector: list[float] | None, top_k: int) -> list[dict]:
+        results = await asyncio.to_thread(self.index.search, query, query_vector, top_k)
+        return [
+            {
+                "id": r.get("id"),
+                "source": r.get("source", "unknown"),
+                "chunk_id": r.get("chunk_id"),
+                "content": r.get("content", ""),
+                "score": r["score"],
+            }
+            for r in results
+        ]
+
+    async def version(self) -> str:
+        return self._version
+
+    async def close(self) -> None:
+        pass
+
+
+def doc_key(doc: dict) -> str:
+    """검색 결과 중복 판정 키 — id, 없으면 (source, chunk_id), 그것도 없으면 source + 본문 해시"""
+    if doc.get("id"):
+        return doc["id"]
+    if doc.get("chunk_id") is not None:
+        return f"{doc['source']}#{doc['chunk_id']}"
+    return f"{doc['source']}:{hashlib.sha1(doc['content'].encode('utf-8')).hexdigest()}"
+
+
+def fuse(result_lists: list[list[dict]], top_k: int) -> list[dict]:
+    """쿼리별 검색 결과를 Reciprocal Rank Fusion으로 결합 — doc_key 기준 중복 제거, score = RRF 점수"""
+    if len(result_lists) == 1:
+        return result_lists[0][:top_k]
+    docs: dict[str, dict] = {}
+    rankings = []
+    for results in result_lists:
+        ranking = []
+        for doc in results:
+            key = doc_key(doc)
+            docs.setdefault(key, doc)
+            ranking.append(key)
+        rankings.append(ranking)
+    return [{**docs[key], "score": score} for key, score in rrf(rankings)[:top_k]]
@@ -0,0 +1,73 @@
+"""
+운영 실행 — Hypercorn 멀티 워커 (start.sh 기본 경로)
+- 워커 수 기본값 = CPU 코어 수 (D4s_v3 → 4), 워커마다 startup()에서 클라이언트/커넥션 풀을 따로 생성
+- keep-alive, graceful shutdown(SIGTERM 시 진행 중 요청/스트림 완료 대기) 설정
+- uvloop이 설치되어 있으면 uvloop 워커 사용
+- 워커가 2개 이상이면 PROMETHEUS_MULTIPROC_DIR을 자동 지정해 /metrics를 워커 합산으로 노출
+
+개발 서버(자동 리로드, 단일 프로세스)는 `python app.py`
+"""
+import importlib.util
+import os
+import shutil
+import tempfile
+
+from hypercorn.config import Config
+from hypercorn.run import run
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "8000"))
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "0")) or os.cpu_count() or 1
+# 리버스 프록시/App Gateway의 유휴 시간(보통 60초)보다 길게 유지해야 끊긴 연결 재사용을 피함
+WEB_KEEPALIVE_TIMEOUT = float(os.environ.get("WEB_KEEPALIVE_TIMEOUT", "75"))
+# SIGTERM 후 진행 중 요청(SSE 스트림 포함)을 기다리는 최대 시간
+WEB_GRACEFUL_TIMEOUT = float(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+WEB_BACKLOG = int(os.environ.get("WEB_BACKLOG", "2048"))
+WEB_ACCESS_LOG = os.environ.get("WEB_ACCESS_LOG", "false").lower() == "true"
+
+
+def worker_class() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """멀티 워커 메트릭 파일 디렉터리 — 이전 실행의 파일이 남아 있으면 값이 섞이므로 비움"""
+    if workers < 2:
+        return
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(
+        tempfile.gettempdir(), f"webapp-metrics-{PORT}"
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    # 워커 프로세스가 prometheus_client를 import하기 전에 지정되어야 함
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+def build_config() -> Config:
+    config = Config()
+    config.application_path = "app:app"
+    config.bind = [f"{HOST}:{PORT}"]
+    config.workers = WEB_WORKERS
+    config.worker_class = worker_class()
+    config.keep_alive_timeout = WEB_KEEPALIVE_TIMEOUT
+    config.graceful_timeout = WEB_GRACEFUL_TIMEOUT
+    config.backlog = WEB_BACKLOG
+    config.accesslog = "-" if WEB_ACCESS_LOG else None
+    config.errorlog = "-"
+    return config
+
+
+def main() -> int:
+    config = build_config()
+    prepare_metrics_dir(config.workers)
+    # 워커별 호출 한도(app.py)를 나누는 데 사용
+    os.environ["WEB_WORKERS"] = str(config.workers)
+    print(
+        f"🚀 Hypercorn — http://{HOST}:{PORT} (workers={config.workers}, worker_class={config.worker_class}, "
+        f"keep-alive={WEB_KEEPALIVE_TIMEOUT:.0f}s, graceful={WEB_GRACEFUL_TIMEOUT:.0f}s)"
+    )
+    return run(config)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
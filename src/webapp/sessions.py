@@ -0,0 +1,135 @@
+"""
+서버 측 대화 세션 — 클라이언트는 session_id + 새 턴만 전송
+- 세션 값: {"messages": [...], "query": 직전 검색어(정규화), "sources": 직전 검색 결과}
+- memory: 워커 프로세스 내 LRU + TTL (단일 워커 / 개발용)
+- redis: Redis 호환 서버(Redis, Valkey, Garnet 등)에 JSON으로 저장, 만료는 서버 TTL — 멀티 워커/멀티 인스턴스용
+  (redis 패키지는 선택 의존성: pip install redis)
+- 세션당 메시지는 max_messages개까지만 보관 (프롬프트는 context_packer가 다시 예산에 맞춤)
+"""
+import json
+import secrets
+import time
+from collections import OrderedDict
+
+SESSION_ID_BYTES = 16
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+def trim_messages(messages: list[dict], max_messages: int) -> list[dict]:
+    """오래된 메시지부터 제거 — user 메시지로 시작하도록 맞춤"""
+    if len(messages) <= max_messages:
+        return messages
+    messages = messages[-max_messages:]
+    while messages and messages[0]["role"] != "user":
+        messages = messages[1:]
+    return messages
+
+
+class MemorySessionStore:
+    """크기 제한 + TTL(마지막 사용 기준)이 있는 프로세스 내 세션 저장소"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, max_messages: int = 40):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, session_id: str) -> dict | None:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, session = entry
+        if self.ttl and time.monotonic() - stored_at > self.ttl:
+            del self._entries[session_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return session
+
+    async def put(self, session_id: str, session: dict) -> None:
+        session["messages"] = trim_messages(session["messages"], self.max_messages)
+        self._entries[session_id] = (time.monotonic(), session)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RedisSessionStore:
+    """Redis 호환 서버 세션 저장소 — 값은 JSON 문자열, 저장할 때마다 TTL 연장"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float = 3600, max_messages: int = 40, prefix: str = "rag:session:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE=redis requires the redis package (pip install redis)") from e
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, session_id: str) -> dict | None:
+        value = await self.client.get(self.prefix + session_id)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def put(self, session_id: str, session: dict) -> None:
+        session["messages"] = trim_messages(session["messages"], self.max_messages)
+        await self.client.set(
+            self.prefix + session_id,
+            json.dumps(session, ensure_ascii=False),
+            ex=int(self.ttl) or None,
+        )
+
+    async def delete(self, session_id: str) -> None:
+        await self.client.delete(self.prefix + session_id)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
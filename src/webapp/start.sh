@@ -5,10 +5,18 @@
 # 사용법:
 #   ./start.sh                      # 기본 실행
 #   ./start.sh --resource-group rg-aif-classic-basic-swc-dev  # 자동 감지
+#   WEB_WORKERS=4 ./start.sh        # 워커 수 지정 (기본: CPU 코어 수)
+#   ./start.sh --dev                # 개발 서버 (단일 프로세스, 디버그)
 # ================================================================
 set -euo pipefail
 cd "$(dirname "$0")"
 
+DEV=false
+if [[ "${1:-}" == "--dev" ]]; then
+    DEV=true
+    shift
+fi
+
 # 가상환경 생성 (최초 1회)
 if [ ! -d ".venv" ]; then
     echo "🐍 가상환경 생성 중..."
@@ -32,7 +40,7 @@ if [[ "${1:-}" == "--resource-group" || "${1:-}" == "-g" ]]; then
         echo "❌ OpenAI 리소스를 찾을 수 없습니다"
         exit 1
     fi
-    if [ -z "$SEARCH_NAME" ]; then
+    if [ -z "$SEARCH_NAME" ] && [ "${RETRIEVAL_BACKEND:-azure}" != "local" ]; then
         echo "❌ AI Search 리소스를 찾을 수 없습니다"
         echo "   RAG를 위해 AI Search를 먼저 배포하세요"
         exit 1
@@ -66,7 +74,11 @@ fi
 
 echo ""
 echo "🚀 AI Foundry RAG Chat 서버 시작..."
-echo "   http://localhost:8000"
+echo "   http://localhost:${PORT:-8000}"
 echo ""
 
-python app.py
+if [[ "$DEV" == "true" ]]; then
+    exec python app.py
+fi
+# 운영 모드 — Hypercorn 멀티 워커 (SIGTERM 시 graceful shutdown을 위해 exec)
+exec python serve.py
@@ -7,7 +7,10 @@ const userInput = document.getElementById("userInput");
 const sendBtn = document.getElementById("sendBtn");
 const chatContainer = document.getElementById("chatContainer");
 
+// 화면 렌더링용 히스토리 — 서버 세션이 만료되면 이것으로 새 세션을 만듦
 let chatHistory = [];
+// 서버 측 세션 id — 있으면 새 턴만 전송
+let sessionId = null;
 
 // 자동 높이 조절
 userInput.addEventListener("input", () => {
@@ -33,6 +36,14 @@ function askFollowup(text) {
 
 // 메시지 추가
 function addMessage(role, content, sources) {
+    const bubble = createBubble(role);
+    renderBubble(bubble, content, sources);
+    scrollToBottom();
+    return bubble;
+}
+
+// 빈 말풍선 생성
+function createBubble(role) {
     const msg = document.createElement("div");
     msg.className = `message ${role}`;
 
@@ -43,6 +54,14 @@ function addMessage(role, content, sources) {
     const bubble = document.createElement("div");
     bubble.className = "bubble";
 
+    msg.appendChild(avatar);
+    msg.appendChild(bubble);
+    messagesDiv.appendChild(msg);
+    return bubble;
+}
+
+// 말풍선 내용 렌더링 (후속 질문 / 인용 / 소스 카드)
+function renderBubble(bubble, content, sources) {
     // 후속 질문 파싱 (<<...>>)
     let mainContent = content;
     const followups = [];
@@ -90,11 +109,30 @@ function addMessage(role, content, sources) {
         });
         bubble.appendChild(details);
     }
+}
 
-    msg.appendChild(avatar);
-    msg.appendChild(bubble);
-    messagesDiv.appendChild(msg);
-    scrollToBottom();
+// SSE 스트림 읽기 — "event: x\ndata: {...}\n\n" 프레임 단위로 onEvent 호출
+async function readEventStream(resp, onEvent) {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let event = "message";
+            let data = "";
+            frame.split("\n").forEach(line => {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
 }
 
 // 로딩 표시
@@ -140,26 +178,45 @@ async function sendMessage() {
     showTyping();
 
     try {
-        const resp = await fetch("/chat", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({
-                messages: chatHistory,
-                top: 5,
-                temperature: 0.3,
-            }),
-        });
+        let resp = await postChat(sessionId
+            ? { session_id: sessionId, message: text }
+            : { session: true, messages: chatHistory });
+        if (resp.status === 404 && sessionId) {
+            // 세션 만료 / 다른 서버 — 전체 히스토리로 새 세션 생성
+            resp = await postChat({ session: true, messages: chatHistory });
+        }
+        sessionId = resp.headers.get("X-Session-Id") || sessionId;
 
         if (!resp.ok) {
             const err = await resp.json();
             throw new Error(err.error || `HTTP ${resp.status}`);
         }
 
-        const data = await resp.json();
-        hideTyping();
-
-        addMessage("assistant", data.answer, data.sources);
-        chatHistory.push({ role: "assistant", content: data.answer });
+        // 토큰이 도착하는 대로 말풍선에 표시
+        let bubble = null;
+        let sources = [];
+        let partial = "";
+        await readEventStream(resp, (event, data) => {
+            if (event === "sources") {
+                sources = data;
+            } else if (event === "delta") {
+                if (!bubble) {
+                    hideTyping();
+                    bubble = createBubble("assistant");
+                }
+                partial += data.content;
+                bubble.textContent = partial;
+                scrollToBottom();
+            } else if (event === "done") {
+                hideTyping();
+                if (!bubble) bubble = createBubble("assistant");
+                renderBubble(bubble, data.answer, sources);
+                scrollToBottom();
+                chatHistory.push({ role: "assistant", content: data.answer });
+            } else if (event === "error") {
+                throw new Error(data.error);
+            }
+        });
     } catch (e) {
         hideTyping();
         addMessage("assistant", `⚠️ 오류가 발생했습니다: ${e.message}`);
@@ -169,8 +226,18 @@ async function sendMessage() {
     }
 }
 
+function postChat(payload) {
+    return fetch("/chat", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ ...payload, top: 5, temperature: 0.3, stream: true }),
+    });
+}
+
 // 대화 초기화
 function clearChat() {
+    if (sessionId) fetch(`/sessions/${sessionId}`, { method: "DELETE" });
+    sessionId = null;
     chatHistory = [];
     messagesDiv.innerHTML = "";
     if (welcomeDiv) welcomeDiv.style.display = "block";
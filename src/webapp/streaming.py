@@ -0,0 +1,102 @@
+"""
+Server-Sent Events 스트리밍 헬퍼
+- SSE 이벤트 직렬화
+- 토큰 델타에서 <<후속 질문>> / [source] 인용을 점진적으로 파싱
+"""
+import json
+import re
+
+# 닫히지 않은 << 또는 [ 를 보류할 최대 길이 — 초과 시 일반 텍스트로 방출
+MAX_PENDING = 300
+
+CITATION_RE = re.compile(r"\[([^\[\]]+\.\w+)\]")
+
+
+def sse_event(event: str, data) -> str:
+    """SSE 프레임 문자열 생성 (data는 JSON 직렬화)"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class CitationParser:
+    """스트리밍 델타를 소비하며 후속 질문과 인용을 추출
+
+    feed()는 화면에 바로 출력할 텍스트(<<...>> 제외)를 반환하고,
+    청크 경계에 걸친 << 또는 [ 는 닫힐 때까지 보류한다.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._parts: list[str] = []
+        self.followups: list[str] = []
+        self.citations: list[str] = []
+
+    @property
+    def answer(self) -> str:
+        """원문 전체 (후속 질문 포함 — 대화 히스토리 저장용)"""
+        return "".join(self._parts)
+
+    def feed(self, delta: str) -> str:
+        self._parts.append(delta)
+        text = self._pending + delta
+        self._pending = ""
+        out = []
+        i, n = 0, len(text)
+
+        while i < n:
+            # 특수 문자가 나올 때까지 한 번에 복사
+            j = i
+            while j < n and text[j] not in "<[":
+                j += 1
+            if j > i:
+                out.append(text[i:j])
+                i = j
+                continue
+
+            if text[i] == "<":
+                if i + 1 == n:
+                    self._pending = text[i:]
+                    break
+                if text[i + 1] != "<":
+                    out.append("<")
+                    i += 1
+                    continue
+                end = text.find(">>", i + 2)
+                if end == -1:
+                    if n - i > MAX_PENDING:
+                        out.append(text[i:i + 2])
+                        i += 2
+                        continue
+                    self._pending = text[i:]
+                    break
+                question = text[i + 2:end].strip()
+                if question:
+                    self.followups.append(question)
+                i = end + 2
+                continue
+
+            # text[i] == "["
+            end = text.find("]", i + 1)
+            if end == -1:
+                if n - i > MAX_PENDING:
+                    out.append("[")
+                    i += 1
+                    continue
+                self._pending = text[i:]
+                break
+            if "[" in text[i + 1:end]:
+                out.append("[")
+                i += 1
+                continue
+            match = CITATION_RE.fullmatch(text, i, end + 1)
+            if match and match.group(1) not in self.citations:
+                self.citations.append(match.group(1))
+            out.append(text[i:end + 1])
+            i = end + 1
+
+        return "".join(out)
+
+    def flush(self) -> str:
+        """스트림 종료 시 보류 중인 텍스트 방출"""
+        rest, self._pending = self._pending, ""
+        return rest
@@ -0,0 +1,205 @@
+"""
+관측성 — Prometheus 메트릭(/metrics) + 선택적 OpenTelemetry 트레이스
+- 단계별(rewrite / embed / search / retrieval / cache / completion / first_token) · 요청 전체 지연 히스토그램
+- 토큰 사용량, 캐시 적중/미스, 업스트림 429, 처리 중 요청 수, 호출 한도 대기/거절
+- 멀티 워커: PROMETHEUS_MULTIPROC_DIR 지정 시 워커별 파일을 합산해 노출
+- APPLICATIONINSIGHTS_CONNECTION_STRING이 있고 azure-monitor-opentelemetry가 설치되어 있으면
+  StageTimer 단계마다 span을 만들어 Application Insights로 전송 (없으면 no-op)
+"""
+import functools
+import logging
+import os
+import weakref
+from contextlib import contextmanager, nullcontext
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from quart import g, request
+
+from timing import StageTimer
+
+logger = logging.getLogger("webapp.telemetry")
+
+# 임베딩/검색(수 ms~수백 ms)과 생성(수 초)을 모두 담는 버킷
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_SECONDS = Histogram(
+    "rag_request_duration_seconds", "요청 전체 처리 시간 (스트리밍은 마지막 이벤트까지)",
+    ["endpoint", "status"], buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "요청 단계별 처리 시간",
+    ["endpoint", "stage"], buckets=LATENCY_BUCKETS,
+)
+TOKENS = Counter("rag_tokens", "Azure OpenAI 토큰 사용량", ["deployment", "kind"])
+CACHE_REQUESTS = Counter("rag_cache_requests", "캐시 조회 결과", ["cache", "result"])
+UPSTREAM_THROTTLED = Counter("rag_upstream_throttled", "업스트림 429 응답 수 (재시도 포함)", ["service"])
+PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens", "토큰 예산 적용 후 프롬프트 크기 (추정)",
+    buckets=(250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 12000, 16000),
+)
+SEARCH_PARTIAL = Counter(
+    "rag_search_partial", "추측 실행 검색에서 한쪽 결과 없이 답변한 횟수", ["missing", "reason"],
+)
+LIMITER_WAIT_SECONDS = Histogram(
+    "rag_limiter_wait_seconds", "배포별 호출 한도 대기 시간", ["deployment"], buckets=LATENCY_BUCKETS,
+)
+LIMITER_REJECTED = Counter(
+    "rag_limiter_rejected", "호출 한도 초과로 거절한 요청 (queue_full / budget / upstream)", ["deployment", "reason"],
+)
+IN_FLIGHT = Gauge(
+    "rag_requests_in_flight", "처리 중인 요청 수", ["endpoint"], multiprocess_mode="livesum",
+)
+
+_tracer = None
+
+
+def configure_tracing() -> bool:
+    """Application Insights 연결 문자열이 있으면 OpenTelemetry 내보내기 설정"""
+    global _tracer
+    if not os.environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING"):
+        return False
+    try:
+        from azure.monitor.opentelemetry import configure_azure_monitor
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("azure-monitor-opentelemetry not installed — tracing disabled")
+        return False
+    configure_azure_monitor()
+    _tracer = trace.get_tracer("webapp")
+    return True
+
+
+def span(name: str, **attributes):
+    """현재 컨텍스트에 자식 span 생성 (트레이싱 미설정 시 no-op)"""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+class TracedStageTimer(StageTimer):
+    """단계마다 span도 함께 여는 StageTimer"""
+
+    @contextmanager
+    def stage(self, name: str):
+        with span(name), super().stage(name):
+            yield
+
+
+def observe(endpoint: str, timer: StageTimer, status: int) -> None:
+    for stage, seconds in timer.stages.items():
+        STAGE_SECONDS.labels(endpoint, stage).observe(seconds)
+    REQUEST_SECONDS.labels(endpoint, str(status)).observe(timer.elapsed())
+
+
+def _finisher(endpoint: str, timer: StageTimer):
+    """처리 중 요청 수 감소 + 지연 기록을 한 번만 수행하는 함수"""
+    done = False
+
+    def finish(status: int) -> None:
+        nonlocal done
+        if done:
+            return
+        done = True
+        IN_FLIGHT.labels(endpoint).dec()
+        observe(endpoint, timer, status)
+
+    return finish
+
+
+def instrumented(handler):
+    """라우트 데코레이터 — g.timer 제공, 처리 중 요청 수 / 지연 히스토그램 기록 (endpoint 레이블 = 경로)
+
+    SSE 응답은 본문이 끝날 때 track_stream()이 기록한다.
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        endpoint = request.path
+        g.timer = TracedStageTimer()
+        g.endpoint = endpoint
+        g.streaming = False
+        IN_FLIGHT.labels(endpoint).inc()
+        g.finish_request = _finisher(endpoint, g.timer)
+        status = 500
+        try:
+            with span(f"{request.method} {endpoint}"):
+                rv = await handler(*args, **kwargs)
+            response = rv[0] if isinstance(rv, tuple) else rv
+            status = rv[1] if isinstance(rv, tuple) else response.status_code
+            return rv
+        except Exception as e:
+            # 오류 핸들러가 응답으로 바꾸는 예외 (예: RateLimited → 429/503)
+            status = getattr(e, "status", 500)
+            # track_stream() 이후에 실패해도 스트림 본문은 전송되지 않으므로 여기서 기록
+            g.streaming = False
+            raise
+        finally:
+            if not g.streaming:
+                g.finish_request(status)
+    return wrapper
+
+
+def track_stream(events):
+    """SSE 이벤트 생성기를 감싸 스트림 종료 시점에 메트릭 기록 (instrumented 라우트 안에서 호출)
+
+    본문이 한 번도 소비되지 않고 버려지면(응답 시작 전 연결 끊김 등) 생성기의 finally가 실행되지 않으므로,
+    생성기가 회수될 때 499(클라이언트 종료)로 기록한다.
+    """
+    g.streaming = True
+    finish = g.finish_request
+
+    async def tracked():
+        status = 200
+        try:
+            async for event in events:
+                if event.startswith("event: error"):
+                    status = 502
+                yield event
+        finally:
+            finish(status)
+
+    stream = tracked()
+    weakref.finalize(stream, finish, 499)
+    return stream
+
+
+def record_usage(deployment: str, usage) -> None:
+    if usage is None:
+        return
+    TOKENS.labels(deployment, "prompt").inc(usage.prompt_tokens or 0)
+    # 임베딩 usage에는 completion_tokens가 없음
+    if getattr(usage, "completion_tokens", None) is not None:
+        TOKENS.labels(deployment, "completion").inc(usage.completion_tokens)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+async def count_throttled_response(response) -> None:
+    """httpx 응답 훅 — 재시도로 가려지는 429도 집계"""
+    if response.status_code == 429:
+        UPSTREAM_THROTTLED.labels("openai").inc()
+
+
+def render() -> tuple[bytes, str]:
+    """/metrics 본문 — 멀티 워커면 워커별 파일을 합산"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def worker_exit() -> None:
+    """워커 종료 시 livesum 게이지에서 해당 프로세스 제외"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,44 @@
+"""
+요청 단계별 소요 시간 — Server-Timing 응답 헤더로 노출 (벤치마크가 단계별 분해에 사용)
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """embed / search / completion 등 단계 시간을 누적 (같은 단계를 여러 번 재면 합산)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def record(self, name: str, seconds: float) -> None:
+        """컨텍스트 매니저로 감쌀 수 없는 구간 (예: 스트리밍 생성기 안) 직접 기록"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """Server-Timing 값 — 예: "embed;dur=12.3, search;dur=45.6" (ms)"""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+
+def parse_server_timing(value: str) -> dict[str, float]:
+    """Server-Timing 헤더 → {단계: 초}"""
+    stages = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        for param in params.split(";"):
+            key, _, dur = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(dur) / 1000
+    return stages
@@ -0,0 +1,58 @@
+"""
+AAD 토큰 캐시 — AsyncAzureOpenAI azure_ad_token_provider 용
+만료 전에 선제 갱신하고, 동시 요청은 한 번만 토큰 엔드포인트를 호출 (single-flight)
+"""
+import asyncio
+import time
+
+from azure.core.credentials import AccessToken
+from azure.core.credentials_async import AsyncTokenCredential
+
+COGNITIVE_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+class TokenCache:
+    """만료 refresh_margin초 전부터 갱신하는 비동기 토큰 공급자"""
+
+    def __init__(self, credential: AsyncTokenCredential,
+                 scope: str = COGNITIVE_SCOPE, refresh_margin: int = 300):
+        self._credential = credential
+        self._scope = scope
+        self._margin = refresh_margin
+        self._token: AccessToken | None = None
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+        self.hits = 0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._token is not None
+            and self._token.expires_on - self._margin > time.time()
+        )
+
+    async def get_token(self) -> str:
+        """캐시된 토큰 반환, 만료 임박 시 단일 갱신"""
+        if self._is_fresh():
+            self.hits += 1
+            return self._token.token
+
+        async with self._lock:
+            # 락 대기 중 다른 요청이 이미 갱신했으면 그대로 사용
+            if self._is_fresh():
+                self.hits += 1
+            else:
+                self._token = await self._credential.get_token(self._scope)
+                self.refreshes += 1
+        return self._token.token
+
+    # AsyncAzureOpenAI(azure_ad_token_provider=...)에 그대로 전달
+    __call__ = get_token
+
+    def stats(self) -> dict:
+        return {
+            "token_refreshes": self.refreshes,
+            "token_cache_hits": self.hits,
+            "token_expires_in": (
+                int(self._token.expires_on - time.time()) if self._token else None
+            ),
+        }
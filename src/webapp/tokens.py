@@ -0,0 +1,103 @@
+"""
+토큰 계산 공용 모듈 — 웹앱(rate_limit, context_packer)과 인덱싱 패키지(scripts/ingest)의 기준 구현
+- estimate_tokens: 문자 기반 추정 (영문 약 4자/토큰, 한글 등 비ASCII 약 1자/토큰)
+- Tokenizer: tiktoken 우선, 미설치·인코딩을 받을 수 없는 환경(폐쇄망)에서는 추정치로 대체
+  인코딩은 첫 사용(또는 preload())에서 읽음 — import·워커 기동 시 다운로드 대기 없음,
+  읽는 동안 다른 호출은 추정치 사용
+  TOKENIZER_OFFLINE=true면 네트워크를 시도하지 않음 — TIKTOKEN_CACHE_DIR이 있으면 그 캐시에서 읽고, 없으면 추정치
+- retry_after: 429 응답의 Retry-After(-ms) 헤더
+원본은 이 파일이고 scripts/ingest/tokens.py는 이 파일을 가리키는 심볼릭 링크 — 웹앱은 `tokens`, 인덱싱 패키지는
+`.tokens`(상대 import)로 sys.path 조작 없이 같은 코드를 불러온다.
+양쪽에서 import하므로 표준 라이브러리와 선택적 tiktoken 외 의존성을 두지 않는다.
+"""
+import logging
+import os
+
+logger = logging.getLogger("webapp.tokens")
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 — 영문 약 4자/토큰, 한글 등 비ASCII 약 1자/토큰"""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def retry_after(error) -> float | None:
+    """429 응답의 Retry-After(-ms) 헤더 (초)"""
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass
+    return None
+
+
+class Tokenizer:
+    """토큰 수 계산기 (tiktoken 우선, 실패 시 추정)
+
+    encoding은 대상 모델에 맞춰 지정 — 임베딩(ada-002 / 3-large)은 cl100k_base, gpt-4o는 o200k_base
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._enc = None
+        self._loaded = False
+
+    @property
+    def name(self) -> str:
+        return self.encoding if self._encoder() is not None else "estimate"
+
+    def preload(self) -> None:
+        """인코딩을 미리 읽음 (스레드에서 호출 — tiktoken 다운로드에는 타임아웃이 없음)"""
+        self._encoder()
+
+    def _encoder(self):
+        """tiktoken 인코딩 (처음 한 번만 시도, 실패하면 None)"""
+        if not self._loaded:
+            self._loaded = True
+            offline = os.environ.get("TOKENIZER_OFFLINE", "false").lower() == "true"
+            if offline and not os.environ.get("TIKTOKEN_CACHE_DIR"):
+                logger.info("TOKENIZER_OFFLINE — using character-based token estimate")
+                return None
+            try:
+                import tiktoken
+                self._enc = tiktoken.get_encoding(self.encoding)
+            except Exception as e:  # 미설치 / 인코딩 파일 다운로드 불가
+                logger.warning("tiktoken unavailable — using character-based token estimate (%s)", type(e).__name__)
+        return self._enc
+
+    def count(self, text: str) -> int:
+        enc = self._encoder()
+        if enc is None:
+            return estimate_tokens(text)
+        return len(enc.encode_ordinary(text))
+
+    def count_many(self, texts: list[str]) -> list[int]:
+        enc = self._encoder()
+        if enc is None:
+            return [estimate_tokens(t) for t in texts]
+        return [len(ids) for ids in enc.encode_ordinary_batch(texts)]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """앞에서부터 max_tokens 이내로 자름 (가능하면 공백 경계)"""
+        if self.count(text) <= max_tokens:
+            return text
+        enc = self._encoder()
+        if enc is not None:
+            cut = enc.decode(enc.encode_ordinary(text)[:max_tokens])
+        else:
+            # 추정치 기준 이분 탐색
+            lo, hi = 0, len(text)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if estimate_tokens(text[:mid]) <= max_tokens:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            cut = text[:lo]
+        space = cut.rfind(" ")
+        return (cut[:space] if space > len(cut) // 2 else cut).rstrip() + " …"